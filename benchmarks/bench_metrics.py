@@ -0,0 +1,160 @@
+"""绩效指标: 逐因子 groupby().apply(p.xxx) vs batch_metrics 批量计算
+
+先用手算的期望值 (``KNOWN_CASES``, 含前置缺失、无回撤与单行等边界) 校验
+``batch_metrics``; 口径同 ``factorview.batch_metrics``: 一年 252 个交易日, 标准差
+ddof=1, 缺失收益按 0 计入天数, 因子上市前的空缺不计入。
+
+需要安装 quantfactor, 同时校验与 ``quantfactor.p`` 的结果在容差内一致;
+``--fake`` 时使用 ``fake_quantfactor`` 中按相同口径实现的 ``p``, 只比较耗时。用法::
+
+    python -m benchmarks.bench_metrics --factors 1000 --days 1500
+    python -m benchmarks.bench_metrics --check   # 只校验手算的期望值
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from factorview.batch_metrics import batch_ic_stats, batch_perf_stats
+
+
+def make_long_returns(n_factors: int, n_days: int, seed: int = 0) -> pd.DataFrame:
+    """构造 (date, factor_name) 索引的收益长表, 因子起止日期参差不齐"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2018-01-01", periods=n_days, name="date")
+    frames = []
+    for i in range(n_factors):
+        start = int(rng.integers(0, n_days // 3))
+        end = n_days - int(rng.integers(0, n_days // 10))
+        index = pd.MultiIndex.from_product(
+            [dates[start:end], [f"factor_{i:04d}"]], names=["date", "factor_name"]
+        )
+        values = rng.normal(0.0003, 0.01, size=(len(index), 2))
+        values[rng.random(values.shape) < 0.005] = np.nan
+        frames.append(pd.DataFrame(values, index=index, columns=["excess_ret", "corr"]))
+    return pd.concat(frames).sort_index()
+
+
+# 手算的用例: 名称 → (各日收益, 期望的 (年化收益, 最大回撤, 夏普, 卡玛));
+# 收益为 None 的日期该因子没有记录 (尚未上市), NaN 为有记录但收益缺失。
+# 卡玛 = 年化收益 / |最大回撤|, 无回撤时为 NaN
+SHARPE_BASIC = 0.05 / np.sqrt(0.05 / 3) * np.sqrt(252)
+KNOWN_CASES: dict[str, tuple[list, tuple[float, float, float, float]]] = {
+    # 上市前两天无记录; 净值 1.1, 0.99, 1.188, 1.188, 均值 0.05, 离差平方和 0.05
+    "basic": (
+        [None, None, 0.1, -0.1, 0.2, 0.0],
+        (1.188**63 - 1, -0.1, SHARPE_BASIC, (1.188**63 - 1) / 0.1),
+    ),
+    # 前两天有记录但收益缺失: 按 0 计入天数, 不参与均值与标准差
+    "leading_nan": (
+        [np.nan, np.nan, 0.1, -0.1, 0.2, 0.0],
+        (1.188**42 - 1, -0.1, SHARPE_BASIC, (1.188**42 - 1) / 0.1),
+    ),
+    # 净值单调上升
+    "no_drawdown": (
+        [None, None, None, 0.01, 0.02, 0.03],
+        ((1.01 * 1.02 * 1.03) ** 84 - 1, 0.0, 2 * np.sqrt(252), np.nan),
+    ),
+    # 单行: 样本标准差无定义
+    "single_row": (
+        [None, None, None, None, None, 0.05],
+        (1.05**252 - 1, 0.0, np.nan, np.nan),
+    ),
+}
+
+
+def check_known_values(rtol: float = 1e-9) -> list[str]:
+    """用手算的期望值校验 batch_metrics, 返回结果不一致的用例"""
+    dates = pd.bdate_range("2024-01-01", periods=6, name="date")
+    returns = pd.concat(
+        [
+            pd.Series(values, index=dates, dtype="float64")
+            .loc[[v is not None for v in values]]
+            .to_frame("excess_ret")
+            .assign(factor_name=name)
+            .set_index("factor_name", append=True)["excess_ret"]
+            for name, (values, _) in KNOWN_CASES.items()
+        ]
+    ).sort_index()
+    res = batch_perf_stats(returns)
+    expected = pd.DataFrame(
+        [case[1] for case in KNOWN_CASES.values()],
+        index=list(KNOWN_CASES),
+        columns=res.columns,
+    )
+    diff = ~np.isclose(
+        res.loc[expected.index], expected, rtol=rtol, atol=1e-12, equal_nan=True
+    )
+    return list(expected.index[diff.any(axis=1)])
+
+
+def legacy_stats(df: pd.DataFrame, p) -> pd.DataFrame:
+    perf = (
+        df["excess_ret"]
+        .groupby("factor_name")
+        .apply(
+            lambda x: x.droplevel("factor_name").agg(
+                [p.annual_return, p.max_drawdown, p.sharpe_ratio, p.calmar_ratio]
+            )
+        )
+        .unstack()
+    )
+    ic = df["corr"].groupby("factor_name")
+    return pd.concat(
+        [perf, ic.mean().rename("ic"), (ic.mean() / ic.std()).rename("icir")], axis=1
+    )
+
+
+def batch_stats(df: pd.DataFrame) -> pd.DataFrame:
+    return pd.concat(
+        [batch_perf_stats(df["excess_ret"]), batch_ic_stats(df["corr"])], axis=1
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--factors", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=1500)
+    parser.add_argument("--rtol", type=float, default=1e-6)
+    parser.add_argument("--fake", action="store_true")
+    parser.add_argument("--check", action="store_true", help="只校验手算的期望值")
+    args = parser.parse_args()
+
+    failed = check_known_values()
+    if failed:
+        print("与手算期望值不一致的用例:", failed)
+        raise SystemExit(1)
+    print("手算期望值校验通过")
+    if args.check:
+        return
+
+    if args.fake:
+        from benchmarks.fake_quantfactor import p
+    else:
+        from quantfactor import p
+
+    df = make_long_returns(args.factors, args.days)
+
+    start = time.perf_counter()
+    legacy = legacy_stats(df, p)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = batch_stats(df)
+    batch_time = time.perf_counter() - start
+
+    batch = batch.reindex(index=legacy.index, columns=legacy.columns)
+    diff = ~np.isclose(batch, legacy, rtol=args.rtol, atol=1e-12, equal_nan=True)
+    print(f"factors={args.factors} days={args.days}")
+    print(f"groupby.apply : {legacy_time:8.3f}s")
+    print(f"batch_metrics : {batch_time:8.3f}s  ({legacy_time / batch_time:.1f}x)")
+    if diff.any():
+        print("结果不一致的列:", list(legacy.columns[diff.any(axis=0)]))
+        raise SystemExit(1)
+    print("结果一致")
+
+
+if __name__ == "__main__":
+    main()
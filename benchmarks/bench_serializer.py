@@ -0,0 +1,98 @@
+"""序列化性能对比: 原逐元素递归的 clean_for_json vs 向量化序列化
+
+用法::
+
+    python -m benchmarks.bench_serializer --factors 200 --days 2000
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from factorview.serializer import dumps, frame_block
+
+
+def legacy_clean_for_json(data):
+    """原 main.py 中的实现, 作为对照"""
+    if isinstance(data, pd.DataFrame):
+        return {c: legacy_clean_for_json(data[c]) for c in data.columns}
+    if isinstance(data, (list, tuple, pd.Index, pd.Series, np.ndarray)):
+        return [legacy_clean_for_json(x) for x in data]
+    elif isinstance(data, dict):
+        return {k: legacy_clean_for_json(v) for k, v in data.items()}
+    elif isinstance(data, (float, int)):
+        return None if pd.isna(data) else data
+    if isinstance(data, pd.Timestamp):
+        return data.strftime(r"%Y-%m-%d")
+    return data
+
+
+def make_backtest_dict(n_factors: int, n_days: int, seed: int = 0) -> dict:
+    """构造与 load_factor_stats_backtest 返回结构相同的随机数据"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2018-01-01", periods=n_days, name="date")
+    columns = [
+        "strategy_ret",
+        "index_ret",
+        "excess_ret",
+        "holding_num",
+        "turnover",
+        "transaction_fee",
+    ]
+    res = {}
+    for i in range(n_factors):
+        values = rng.normal(0, 0.01, size=(n_days, len(columns)))
+        values[rng.random(values.shape) < 0.01] = np.nan
+        df = pd.DataFrame(values, index=dates, columns=columns)
+        df["holding_num"] = rng.integers(50, 200, size=n_days).astype(float)
+        res[f"factor_{i:04d}"] = df
+    return res
+
+
+def legacy_serialize(data: dict) -> bytes:
+    content = {
+        name: {
+            "values": legacy_clean_for_json(df),
+            "index": legacy_clean_for_json(df.index),
+        }
+        for name, df in data.items()
+    }
+    return json.dumps(content, ensure_ascii=False, allow_nan=False).encode("utf-8")
+
+
+def fast_serialize(data: dict) -> bytes:
+    return dumps({name: frame_block(df) for name, df in data.items()})
+
+
+def timeit(func, *args, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--factors", type=int, default=200)
+    parser.add_argument("--days", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    data = make_backtest_dict(args.factors, args.days)
+    assert json.loads(legacy_serialize(data)) == json.loads(fast_serialize(data))
+
+    legacy = timeit(legacy_serialize, data, repeat=args.repeat)
+    fast = timeit(fast_serialize, data, repeat=args.repeat)
+    size = len(fast_serialize(data))
+    print(f"factors={args.factors} days={args.days} payload={size / 1e6:.1f}MB")
+    print(f"clean_for_json : {legacy:8.3f}s")
+    print(f"serializer     : {fast:8.3f}s  ({legacy / fast:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""端到端基准: 合成数据上的 load_* 函数与 HTTP 接口
+
+以 ``fake_quantfactor`` 代替数据库, 对每个 ``load_*`` 函数与每个接口 (经 ASGI
+测试客户端) 分别测量冷启动 (清空缓存) 与缓存命中的耗时、tracemalloc 内存峰值
+和数据源调用次数, 与保存的基线对比, 有退化时以非零状态退出。用法::
+
+    python -m benchmarks.bench_suite --factors 1000 --days 2000 --latency 0.02
+    # 保存为基线 (默认 benchmarks/baselines/{factors}x{days}.json)
+    python -m benchmarks.bench_suite --factors 1000 --days 2000 --save-baseline
+    # 只运行名称包含 stats 的用例
+    python -m benchmarks.bench_suite -k stats
+
+快照与增量状态目录指向临时目录, 统计接口走实时计算。
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks import fake_quantfactor
+
+BASELINE_DIR: Path = Path(__file__).parent / "baselines"
+# 低于该绝对差值 (秒 / MB) 的变化视为噪声
+MIN_DELTA: dict[str, float] = {"cold": 0.005, "warm": 0.002, "peak_mb": 1.0}
+
+
+def loader_cases(data_loader, manager, stats_factors: int) -> dict:
+    """每个 load_* 函数一个用例"""
+    factor = manager.names[0]
+    strategy = manager.strategies[0]
+    subset = manager.names[:stats_factors]
+    return {
+        "load_factor_info": lambda: data_loader.load_factor_info(),
+        "load_factor_stats": lambda: data_loader.load_factor_stats(),
+        "load_factor_perf": lambda: data_loader.load_factor_perf(factor),
+        "load_factor_stats_backtest": lambda: data_loader.load_factor_stats_backtest(
+            factor_names=subset
+        ),
+        "load_factor_stats_group": lambda: data_loader.load_factor_stats_group(
+            factor_names=subset
+        ),
+        "load_factor_stats_ic": lambda: data_loader.load_factor_stats_ic(
+            factor_names=subset
+        ),
+        "load_factor_update_info": lambda: data_loader.load_factor_update_info(),
+        "load_recent_status": lambda: data_loader.load_recent_status(),
+        "load_data_version": lambda: data_loader.load_data_version(),
+        "load_strategy_info": lambda: data_loader.load_strategy_info(),
+        "load_strategy_perf": lambda: data_loader.load_strategy_perf(strategy),
+        "load_strategy_factor_stats": lambda: data_loader.load_strategy_factor_stats(
+            strategy
+        ),
+    }
+
+
+def route_cases(manager, stats_factors: int) -> dict[str, tuple[str, dict]]:
+    """每个接口的典型请求, 值为 (路径, 查询参数)"""
+    factor = manager.names[0]
+    strategy = manager.strategies[0]
+    subset = {"factor_names[]": manager.names[:stats_factors]}
+    return {
+        "GET /api/factor": ("/api/factor", {}),
+        "GET /api/factor/stats": ("/api/factor/stats", {}),
+        "GET /api/factor/stats?page": (
+            "/api/factor/stats",
+            {"sort_by": "icir", "ascending": False, "limit": 200},
+        ),
+        "GET /api/factor/stats/backtest": ("/api/factor/stats/backtest", subset),
+        "GET /api/factor/stats/backtest?stream": (
+            "/api/factor/stats/backtest",
+            {**subset, "stream": True},
+        ),
+        "GET /api/factor/stats/group": ("/api/factor/stats/group", subset),
+        "GET /api/factor/stats/ic": ("/api/factor/stats/ic", subset),
+        "GET /api/factor/stats/ic?summary": (
+            "/api/factor/stats/ic",
+            {**subset, "summary": True, "series": False},
+        ),
+        "GET /api/factor/update": ("/api/factor/update", {}),
+        "GET /api/factor/{name}": (f"/api/factor/{factor}", {}),
+        "GET /api/factor/{name}?max_points": (
+            f"/api/factor/{factor}",
+            {"max_points": 1000, "summary": True},
+        ),
+        "GET /api/strategy": ("/api/strategy", {}),
+        "GET /api/strategy/{name}": (f"/api/strategy/{strategy}", {}),
+        "GET /api/strategy/{name}/factors": (f"/api/strategy/{strategy}/factors", {}),
+    }
+
+
+def measure(func, repeat: int, clear, manager) -> dict:
+    """冷启动与缓存命中各运行 ``repeat`` 次取中位数, 另运行一次冷启动记录内存峰值"""
+    cold, warm = [], []
+    for _ in range(repeat):
+        clear()
+        calls = sum(manager.calls.values())
+        start = time.perf_counter()
+        res = func()
+        cold.append(time.perf_counter() - start)
+        db_calls = sum(manager.calls.values()) - calls
+
+        start = time.perf_counter()
+        func()
+        warm.append(time.perf_counter() - start)
+
+    clear()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result = {
+        "cold": statistics.median(cold),
+        "warm": statistics.median(warm),
+        "peak_mb": peak / 2**20,
+        "db_calls": db_calls,
+    }
+    if hasattr(res, "content"):
+        result["bytes"] = len(res.content)
+    return result
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """超出基线 (1 + tolerance) 倍且超过噪声阈值的指标"""
+    regressions = []
+    for name, res in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for key, min_delta in MIN_DELTA.items():
+            if (
+                res[key] > base[key] * (1 + tolerance)
+                and res[key] - base[key] > min_delta
+            ):
+                regressions.append(
+                    f"{name} {key}: {base[key]:.4g} -> {res[key]:.4g}"
+                    f" ({res[key] / base[key]:.2f}x)"
+                )
+    return regressions
+
+
+def print_table(results: dict, baseline: dict):
+    print(
+        f"{'case':<42}{'cold ms':>10}{'warm ms':>10}{'peak MB':>10}"
+        f"{'db calls':>10}{'KB':>10}{'vs base':>9}"
+    )
+    for name, res in results.items():
+        base = baseline.get(name)
+        ratio = f"{res['cold'] / base['cold']:.2f}x" if base else "-"
+        size = f"{res['bytes'] / 1024:.0f}" if "bytes" in res else "-"
+        print(
+            f"{name:<42}{res['cold'] * 1000:>10.1f}{res['warm'] * 1000:>10.2f}"
+            f"{res['peak_mb']:>10.1f}{res['db_calls']:>10}{size:>10}{ratio:>9}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--factors", type=int, default=200)
+    parser.add_argument("--days", type=int, default=1500)
+    parser.add_argument("--strategies", type=int, default=10)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="每次数据源调用的延迟 (秒)"
+    )
+    parser.add_argument(
+        "--stats-factors", type=int, default=100, help="多因子序列接口请求的因子数"
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "-k", dest="pattern", default="", help="只运行名称包含该字符串的用例"
+    )
+    parser.add_argument("--baseline", type=Path, default=None)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="允许的相对退化")
+    args = parser.parse_args()
+
+    config = {
+        "factors": args.factors,
+        "days": args.days,
+        "strategies": args.strategies,
+        "latency": args.latency,
+        "stats_factors": args.stats_factors,
+    }
+    baseline_path = args.baseline or BASELINE_DIR / f"{args.factors}x{args.days}.json"
+
+    # 不读取本地快照与增量状态
+    workdir = tempfile.mkdtemp(prefix="factorview-bench-")
+    os.environ["FACTORVIEW_SNAPSHOT_DIR"] = os.path.join(workdir, "snapshots")
+    os.environ["FACTORVIEW_STATE_DIR"] = os.path.join(workdir, "state")
+    manager = fake_quantfactor.install(
+        n_factors=args.factors,
+        n_days=args.days,
+        n_strategies=args.strategies,
+        latency=args.latency,
+    )
+
+    from fastapi.testclient import TestClient
+
+    from factorview import data_loader
+    from factorview.cache import result_cache
+    from factorview.main import app
+    from factorview.series_cache import series_cache
+
+    def clear():
+        result_cache.clear()
+        series_cache.clear()
+
+    cases = loader_cases(data_loader, manager, args.stats_factors)
+    uncovered = {n for n in dir(data_loader) if n.startswith("load_")} - set(cases)
+    if uncovered:
+        print("未覆盖的 load_* 函数:", ", ".join(sorted(uncovered)), file=sys.stderr)
+
+    client = TestClient(app)
+
+    def request(path: str, params: dict):
+        def call():
+            response = client.get(path, params=params)
+            response.raise_for_status()
+            return response
+
+        return call
+
+    for name, (path, params) in route_cases(manager, args.stats_factors).items():
+        cases[name] = request(path, params)
+
+    results = {}
+    for name, func in cases.items():
+        if args.pattern in name:
+            results[name] = measure(func, args.repeat, clear, manager)
+
+    baseline = {}
+    if baseline_path.exists():
+        stored = json.loads(baseline_path.read_text())
+        if stored["config"] != config:
+            print(f"基线配置不同, 不做对比: {stored['config']}", file=sys.stderr)
+        else:
+            baseline = stored["results"]
+
+    print(json.dumps(config))
+    print_table(results, baseline)
+
+    if args.save_baseline:
+        merged = {**baseline, **results}
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(
+            json.dumps({"config": config, "results": merged}, indent=2)
+        )
+        print(f"基线已保存: {baseline_path}")
+        return
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("性能退化:")
+        for line in regressions:
+            print("  " + line)
+        raise SystemExit(1)
+    if baseline:
+        print("未发现退化")
+    else:
+        print(f"没有可对比的基线: {baseline_path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""合成的 quantfactor 替身
+
+提供与 ``factorview`` 用到的接口一致的 ``FactorManagerAll``、``p`` 与
+``stock_calendar``, 数据由固定种子生成, 不依赖数据库。必须在导入 ``factorview``
+之前调用 ``install``::
+
+    from benchmarks import fake_quantfactor
+
+    fake_quantfactor.install(n_factors=1000, n_days=2000, latency=0.05)
+    from factorview import data_loader
+
+每个因子的序列取自同一块预生成的随机数组的不同偏移, 起始日期参差不齐;
+``latency`` 为每次调用额外等待的秒数, 模拟数据库往返。
+"""
+
+import sys
+import time
+import types
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from factorview.batch_metrics import ANNUAL_DAYS
+
+GROUP_FIELDS: list[str] = [f"Group_{i:02d}" for i in range(1, 11)] + ["LS_Hedge"]
+BACKTEST_FIELDS: list[str] = [
+    "strategy_ret",
+    "index_ret",
+    "excess_ret",
+    "holding_num",
+    "turnover",
+    "transaction_fee",
+]
+PERF_FIELDS: dict[str, list[str]] = {
+    "ic": ["corr"],
+    "group_pnl": GROUP_FIELDS,
+    "backtest_ret": BACKTEST_FIELDS,
+}
+# 各字段的均值与波动
+FIELD_PARAMS: dict[str, tuple[float, float]] = {
+    "corr": (0.02, 0.08),
+    "holding_num": (200.0, 20.0),
+    "turnover": (0.15, 0.05),
+    "transaction_fee": (0.0003, 0.0001),
+}
+DEFAULT_PARAMS: tuple[float, float] = (0.0003, 0.012)
+
+CLASS_NAMES: list[str] = ["量价", "基本面", "另类", "分析师"]
+# 每个策略组合的源因子数
+SOURCE_FACTORS: int = 20
+
+
+def factor_names(n_factors: int) -> list[str]:
+    return [f"factor_{i:04d}" for i in range(n_factors)]
+
+
+def strategy_names(n_strategies: int) -> list[str]:
+    return [f"strategy_{i:02d}" for i in range(n_strategies)]
+
+
+class FakeFactorManagerAll:
+    """``FactorManagerAll`` 的合成实现, 记录每个方法的调用次数"""
+
+    def __init__(
+        self,
+        n_factors: int = 200,
+        n_days: int = 1500,
+        n_strategies: int = 10,
+        latency: float = 0.0,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.names = factor_names(n_factors)
+        self.strategies = strategy_names(n_strategies)
+        self._known = set(self.names) | set(self.strategies)
+        self.dates = pd.bdate_range(
+            end=pd.Timestamp.today().normalize() - pd.offsets.BDay(1),
+            periods=n_days,
+            name="date",
+        )
+        self.calls: dict[str, int] = {}
+        rng = np.random.default_rng(seed)
+        # 预生成的数据池, 每个因子按名称哈希取其中连续的 n_days 行
+        self._pool = {
+            perf_type: self._make_pool(rng, fields, n_days + 997)
+            for perf_type, fields in PERF_FIELDS.items()
+        }
+
+    @staticmethod
+    def _make_pool(rng, fields: list[str], n_rows: int) -> np.ndarray:
+        params = np.array([FIELD_PARAMS.get(f, DEFAULT_PARAMS) for f in fields])
+        values = rng.normal(params[:, 0], params[:, 1], size=(n_rows, len(fields)))
+        values[rng.random(values.shape) < 0.002] = np.nan
+        return values
+
+    def _call(self, name: str):
+        self.calls[name] = self.calls.get(name, 0) + 1
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+    def _start(self, name: str) -> int:
+        """因子起始日期的行号, 最多晚于第一天三分之一的历史"""
+        return zlib.crc32(name.encode()) % max(len(self.dates) // 3, 1)
+
+    def _series(self, perf_type: str, name: str, columns: list[int]) -> np.ndarray:
+        pool = self._pool[perf_type]
+        offset = zlib.crc32(name.encode()) % (len(pool) - len(self.dates) + 1)
+        return pool[offset : offset + len(self.dates), columns]
+
+    def get_factor_names(self, factor_names: list[str] = None, **kwargs) -> list[str]:
+        self._call("get_factor_names")
+        if factor_names is None:
+            return list(self.names)
+        if isinstance(factor_names, str):
+            factor_names = [factor_names]
+        return [name for name in factor_names if name in self._known]
+
+    def get_info_factor(
+        self, factor_names: list[str] = None, query=None, **kwargs
+    ) -> pd.DataFrame:
+        self._call("get_info_factor")
+        names = self.names if factor_names is None else list(factor_names)
+        codes = np.array([zlib.crc32(name.encode()) for name in names])
+        return pd.DataFrame(
+            {
+                "factor_id": [f"F{c % 100000:05d}" for c in codes],
+                "table_name": [f"factor_table_{c % 8}" for c in codes],
+                "class_name": [CLASS_NAMES[c % len(CLASS_NAMES)] for c in codes],
+                "develop_code": [f"dev_{c % 5}" for c in codes],
+                "status": "online",
+                "creation_time": self.dates[[self._start(n) for n in names]],
+            },
+            index=pd.Index(names, name="factor_name"),
+        )
+
+    def get_perf_factor(
+        self,
+        perf_type: str,
+        factor_names,
+        start_date=None,
+        end_date=None,
+        fields=None,
+        index_col=None,
+        query=None,
+        is_cache=False,
+        **kwargs,
+    ) -> pd.DataFrame:
+        self._call("get_perf_factor")
+        all_fields = PERF_FIELDS[perf_type]
+        if fields is None:
+            fields = all_fields
+        elif isinstance(fields, str):
+            fields = [fields]
+        columns = [all_fields.index(f) for f in fields]
+        names = [factor_names] if isinstance(factor_names, str) else list(factor_names)
+
+        lo = 0 if start_date is None else self.dates.searchsorted(start_date)
+        hi = (
+            len(self.dates)
+            if end_date is None
+            else self.dates.searchsorted(pd.Timestamp(end_date), side="right")
+        )
+        blocks, dates, keys = [], [], []
+        for name in names:
+            start = max(self._start(name), lo)
+            if start >= hi:
+                continue
+            blocks.append(self._series(perf_type, name, columns)[start:hi])
+            dates.append(self.dates[start:hi])
+            keys.append(np.full(hi - start, name, dtype=object))
+        if not blocks:
+            return pd.DataFrame(
+                index=pd.MultiIndex.from_tuples([], names=["date", "factor_name"]),
+                columns=fields,
+                dtype="float64",
+            )
+        index = pd.MultiIndex.from_arrays(
+            [np.concatenate(dates), np.concatenate(keys)],
+            names=["date", "factor_name"],
+        )
+        df = pd.DataFrame(np.concatenate(blocks), index=index, columns=fields)
+        df = df.sort_index()
+        if index_col == "date" or index_col == ["date"]:
+            df = df.droplevel("factor_name")
+        return df
+
+    def get_date_status_factor(
+        self, factor_names: list[str] = None, start_date=None, end_date=None, **kwargs
+    ) -> pd.DataFrame:
+        self._call("get_date_status_factor")
+        names = self.names if factor_names is None else list(factor_names)
+        starts = self.dates[[self._start(n) for n in names]]
+        return pd.DataFrame(
+            {
+                "factor_name": names,
+                "start_date": starts,
+                "end_date": self.dates[-1],
+                "date_num": [len(self.dates) - self._start(n) for n in names],
+                "miss_num": 0,
+            }
+        )
+
+    def get_info_strategy(
+        self, strategy_names=None, pools=None, optimizer_indexs=None, **kwargs
+    ) -> pd.DataFrame:
+        self._call("get_info_strategy")
+        if strategy_names is None:
+            names = self.strategies
+        else:
+            if isinstance(strategy_names, str):
+                strategy_names = [strategy_names]
+            names = [name for name in strategy_names if name in self._known]
+        return pd.DataFrame(
+            {
+                "strategy_name": names,
+                "factor_name": [name.replace("strategy", "combine") for name in names],
+                "pool": pools or "all",
+                "optimizer_index": optimizer_indexs or "000905.SH",
+                "benchmark_index": kwargs.get("benchmark_indexs") or "000905.SH",
+            }
+        )
+
+    def get_source_factors(self, combine_name: str, is_return_list: bool = False):
+        self._call("get_source_factors")
+        seed = zlib.crc32(combine_name.encode())
+        n = min(SOURCE_FACTORS, len(self.names))
+        picked = np.random.default_rng(seed).choice(len(self.names), n, replace=False)
+        names = [self.names[i] for i in sorted(picked)]
+        return names if is_return_list else pd.Series(names, name="factor_name")
+
+
+class FakeStockCalendar:
+    @staticmethod
+    def get_shift_date(date, n: int) -> str:
+        if date == "today":
+            date = pd.Timestamp.today().normalize()
+        return (pd.Timestamp(date) + pd.offsets.BDay(n)).strftime("%Y-%m-%d")
+
+
+class p:
+    """与 ``batch_metrics`` 口径一致的逐序列指标"""
+
+    @staticmethod
+    def _nav(returns: pd.Series) -> pd.Series:
+        return (1 + returns.fillna(0)).cumprod()
+
+    @staticmethod
+    def annual_return(returns: pd.Series) -> float:
+        return p._nav(returns).iloc[-1] ** (ANNUAL_DAYS / len(returns)) - 1
+
+    @staticmethod
+    def max_drawdown(returns: pd.Series) -> float:
+        nav = p._nav(returns)
+        return (nav / nav.cummax() - 1).min()
+
+    @staticmethod
+    def sharpe_ratio(returns: pd.Series) -> float:
+        return returns.mean() / returns.std() * np.sqrt(ANNUAL_DAYS)
+
+    @staticmethod
+    def calmar_ratio(returns: pd.Series) -> float:
+        max_dd = p.max_drawdown(returns)
+        return p.annual_return(returns) / abs(max_dd) if max_dd < 0 else np.nan
+
+
+def install(
+    n_factors: int = 200,
+    n_days: int = 1500,
+    n_strategies: int = 10,
+    latency: float = 0.0,
+    seed: int = 0,
+) -> FakeFactorManagerAll:
+    """以合成数据注册 ``quantfactor`` 模块, 返回 ``FactorManagerAll`` 实例"""
+    if "factorview.data_loader" in sys.modules:
+        raise RuntimeError("install 必须在导入 factorview.data_loader 之前调用")
+    manager = FakeFactorManagerAll(n_factors, n_days, n_strategies, latency, seed)
+    module = types.ModuleType("quantfactor")
+    module.FactorManagerAll = manager
+    module.stock_calendar = FakeStockCalendar()
+    module.p = p
+    sys.modules["quantfactor"] = module
+    return manager
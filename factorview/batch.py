@@ -0,0 +1,255 @@
+"""批量请求
+
+页面打开时会同时请求统计、IC、分组、回测、策略表现等多个接口, 各接口分别读取
+数据源, 同一批因子的同一类表现数据可能被并发读取多次。``POST /api/batch`` 一次
+提交多个 GET 子请求::
+
+    {"queries": [{"id": "ic", "path": "/api/factor/stats/ic", "params": {...}}, ...]}
+
+- 规划: 按 (perf_type, 查询条件) 汇总各子请求要用到的全历史序列, 被两个及以上
+  子请求用到的序列先一次批量读入序列缓存, 依赖它们的子请求随后直接命中缓存;
+  路径与参数完全相同的子请求只执行一次
+- 执行: 子请求在进程内按普通 GET 请求经过路由与参数校验并发执行, 仍受各接口的
+  并发限制与请求合并约束, 分阶段耗时计入批量请求本身
+- 返回: ``{"results": [{"id", "status", "body"}, ...]}``, 顺序与请求一致, 单个
+  子请求失败只影响该项的 ``status`` 与 ``body``
+
+子请求不支持 ``stream``, 一律返回 JSON。
+"""
+
+import asyncio
+import functools
+import json
+import logging
+import os
+from urllib.parse import quote, unquote, urlencode
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from .executor import fan_out, run_blocking
+from .serializer import dumps
+from .series_cache import prefetch_series
+from .source import FactorManagerAll
+
+logger = logging.getLogger(__name__)
+
+# 一次批量请求最多包含的子请求数
+BATCH_MAX_QUERIES: int = int(os.environ.get("FACTORVIEW_BATCH_MAX_QUERIES", 50))
+# 子请求 scope 中的标记, 分阶段耗时统计据此不单独统计子请求
+SUBREQUEST_KEY: str = "factorview.subrequest"
+
+DEFAULT_PARAMS: dict[str, str] = {
+    "pool": "all",
+    "optimizer_index": "000905.SH",
+    "benchmark_index": "000905.SH",
+}
+# 多因子序列接口使用的表现类型
+STATS_SERIES: dict[str, str] = {
+    "/api/factor/stats/backtest": "backtest_ret",
+    "/api/factor/stats/group": "group_pnl",
+    "/api/factor/stats/ic": "ic",
+}
+# /api/factor/{name} 之外的 /api/factor/* 路径
+FACTOR_SUBPATHS: set[str] = {"stats", "update"}
+TRUE_VALUES: set[str] = {"1", "true", "yes", "on"}
+
+
+class BatchQuery(BaseModel):
+    path: str
+    params: dict = {}
+    id: str | int | None = None
+
+
+class BatchRequest(BaseModel):
+    queries: list[BatchQuery]
+
+
+def _param(params: dict, name: str):
+    value = params.get(name, DEFAULT_PARAMS.get(name))
+    return value[0] if isinstance(value, list) and value else value
+
+
+def _factor_names(params: dict) -> tuple | None:
+    names = params.get("factor_names[]", params.get("factor_names"))
+    if names is None:
+        return None
+    return (names,) if isinstance(names, str) else tuple(names)
+
+
+def _perf_query(perf_type: str, params: dict, pool: bool = True) -> tuple:
+    """与 ``data_loader`` 中各加载函数一致的查询条件"""
+    query = [("pool", _param(params, "pool"))] if pool else []
+    if perf_type == "backtest_ret":
+        query += [
+            ("optimizer_index", _param(params, "optimizer_index")),
+            ("benchmark_index", _param(params, "benchmark_index")),
+        ]
+    return tuple(query)
+
+
+def _series_needs(path: str, params: dict) -> list[tuple]:
+    """子请求会读取的全历史序列, 每项为 (perf_type, 查询条件, 因子名 | None 表示全部)"""
+    if path in STATS_SERIES:
+        perf_type = STATS_SERIES[path]
+        return [(perf_type, _perf_query(perf_type, params), _factor_names(params))]
+    parts = path.strip("/").split("/")
+    if len(parts) == 3 and parts[:2] == ["api", "factor"]:
+        if parts[2] in FACTOR_SUBPATHS:
+            return []
+        return [
+            (perf_type, _perf_query(perf_type, params), (parts[2],))
+            for perf_type in ("ic", "group_pnl", "backtest_ret")
+        ]
+    if len(parts) == 3 and parts[:2] == ["api", "strategy"]:
+        return [
+            (
+                "backtest_ret",
+                _perf_query("backtest_ret", params, pool=False),
+                (parts[2],),
+            )
+        ]
+    return []
+
+
+def plan_series(queries: list[tuple[str, dict]]) -> tuple[tuple, set[int]]:
+    """汇总被多个子请求用到的序列, 返回 (预读分组, 依赖预读的子请求下标)"""
+    groups: dict[tuple, list] = {}
+    for i, (path, params) in enumerate(queries):
+        for perf_type, query, names in _series_needs(path, params):
+            group = groups.setdefault((perf_type, query), [set(), []])
+            if names is None or group[0] is None:
+                group[0] = None
+            else:
+                group[0].update(names)
+            group[1].append(i)
+
+    shared, dependents = [], set()
+    for (perf_type, query), (names, users) in groups.items():
+        if len(users) > 1:
+            names = None if names is None else tuple(sorted(names))
+            shared.append((perf_type, query, names))
+            dependents.update(users)
+    return tuple(shared), dependents
+
+
+def prefetch_plan(groups: tuple) -> int:
+    """按规划把共用的序列并发读入序列缓存, 返回读取的因子数"""
+    calls = []
+    for perf_type, query, names in groups:
+        names = FactorManagerAll.get_factor_names(
+            factor_names=None if names is None else list(names)
+        )
+        calls.append(
+            functools.partial(prefetch_series, perf_type, list(names), list(query))
+        )
+    return sum(fan_out(*calls))
+
+
+def _query_string(params: dict) -> bytes:
+    items = []
+    for key, value in params.items():
+        for v in value if isinstance(value, (list, tuple)) else [value]:
+            if v is None:
+                continue
+            items.append((key, str(v).lower() if isinstance(v, bool) else v))
+    return urlencode(items).encode("latin-1")
+
+
+async def _subrequest(request: Request, path: str, params: dict) -> tuple[int, bytes]:
+    """在进程内执行一个 GET 子请求, 返回 (状态码, JSON 响应体)"""
+    scope = {
+        "type": "http",
+        "asgi": request.scope.get("asgi", {"version": "3.0"}),
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": request.scope.get("scheme", "http"),
+        "server": request.scope.get("server"),
+        "client": request.scope.get("client"),
+        "root_path": "",
+        "path": path,
+        "raw_path": quote(path).encode("latin-1"),
+        "query_string": _query_string(params),
+        "headers": [(b"accept", b"application/json")],
+        SUBREQUEST_KEY: True,
+    }
+    status, content_type, chunks = 500, b"", []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status, content_type
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            content_type = dict(message.get("headers", [])).get(b"content-type", b"")
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await request.app(scope, receive, send)
+    except Exception:
+        # 错误响应已由 ServerErrorMiddleware 发出, 这里只记录, 不影响其他子请求
+        logger.exception("批量子请求失败: %s", path)
+    body = b"".join(chunks) or b"null"
+    if not content_type.startswith(b"application/json"):
+        body = dumps({"detail": body.decode("utf-8", "replace")})
+    return status, body
+
+
+def _validate(path: str, params: dict) -> str | None:
+    if not path.startswith("/api/") or path.rstrip("/") in (
+        "/api/batch",
+        "/api/events",
+    ):
+        return f"不支持的子请求路径: {path}"
+    if str(params.get("stream", "")).lower() in TRUE_VALUES:
+        return "批量请求不支持 stream"
+    return None
+
+
+async def run_batch(request: Request, queries: list[BatchQuery]) -> Response:
+    """规划并并发执行子请求, 按请求顺序拼接各子请求的 JSON 响应体"""
+    unique: dict[str, int] = {}
+    items: list[tuple[str, dict]] = []
+    slots: list[int | tuple[int, bytes]] = []
+    for q in queries:
+        path = unquote(q.path)
+        error = _validate(path, q.params)
+        if error is not None:
+            slots.append((400, dumps({"detail": error})))
+            continue
+        key = json.dumps([path, q.params], sort_keys=True, default=str)
+        if key not in unique:
+            unique[key] = len(items)
+            items.append((path, q.params))
+        slots.append(unique[key])
+
+    groups, dependents = plan_series(items)
+    prefetch = (
+        asyncio.ensure_future(run_blocking("batch", prefetch_plan, groups))
+        if groups
+        else None
+    )
+
+    async def run(i: int, path: str, params: dict):
+        if i in dependents:
+            try:
+                await prefetch
+            except Exception:
+                # 预读失败时子请求各自读取
+                pass
+        return await _subrequest(request, path, params)
+
+    results = await asyncio.gather(
+        *(run(i, path, params) for i, (path, params) in enumerate(items))
+    )
+
+    parts = []
+    for q, slot in zip(queries, slots):
+        status, body = slot if isinstance(slot, tuple) else results[slot]
+        head = dumps({"id": q.id, "status": status})
+        parts.append(head[:-1] + b',"body":' + body + b"}")
+    return Response(
+        b'{"results":[' + b",".join(parts) + b"]}", media_type="application/json"
+    )
@@ -0,0 +1,157 @@
+"""批量绩效指标
+
+把 (date, factor_name) 索引的长表一次性转为 date × factor 的稠密矩阵,
+对所有因子同时计算年化收益、最大回撤、夏普、卡玛、IC 均值 / ICIR 与年化换手,
+代替逐因子 ``groupby().apply(p.xxx)`` 的写法。
+
+口径与 ``quantfactor.p`` 保持一致:
+
+- 缺失收益按 0 处理, 年化收益 = 期末净值 ** (252 / 天数) - 1
+- 最大回撤从因子第一个交易日的净值开始计算, 为负数
+- 夏普 = 日均收益 / 日收益标准差(ddof=1) * sqrt(252)
+- 卡玛 = 年化收益 / |最大回撤|, 无回撤时为 NaN
+
+因子上市时间不同造成的前后空缺不计入天数, 也不参与净值与回撤计算。
+"""
+
+import numpy as np
+import pandas as pd
+
+ANNUAL_DAYS: int = 252
+
+
+def level_codes(index: pd.Index, name: str) -> tuple[np.ndarray, pd.Index]:
+    """索引某一层的 (编码, 升序去重值), 与 ``pd.factorize(..., sort=True)`` 相同
+
+    ``MultiIndex`` 直接复用其 levels / codes, 不必把整层展开成逐行的对象数组。
+    """
+    if not isinstance(index, pd.MultiIndex):
+        return pd.factorize(index.get_level_values(name), sort=True)
+    i = index.names.index(name)
+    level, codes = index.levels[i], index.codes[i]
+    used = np.unique(codes[codes >= 0])
+    order = used[level[used].argsort()]
+    remap = np.full(len(level) + 1, -1, dtype=np.intp)
+    remap[order] = np.arange(len(order))
+    # 缺失值的编码 -1 映射到 remap[-1], 仍为 -1
+    return remap[codes], level[order]
+
+
+def to_matrix(
+    data: pd.Series | pd.DataFrame,
+) -> tuple[pd.Index, pd.Index, np.ndarray, np.ndarray]:
+    """长表转为 date × factor 矩阵
+
+    返回 ``(dates, factor_names, values, present)``。``values`` 为
+    ``(日期数, 因子数[, 列数])`` 的 float64 数组, 缺失为 NaN;
+    ``present`` 标记该因子当天是否有记录 (与值是否为 NaN 无关)。
+    """
+    date_codes, dates = level_codes(data.index, "date")
+    factor_codes, factor_names = level_codes(data.index, "factor_name")
+    dates = pd.Index(dates, name="date")
+    factor_names = pd.Index(factor_names, name="factor_name")
+
+    raw = data.to_numpy(dtype="float64", na_value=np.nan)
+    values = np.full((len(dates), len(factor_names)) + raw.shape[1:], np.nan)
+    values[date_codes, factor_codes] = raw
+    present = np.zeros((len(dates), len(factor_names)), dtype=bool)
+    present[date_codes, factor_codes] = True
+    return dates, factor_names, values, present
+
+
+def _per_column(arr: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """多列数据时给按因子的数组补上列维度"""
+    return arr[..., None] if values.ndim == 3 else arr
+
+
+def _nan_mean_std(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """按列计算忽略 NaN 的均值与样本标准差"""
+    valid = ~np.isnan(values)
+    count = valid.sum(axis=0)
+    filled = np.where(valid, values, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = filled.sum(axis=0) / count
+        sq = np.where(valid, values - mean, 0.0) ** 2
+        std = np.sqrt(sq.sum(axis=0) / (count - 1))
+    std = np.where(count > 1, std, np.nan)
+    return mean, std
+
+
+def _nav(values: np.ndarray, present: np.ndarray) -> np.ndarray:
+    """净值矩阵, 因子第一个交易日之前为 NaN"""
+    nav = np.cumprod(1.0 + np.nan_to_num(values, nan=0.0), axis=0)
+    started = np.logical_or.accumulate(present, axis=0)
+    return np.where(_per_column(started, values), nav, np.nan)
+
+
+def annual_return(values: np.ndarray, present: np.ndarray) -> np.ndarray:
+    """年化收益"""
+    count = _per_column(present.sum(axis=0), values)
+    final = np.prod(1.0 + np.nan_to_num(values, nan=0.0), axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        res = final ** (ANNUAL_DAYS / count) - 1
+    return np.where(count > 0, res, np.nan)
+
+
+def max_drawdown(values: np.ndarray, present: np.ndarray) -> np.ndarray:
+    """最大回撤"""
+    if not len(values):
+        return np.full(values.shape[1:], np.nan)
+    nav = _nav(values, present)
+    peak = np.fmax.accumulate(nav, axis=0)
+    return np.fmin.reduce(nav / peak - 1, axis=0)
+
+
+def sharpe_ratio(values: np.ndarray) -> np.ndarray:
+    """夏普比率"""
+    mean, std = _nan_mean_std(values)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return mean / std * np.sqrt(ANNUAL_DAYS)
+
+
+def calmar_ratio(annual_ret: np.ndarray, max_dd: np.ndarray) -> np.ndarray:
+    """卡玛比率"""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(max_dd < 0, annual_ret / np.abs(max_dd), np.nan)
+
+
+def batch_annual_return(returns: pd.DataFrame) -> pd.DataFrame:
+    """各因子各列的年化收益, 索引为 factor_name"""
+    _, factor_names, values, present = to_matrix(returns)
+    return pd.DataFrame(
+        annual_return(values, present).reshape(len(factor_names), -1),
+        index=factor_names,
+        columns=returns.columns,
+    )
+
+
+def batch_perf_stats(returns: pd.Series) -> pd.DataFrame:
+    """各因子收益的年化收益、最大回撤、夏普与卡玛"""
+    _, factor_names, values, present = to_matrix(returns)
+    annual_ret = annual_return(values, present)
+    max_dd = max_drawdown(values, present)
+    return pd.DataFrame(
+        {
+            "annual_return": annual_ret,
+            "max_drawdown": max_dd,
+            "sharpe_ratio": sharpe_ratio(values),
+            "calmar_ratio": calmar_ratio(annual_ret, max_dd),
+        },
+        index=factor_names,
+    )
+
+
+def batch_ic_stats(ic: pd.Series) -> pd.DataFrame:
+    """各因子 IC 均值与 ICIR"""
+    _, factor_names, values, _ = to_matrix(ic)
+    mean, std = _nan_mean_std(values)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        icir = mean / std
+    return pd.DataFrame({"ic": mean, "icir": icir}, index=factor_names)
+
+
+def batch_annual_turnover(turnover: pd.Series) -> pd.Series:
+    """各因子年化换手"""
+    _, factor_names, values, _ = to_matrix(turnover)
+    mean, _ = _nan_mean_std(values)
+    return pd.Series(mean * ANNUAL_DAYS, index=factor_names, name="turnover")
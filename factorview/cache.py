@@ -0,0 +1,220 @@
+"""进程内结果缓存
+
+缓存 ``data_loader`` 中 ``load_*`` 函数的结果, 代替原先单一的 ``IS_CACHE`` 开关:
+
+- 缓存键由规范化后的参数构成: 日期统一解析为 ``YYYY-MM-DD``, 缺省参数补全为
+  默认值, 因此等价的请求命中同一条缓存; 因子列表保持原顺序与重复项, 结果的行序
+  与请求一致
+- 命中时返回缓存中的同一个对象, 不复制, 调用方只能读取
+- 按估算的内存占用设上限, 超出时按 LRU 淘汰
+- 每类数据单独设置过期时间
+- 记录命中/未命中/淘汰次数, 可通过管理接口查看与清空
+"""
+
+import functools
+import inspect
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# 缓存内存上限 (MB), 0 表示关闭缓存
+CACHE_MAX_MB: float = float(os.environ.get("FACTORVIEW_CACHE_MAX_MB", 512))
+# 默认过期时间 (秒)
+DEFAULT_TTL: float = float(os.environ.get("FACTORVIEW_CACHE_TTL", 1800))
+# 各类数据的过期时间 (秒)
+CACHE_TTL: dict[str, float] = {
+    "factor_info": 600,
+    "factor_update": 300,
+    "strategy_info": 600,
+    "data_version": 60,
+    "strategy_graph": 3600,
+}
+for _item in os.environ.get("FACTORVIEW_CACHE_TTLS", "").split(","):
+    if "=" in _item:
+        _name, _ttl = _item.split("=", 1)
+        CACHE_TTL[_name.strip()] = float(_ttl)
+
+_DATE_ARGS = ("start_date", "end_date")
+
+
+def _normalize(name: str, value):
+    """参数规范化, 使等价的参数得到相同的缓存键"""
+    if value is None:
+        return None
+    if name in _DATE_ARGS:
+        try:
+            return pd.Timestamp(value).strftime("%Y-%m-%d")
+        except (TypeError, ValueError):
+            return str(value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _normalize(k, v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set, frozenset, pd.Index, np.ndarray)):
+        items = [_normalize(name, v) for v in value]
+        # 集合无序, 排序后作为键; 列表的顺序决定结果的行序, 原样保留
+        if isinstance(value, (set, frozenset)):
+            return tuple(sorted(items, key=str))
+        return tuple(items)
+    if isinstance(value, pd.Timestamp):
+        return value.strftime("%Y-%m-%d")
+    return value
+
+
+def make_key(name: str, func, *args, **kwargs) -> tuple:
+    """按函数签名补全默认参数并规范化, 生成缓存键"""
+    bound = inspect.signature(func).bind(*args, **kwargs)
+    bound.apply_defaults()
+    params = []
+    for arg, value in bound.arguments.items():
+        if bound.signature.parameters[arg].kind is inspect.Parameter.VAR_KEYWORD:
+            params.extend((k, _normalize(k, v)) for k, v in value.items())
+        else:
+            params.append((arg, _normalize(arg, value)))
+    return (name, tuple(sorted(params)))
+
+
+def estimate_size(value) -> int:
+    """估算对象占用的内存字节数"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        size = value.memory_usage(deep=True)
+        return int(size.sum() if isinstance(size, pd.Series) else size)
+    if isinstance(value, pd.Index):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """带内存上限与过期时间的 LRU 缓存
+
+    ``generation`` 在清除缓存时加一。加载前记下 ``generation`` 并在写入时传给
+    ``put``, 加载期间缓存被清除时丢弃这次写入, 避免清除前读到的旧数据重新写回。
+    """
+
+    def __init__(self, max_bytes: int, default_ttl: float = DEFAULT_TTL):
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.bytes = 0
+        self.hits: dict[str, int] = {}
+        self.misses: dict[str, int] = {}
+        self.evictions = 0
+        self.generation = 0
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple):
+        """取缓存, 未命中或已过期返回 ``(False, None)``"""
+        name = key[0]
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits[name] = self.hits.get(name, 0) + 1
+                return True, entry[0]
+            if entry is not None:
+                self._pop(key)
+            self.misses[name] = self.misses.get(name, 0) + 1
+            return False, None
+
+    def put(self, key: tuple, value, ttl: float, generation: int = None):
+        size = estimate_size(value)
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            if key in self._data:
+                self._pop(key)
+            self._data[key] = (value, time.monotonic() + ttl, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._pop(next(iter(self._data)))
+                self.evictions += 1
+
+    def _pop(self, key: tuple):
+        _, _, size = self._data.pop(key)
+        self.bytes -= size
+
+    def clear(self, name: str = None) -> int:
+        """清空缓存, 指定 ``name`` 时只清空该类数据, 返回清除的条数"""
+        with self._lock:
+            if name is None:
+                self.generation += 1
+            keys = [k for k in self._data if name is None or k[0] == name]
+            for key in keys:
+                self._pop(key)
+            return len(keys)
+
+    def discard(self, match) -> int:
+        """清除键满足 ``match(key)`` 的缓存, 返回清除的条数"""
+        with self._lock:
+            self.generation += 1
+            keys = [k for k in self._data if match(k)]
+            for key in keys:
+                self._pop(key)
+            return len(keys)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries: dict[str, int] = {}
+            for key in self._data:
+                entries[key[0]] = entries.get(key[0], 0) + 1
+            names = sorted(set(self.hits) | set(self.misses) | set(entries))
+            return {
+                "max_bytes": self.max_bytes,
+                "bytes": self.bytes,
+                "evictions": self.evictions,
+                "endpoints": {
+                    name: {
+                        "entries": entries.get(name, 0),
+                        "hits": self.hits.get(name, 0),
+                        "misses": self.misses.get(name, 0),
+                        "ttl": CACHE_TTL.get(name, self.default_ttl),
+                    }
+                    for name in names
+                },
+            }
+
+
+result_cache = ResultCache(int(CACHE_MAX_MB * 1024 * 1024))
+
+
+def cached(name: str):
+    """缓存 ``load_*`` 函数结果的装饰器, 返回的对象为共享对象, 调用方不应修改"""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if result_cache.max_bytes <= 0:
+                return func(*args, **kwargs)
+            key = make_key(name, func, *args, **kwargs)
+            hit, value = result_cache.get(key)
+            if hit:
+                return value
+            generation = result_cache.generation
+            value = func(*args, **kwargs)
+            result_cache.put(
+                key, value, CACHE_TTL.get(name, DEFAULT_TTL), generation=generation
+            )
+            return value
+
+        def lookup(*args, **kwargs):
+            """只查缓存不加载, 返回 ``(是否命中, 结果)``"""
+            if result_cache.max_bytes <= 0:
+                return False, None
+            return result_cache.get(make_key(name, func, *args, **kwargs))
+
+        wrapper.cache_name = name
+        wrapper.cache_lookup = lookup
+        return wrapper
+
+    return decorator
@@ -1,9 +1,38 @@
-import pandas as pd
-from quantfactor import FactorManagerAll, p, stock_calendar
-
-IS_CACHE: bool = False
+import functools
+import os
+import threading
+import time
 
+import pandas as pd
 
+from .batch_metrics import (
+    batch_annual_return,
+    batch_annual_turnover,
+    batch_ic_stats,
+    batch_perf_stats,
+    level_codes,
+)
+from .cache import CACHE_TTL, DEFAULT_TTL, cached, make_key, result_cache
+from .executor import fan_out
+from .incremental import read_state, state_stats
+from .mirror import get_perf_factor
+from .series_cache import get_perf_series
+from .snapshot import read_snapshot, subset_snapshot
+from .source import FactorManagerAll, stock_calendar
+from .status_index import STATUS_START_DATE, latest_status, with_staleness
+from .strategy_graph import strategy_sources
+
+# 流式接口每次读取的因子数
+STREAM_CHUNK_SIZE: int = 20
+# 实时计算因子统计时每批因子的内存预算 (MB), 0 表示所有因子一次计算
+STATS_MEMORY_MB: float = float(os.environ.get("FACTORVIEW_STATS_MEMORY_MB", 512))
+# 分批计算时第一批的因子数, 之后按实际占用的内存调整
+STATS_FIRST_CHUNK: int = 200
+# 是否以 float32 保存统计用的表现数据, 内存减半
+STATS_FLOAT32: bool = os.environ.get("FACTORVIEW_STATS_FLOAT32", "0") in ("1", "true")
+
+
+@cached("factor_info")
 def load_factor_info(
     factor_names: list[str] = None,
     table_names: list[str] = None,
@@ -46,6 +75,7 @@ def load_factor_info(
     return factor_info_df
 
 
+@cached("factor_stats")
 def load_factor_stats(
     factor_names: list[str] = None,
     start_date: str = None,
@@ -55,22 +85,84 @@ def load_factor_stats(
     benchmark_index: str = "000905.SH",
     **kwargs,
 ):
-    """取因子统计信息"""
-    factor_info_df = FactorManagerAll.get_info_factor(
+    """取因子统计信息
+
+    全历史请求优先由增量状态得出 (状态中没有的因子实时计算), 其次读取匹配的快照,
+    都没有时实时计算。
+    """
+    if not kwargs:
+        if start_date is None and end_date is None:
+            state = read_state(
+                pool=pool,
+                optimizer_index=optimizer_index,
+                benchmark_index=benchmark_index,
+            )
+            if state is not None:
+                factor_info_df = FactorManagerAll.get_info_factor(
+                    factor_names=factor_names,
+                    query=["status not in  ('tmp')"],
+                    is_cache=False,
+                )
+                names = pd.Index(factor_info_df.index, name="factor_name")
+                stats = state_stats(state, names[names.isin(state.index)])
+                missing = names[~names.isin(state.index)]
+                if len(missing):
+                    # 状态更新后新增的因子不在状态中, 实时计算后并入
+                    _, *extra = compute_factor_stats(
+                        factor_names=list(missing),
+                        pool=pool,
+                        optimizer_index=optimizer_index,
+                        benchmark_index=benchmark_index,
+                    )
+                    stats = tuple(
+                        pd.concat([df, new]).reindex(names)
+                        for df, new in zip(stats, extra)
+                    )
+                return (factor_info_df, *stats)
+        snapshot = read_snapshot(
+            start_date=start_date,
+            end_date=end_date,
+            pool=pool,
+            optimizer_index=optimizer_index,
+            benchmark_index=benchmark_index,
+        )
+        if snapshot is not None:
+            return subset_snapshot(snapshot, factor_names)
+    return compute_factor_stats(
         factor_names=factor_names,
-        query=[("status not in  ('tmp')")],
-        is_cache=IS_CACHE,
+        start_date=start_date,
+        end_date=end_date,
+        pool=pool,
+        optimizer_index=optimizer_index,
+        benchmark_index=benchmark_index,
+        **kwargs,
     )
-    if factor_info_df.empty:
-        factor_names = pd.Index([], name="factor_name")
-    else:
-        factor_names = pd.Index(factor_info_df.index, name="factor_name")
 
-    date_df = pd.DataFrame(
-        index=factor_names, columns=["min", "max"], dtype="datetime64[ns]"
+
+def _date_range(perf_df: pd.DataFrame) -> pd.DataFrame:
+    """各因子数据的起止日期, 直接按索引编码分组, 不复制整张表"""
+    date_codes, dates = level_codes(perf_df.index, "date")
+    factor_codes, factor_names = level_codes(perf_df.index, "factor_name")
+    valid = (date_codes >= 0) & (factor_codes >= 0)
+    bounds = (
+        pd.Series(date_codes[valid]).groupby(factor_codes[valid]).agg(["min", "max"])
+    )
+    return pd.DataFrame(
+        {"min": dates[bounds["min"]], "max": dates[bounds["max"]]},
+        index=factor_names[bounds.index],
     )
 
-    ic_df = FactorManagerAll.get_perf_factor(
+
+def _compact(perf_df: pd.DataFrame) -> tuple[pd.DataFrame, int]:
+    """按配置转为 float32, 返回 (数据, 占用字节数)"""
+    if STATS_FLOAT32:
+        perf_df = perf_df.astype("float32")
+    return perf_df, int(perf_df.memory_usage(index=True).sum())
+
+
+def _ic_stats(factor_names, start_date, end_date, pool, **kwargs) -> tuple:
+    """读取 IC 并汇总, 返回 (统计, 起止日期, 原始数据字节数), 没有数据时统计为 None"""
+    ic_df = get_perf_factor(
         perf_type="ic",
         factor_names=factor_names,
         start_date=start_date,
@@ -78,39 +170,18 @@ def load_factor_stats(
         fields=["corr"],
         index_col=["date", "factor_name"],
         query=[("pool", pool)],
-        is_cache=IS_CACHE,
+        is_cache=False,
         **kwargs,
     )
     if ic_df.empty:
-        ic_stats = pd.DataFrame(index=factor_names, columns=["ic", "icir"])
-    else:
-        ic_stats = (
-            ic_df["corr"]
-            .groupby("factor_name")
-            .pipe(
-                lambda x: pd.concat(
-                    [
-                        x.mean().rename("ic"),
-                        (x.mean() / x.std()).rename("icir"),
-                    ],
-                    axis=1,
-                ).reindex(factor_names)
-            )
-        )
-        _date_ic = (
-            ic_df.reset_index("date")["date"]
-            .groupby("factor_name")
-            .agg(["min", "max"])
-            .reindex(factor_names)
-        )
-        date_df["min"] = (
-            date_df[["min"]].join(_date_ic["min"], rsuffix="_2").max(axis=1)
-        )
-        date_df["max"] = (
-            date_df[["max"]].join(_date_ic["max"], rsuffix="_2").min(axis=1)
-        )
+        return None, None, 0
+    ic_df, nbytes = _compact(ic_df)
+    return batch_ic_stats(ic_df["corr"]), _date_range(ic_df), nbytes
+
 
-    group_df = FactorManagerAll.get_perf_factor(
+def _group_stats(factor_names, start_date, end_date, pool, **kwargs) -> tuple:
+    """读取分组收益并汇总, 返回 (统计, 起止日期, 原始数据字节数), 没有数据时统计为 None"""
+    group_df = get_perf_factor(
         perf_type="group_pnl",
         factor_names=factor_names,
         start_date=start_date,
@@ -118,40 +189,33 @@ def load_factor_stats(
         fields=["Group_01", "Group_10", "LS_Hedge"],
         index_col=["date", "factor_name"],
         query=[("pool", pool)],
-        is_cache=IS_CACHE,
+        is_cache=False,
         **kwargs,
     )
     if group_df.empty:
-        group_stats = pd.DataFrame(
-            index=factor_names, columns=["bottom_ret", "top_ret", "long_short_ret"]
-        )
-    else:
-        group_stats = (
-            group_df.groupby("factor_name")
-            .apply(lambda x: x.droplevel("factor_name").agg(p.annual_return))
-            .reindex(factor_names)
-            .rename(
-                columns={
-                    "Group_01": "bottom_ret",
-                    "Group_10": "top_ret",
-                    "LS_Hedge": "long_short_ret",
-                }
-            )
-        )
-        _date_group = (
-            group_df.reset_index("date")["date"]
-            .groupby("factor_name")
-            .agg(["min", "max"])
-            .reindex(factor_names)
-        )
-        date_df["min"] = (
-            date_df[["min"]].join(_date_group["min"], rsuffix="_2").max(axis=1)
-        )
-        date_df["max"] = (
-            date_df[["max"]].join(_date_group["max"], rsuffix="_2").min(axis=1)
-        )
+        return None, None, 0
+    group_df, nbytes = _compact(group_df)
+    group_stats = batch_annual_return(group_df).rename(
+        columns={
+            "Group_01": "bottom_ret",
+            "Group_10": "top_ret",
+            "LS_Hedge": "long_short_ret",
+        }
+    )
+    return group_stats, _date_range(group_df), nbytes
 
-    backtest_df = FactorManagerAll.get_perf_factor(
+
+def _backtest_stats(
+    factor_names,
+    start_date,
+    end_date,
+    pool,
+    optimizer_index,
+    benchmark_index,
+    **kwargs,
+) -> tuple:
+    """读取回测收益并汇总, 返回 (统计, 起止日期, 原始数据字节数), 没有数据时统计为 None"""
+    backtest_df = get_perf_factor(
         perf_type="backtest_ret",
         factor_names=factor_names,
         start_date=start_date,
@@ -163,12 +227,134 @@ def load_factor_stats(
             ("optimizer_index", optimizer_index),
             ("benchmark_index", benchmark_index),
         ],
-        is_cache=IS_CACHE,
+        is_cache=False,
         **kwargs,
     )
     if backtest_df.empty:
+        return None, None, 0
+    backtest_df, nbytes = _compact(backtest_df)
+    backtest_stats = pd.concat(
+        [
+            batch_perf_stats(backtest_df["excess_ret"]),
+            batch_annual_turnover(backtest_df["turnover"]),
+        ],
+        axis=1,
+    )
+    return backtest_stats, _date_range(backtest_df), nbytes
+
+
+def _batched_stats(factor_names: pd.Index, perf_calls) -> list[tuple]:
+    """按内存预算分批计算三类统计后合并, 返回 [(统计, 起止日期), ...]
+
+    各因子的统计互不依赖, 分批结果与一次计算相同。第一批 ``STATS_FIRST_CHUNK``
+    个因子, 之后按上一批的实际占用调整批大小; 稠密矩阵等中间结果按原始数据的
+    一倍估计。
+    """
+    merged = [([], []) for _ in range(3)]
+    chunk, start = STATS_FIRST_CHUNK, 0
+    while start < len(factor_names):
+        batch = factor_names[start : start + chunk]
+        start += len(batch)
+        nbytes = 0
+        for (stats_list, dates_list), (stats, dates, size) in zip(
+            merged, fan_out(*perf_calls(batch))
+        ):
+            if stats is not None:
+                stats_list.append(stats)
+                dates_list.append(dates)
+            nbytes += size
+        per_factor = max(2 * nbytes / len(batch), 1)
+        chunk = max(int(STATS_MEMORY_MB * 2**20 / per_factor), 1)
+    return [
+        (pd.concat(stats_list), pd.concat(dates_list)) if stats_list else (None, None)
+        for stats_list, dates_list in merged
+    ]
+
+
+def _merge_dates(date_ranges: list, factor_names: pd.Index) -> pd.DataFrame:
+    """三类数据共同覆盖的日期范围: 起始取最晚, 结束取最早"""
+    date_df = pd.DataFrame(
+        index=factor_names, columns=["min", "max"], dtype="datetime64[ns]"
+    )
+    date_ranges = [df.reindex(factor_names) for df in date_ranges if df is not None]
+    if date_ranges:
+        starts = pd.concat([df["min"] for df in date_ranges], axis=1).max(axis=1)
+        ends = pd.concat([df["max"] for df in date_ranges], axis=1).min(axis=1)
+        date_df["min"] = starts.astype(date_df["min"].dtype)
+        date_df["max"] = ends.astype(date_df["max"].dtype)
+    return date_df
+
+
+def compute_factor_stats(
+    factor_names: list[str] = None,
+    start_date: str = None,
+    end_date: str = None,
+    pool: str = "all",
+    optimizer_index: str = "000905.SH",
+    benchmark_index: str = "000905.SH",
+    **kwargs,
+):
+    """实时计算因子统计信息
+
+    因子信息与 IC、分组、回测三类数据并发读取, 各自汇总后再对齐到因子信息;
+    未指定因子或因子较多时, 先由因子信息得到因子列表, 再按 ``STATS_MEMORY_MB``
+    分批读取与计算, 每批内三类数据并发读取。
+    """
+    get_info = functools.partial(
+        FactorManagerAll.get_info_factor,
+        factor_names=factor_names,
+        query=["status not in  ('tmp')"],
+        is_cache=False,
+    )
+
+    def perf_calls(names) -> list:
+        params = dict(start_date=start_date, end_date=end_date, pool=pool, **kwargs)
+        return [
+            functools.partial(_ic_stats, names, **params),
+            functools.partial(_group_stats, names, **params),
+            functools.partial(
+                _backtest_stats,
+                names,
+                optimizer_index=optimizer_index,
+                benchmark_index=benchmark_index,
+                **params,
+            ),
+        ]
+
+    def info_names(factor_info_df: pd.DataFrame) -> pd.Index:
+        if factor_info_df.empty:
+            return pd.Index([], name="factor_name")
+        return pd.Index(factor_info_df.index, name="factor_name")
+
+    if isinstance(factor_names, str):
+        factor_names = [factor_names]
+    batched = STATS_MEMORY_MB > 0
+    if factor_names is None or (batched and len(factor_names) > STATS_FIRST_CHUNK):
+        factor_info_df = get_info()
+        names = info_names(factor_info_df)
+        if batched:
+            parts = _batched_stats(names, perf_calls)
+        else:
+            parts = [part[:2] for part in fan_out(*perf_calls(names))]
+    else:
+        factor_info_df, *parts = fan_out(get_info, *perf_calls(list(factor_names)))
+        names = info_names(factor_info_df)
+        parts = [part[:2] for part in parts]
+    (ic_stats, ic_dates), (group_stats, group_dates), (bt_stats, bt_dates) = parts
+
+    if ic_stats is None:
+        ic_stats = pd.DataFrame(index=names, columns=["ic", "icir"])
+    else:
+        ic_stats = ic_stats.reindex(names)
+    if group_stats is None:
+        group_stats = pd.DataFrame(
+            index=names, columns=["bottom_ret", "top_ret", "long_short_ret"]
+        )
+    else:
+        group_stats = group_stats.reindex(names)
+    if bt_stats is None:
         backtest_stats = pd.DataFrame(
-            index=factor_names,
+            index=names,
             columns=[
                 "annual_return",
                 "max_drawdown",
@@ -178,42 +364,13 @@ def load_factor_stats(
             ],
         )
     else:
-        backtest_stats = backtest_df.groupby("factor_name").pipe(
-            lambda x: pd.concat(
-                [
-                    x["excess_ret"]
-                    .apply(
-                        lambda x: x.droplevel("factor_name").agg(
-                            [
-                                p.annual_return,
-                                p.max_drawdown,
-                                p.sharpe_ratio,
-                                p.calmar_ratio,
-                            ]
-                        )
-                    )
-                    .unstack(),
-                    x["turnover"].mean().mul(252),
-                ],
-                axis=1,
-            ).reindex(factor_names)
-        )
-        _date_backtest = (
-            backtest_df.reset_index("date")["date"]
-            .groupby("factor_name")
-            .agg(["min", "max"])
-            .reindex(factor_names)
-        )
-        date_df["min"] = (
-            date_df[["min"]].join(_date_backtest["min"], rsuffix="_2").max(axis=1)
-        )
-        date_df["max"] = (
-            date_df[["max"]].join(_date_backtest["max"], rsuffix="_2").min(axis=1)
-        )
+        backtest_stats = bt_stats.reindex(names)
+    date_df = _merge_dates([ic_dates, group_dates, bt_dates], names)
 
     return (factor_info_df, ic_stats, group_stats, backtest_stats, date_df)
 
 
+@cached("factor_perf")
 def load_factor_perf(
     factor_name: str,
     start_date: str = None,
@@ -223,203 +380,168 @@ def load_factor_perf(
     benchmark_index: str = "000905.SH",
     **kwargs,
 ):
-    """取单个因子表现"""
-    if start_date is not None:
-        start_date = pd.to_datetime(start_date)
-        _start = start_date - pd.DateOffset(days=400)
-    else:
-        _start = None
-    ic_df = FactorManagerAll.get_perf_factor(
-        perf_type="ic",
-        factor_names=factor_name,
-        start_date=_start,
-        end_date=end_date,
-        index_col="date",
-        fields="corr",
-        query=[("pool", pool)],
-        is_cache=IS_CACHE,
-        **kwargs,
-    )
-    ic_df["corr_roll"] = ic_df["corr"].rolling(252, min_periods=60).mean()
-    if start_date is not None:
-        ic_df = ic_df.loc[start_date:]
-    group_df = FactorManagerAll.get_perf_factor(
-        perf_type="group_pnl",
-        factor_names=factor_name,
-        start_date=start_date,
-        end_date=end_date,
-        index_col="date",
-        fields=[
-            "Group_01",
-            "Group_02",
-            "Group_03",
-            "Group_04",
-            "Group_05",
-            "Group_06",
-            "Group_07",
-            "Group_08",
-            "Group_09",
-            "Group_10",
-            "LS_Hedge",
-        ],
-        query=[("pool", pool)],
-        is_cache=IS_CACHE,
-        **kwargs,
-    )
-    backtest_df = FactorManagerAll.get_perf_factor(
-        perf_type="backtest_ret",
-        factor_names=factor_name,
-        start_date=start_date,
-        end_date=end_date,
-        index_col="date",
-        fields=[
-            "strategy_ret",
-            "index_ret",
-            "excess_ret",
-            "holding_num",
-            "turnover",
-            "transaction_fee",
-        ],
-        query=[
-            ("pool", pool),
-            ("optimizer_index", optimizer_index),
-            ("benchmark_index", benchmark_index),
-        ],
-        is_cache=IS_CACHE,
-        **kwargs,
-    )
-
-    return (ic_df, group_df, backtest_df)
-
-
-def load_factor_stats_backtest(
-    factor_names: list[str] = None,
-    start_date: str = None,
-    end_date: str = None,
-    pool: str = "all",
-    optimizer_index: str = "000905.SH",
-    benchmark_index: str = "000905.SH",
-    **kwargs,
-):
-    """取因子回测统计信息"""
-    factor_names = FactorManagerAll.get_factor_names(factor_names=factor_names)
-    res: dict[str, pd.DataFrame] = {}
-    for factor_name in factor_names:
-        backtest_df = FactorManagerAll.get_perf_factor(
-            perf_type="backtest_ret",
-            factor_names=factor_name,
-            start_date=start_date,
-            end_date=end_date,
-            index_col="date",
-            fields=[
-                "strategy_ret",
-                "index_ret",
-                "excess_ret",
-                "holding_num",
-                "turnover",
-                "transaction_fee",
-            ],
+    """取单个因子表现, IC、分组、回测三类数据并发读取"""
+    params = dict(start_date=start_date, end_date=end_date, **kwargs)
+    results = fan_out(
+        functools.partial(
+            get_perf_series, "ic", [factor_name], query=[("pool", pool)], **params
+        ),
+        functools.partial(
+            get_perf_series,
+            "group_pnl",
+            [factor_name],
+            query=[("pool", pool)],
+            **params,
+        ),
+        functools.partial(
+            get_perf_series,
+            "backtest_ret",
+            [factor_name],
             query=[
                 ("pool", pool),
                 ("optimizer_index", optimizer_index),
                 ("benchmark_index", benchmark_index),
             ],
-            is_cache=IS_CACHE,
-            **kwargs,
-        )
-        res[factor_name] = backtest_df
+            **params,
+        ),
+    )
+    ic_df, group_df, backtest_df = (res[factor_name] for res in results)
 
-    return res
+    return (ic_df, group_df, backtest_df)
+
+
+def _stats_query(
+    perf_type: str, pool: str, optimizer_index: str, benchmark_index: str
+) -> list:
+    """各类表现数据的查询条件, 只有回测数据区分优化与基准指数"""
+    if perf_type == "backtest_ret":
+        return [
+            ("pool", pool),
+            ("optimizer_index", optimizer_index),
+            ("benchmark_index", benchmark_index),
+        ]
+    return [("pool", pool)]
 
 
-def load_factor_stats_group(
+def _iter_factor_stats(
+    perf_type: str,
     factor_names: list[str] = None,
     start_date: str = None,
     end_date: str = None,
     pool: str = "all",
     optimizer_index: str = "000905.SH",
     benchmark_index: str = "000905.SH",
+    chunk_size: int = None,
     **kwargs,
 ):
-    """取因子分组统计信息"""
+    """按 chunk_size 分块取多个因子的表现, 逐个产出 (因子名, 表现数据);
+    不指定 chunk_size 时一次取全部因子"""
     factor_names = FactorManagerAll.get_factor_names(factor_names=factor_names)
-    res: dict[str, pd.DataFrame] = {}
-    for factor_name in factor_names:
-        group_df = FactorManagerAll.get_perf_factor(
-            perf_type="group_pnl",
-            factor_names=factor_name,
+    query = _stats_query(perf_type, pool, optimizer_index, benchmark_index)
+    chunk_size = chunk_size or max(len(factor_names), 1)
+    for i in range(0, len(factor_names), chunk_size):
+        yield from get_perf_series(
+            perf_type,
+            factor_names[i : i + chunk_size],
+            query=query,
             start_date=start_date,
             end_date=end_date,
-            index_col="date",
-            fields=[
-                "Group_01",
-                "Group_02",
-                "Group_03",
-                "Group_04",
-                "Group_05",
-                "Group_06",
-                "Group_07",
-                "Group_08",
-                "Group_09",
-                "Group_10",
-                "LS_Hedge",
-            ],
-            query=[("pool", pool)],
-            is_cache=IS_CACHE,
             **kwargs,
-        )
-        res[factor_name] = group_df
+        ).items()
 
-    return res
 
+def _factor_stats_loaders(perf_type: str, kind: str, label: str):
+    """生成一类表现数据的 ``load_factor_stats_{kind}`` 与流式的
+    ``iter_factor_stats_{kind}``, 两者共用 ``_iter_factor_stats``"""
 
-def load_factor_stats_ic(
-    factor_names: list[str] = None,
-    start_date: str = None,
-    end_date: str = None,
-    pool: str = "all",
-    optimizer_index: str = "000905.SH",
-    benchmark_index: str = "000905.SH",
-    **kwargs,
-):
-    """取因子IC统计信息"""
-    if start_date is not None:
-        start_date = pd.to_datetime(start_date)
-        _start = start_date - pd.DateOffset(days=400)
-    else:
-        _start = None
+    def load(
+        factor_names: list[str] = None,
+        start_date: str = None,
+        end_date: str = None,
+        pool: str = "all",
+        optimizer_index: str = "000905.SH",
+        benchmark_index: str = "000905.SH",
+        **kwargs,
+    ):
+        return dict(
+            _iter_factor_stats(
+                perf_type,
+                factor_names=factor_names,
+                start_date=start_date,
+                end_date=end_date,
+                pool=pool,
+                optimizer_index=optimizer_index,
+                benchmark_index=benchmark_index,
+                **kwargs,
+            )
+        )
 
-    factor_names = FactorManagerAll.get_factor_names(factor_names=factor_names)
-    res: dict[str, pd.DataFrame] = {}
-    for factor_name in factor_names:
-        ic_df = FactorManagerAll.get_perf_factor(
-            perf_type="ic",
-            factor_names=factor_name,
-            start_date=_start,
+    def iterate(
+        factor_names: list[str] = None,
+        start_date: str = None,
+        end_date: str = None,
+        pool: str = "all",
+        optimizer_index: str = "000905.SH",
+        benchmark_index: str = "000905.SH",
+        **kwargs,
+    ):
+        params = dict(
+            factor_names=factor_names,
+            start_date=start_date,
             end_date=end_date,
-            index_col="date",
-            fields="corr",
-            query=[("pool", pool)],
-            is_cache=IS_CACHE,
+            pool=pool,
+            optimizer_index=optimizer_index,
+            benchmark_index=benchmark_index,
             **kwargs,
         )
-        ic_df["corr_roll"] = ic_df["corr"].rolling(252, min_periods=60).mean()
-        if start_date is not None:
-            ic_df = ic_df.loc[start_date:]
-        res[factor_name] = ic_df
-
-    return res
-
-
+        # 全量结果已缓存时直接逐个产出
+        hit, value = load.cache_lookup(**params)
+        if hit:
+            yield from value.items()
+            return
+        yield from _iter_factor_stats(perf_type, chunk_size=STREAM_CHUNK_SIZE, **params)
+
+    load.__name__ = load.__qualname__ = f"load_factor_stats_{kind}"
+    load.__doc__ = f"取因子{label}统计信息"
+    load = cached(f"factor_stats_{kind}")(load)
+    iterate.__name__ = iterate.__qualname__ = f"iter_factor_stats_{kind}"
+    iterate.__doc__ = f"逐个因子产出 (因子名, {label}数据), 用于流式响应"
+    return load, iterate
+
+
+load_factor_stats_backtest, iter_factor_stats_backtest = _factor_stats_loaders(
+    "backtest_ret", "backtest", "回测"
+)
+load_factor_stats_group, iter_factor_stats_group = _factor_stats_loaders(
+    "group_pnl", "group", "分组"
+)
+# IC 数据包含 252 日滚动均值 ``corr_roll``
+load_factor_stats_ic, iter_factor_stats_ic = _factor_stats_loaders("ic", "ic", "IC")
+
+
+@cached("factor_update")
 def load_factor_update_info(
     factor_names: list[str] = None,
     start_date: str = None,
     end_date: str = None,
     **kwargs,
 ):
-    """取因子更新信息"""
+    """取因子更新信息
+
+    不指定起止日期时由最新状态索引 (见 ``status_index``) 得出, 否则按区间查询。
+    附带 ``days_since_update`` 与 ``is_stale``。
+    """
+    if start_date is None and end_date is None and not kwargs:
+        factor_update_info = with_staleness(latest_status())
+        if factor_names is not None:
+            if isinstance(factor_names, str):
+                factor_names = [factor_names]
+            index = factor_update_info.index
+            factor_update_info = factor_update_info[index.isin(factor_names)]
+        return factor_update_info
+
     if start_date is None:
-        start_date = "2018-01-01"
+        start_date = STATUS_START_DATE
     if end_date is None:
         end_date = stock_calendar.get_shift_date("today", -1)
     factor_update_info = FactorManagerAll.get_date_status_factor(
@@ -430,9 +552,46 @@ def load_factor_update_info(
     )
     factor_update_info = factor_update_info.groupby("factor_name").last()
 
-    return factor_update_info
+    return with_staleness(factor_update_info)
+
+
+def load_recent_status(lookback_days: int = 10) -> pd.DataFrame:
+    """取最近 ``lookback_days`` 天的因子更新状态记录"""
+    end_date = pd.Timestamp.today().normalize()
+    return FactorManagerAll.get_date_status_factor(
+        start_date=end_date - pd.Timedelta(days=lookback_days),
+        end_date=end_date,
+    )
+
+
+def status_version(status: pd.DataFrame) -> str:
+    """由近期更新状态记录计算数据版本"""
+    if status.empty:
+        return ""
+    latest = pd.to_datetime(status["end_date"]).max().strftime("%Y-%m-%d")
+    digest = pd.util.hash_pandas_object(status.astype(str), index=False).sum()
+    return f"{latest}-{digest & 0xFFFFFFFF:08x}"
+
+
+def status_digests(status: pd.DataFrame) -> pd.Series:
+    """各因子最新一条状态记录的摘要, 索引为 factor_name"""
+    if status.empty:
+        return pd.Series(dtype="uint64")
+    latest = status.groupby("factor_name").last()
+    digests = pd.util.hash_pandas_object(latest.astype(str), index=False)
+    digests.index = latest.index
+    return digests
+
+
+@cached("data_version")
+def load_data_version(lookback_days: int = 10) -> tuple[str, pd.Series]:
+    """数据版本: 最近的最新数据日期, 附带近期更新状态的摘要, 补数时同样变化;
+    同时返回各因子的状态摘要, 用于找出受影响的因子"""
+    status = load_recent_status(lookback_days)
+    return status_version(status), status_digests(status)
 
 
+@cached("strategy_info")
 def load_strategy_info(
     pool: str = "all",
     optimizer_index: str = "000905.SH",
@@ -448,6 +607,7 @@ def load_strategy_info(
     )
 
 
+@cached("strategy_perf")
 def load_strategy_perf(
     strategy_name: str,
     start_date: str = None,
@@ -458,43 +618,77 @@ def load_strategy_perf(
     **kwargs,
 ):
     """取单个策略表现"""
-    backtest_df = FactorManagerAll.get_perf_factor(
-        perf_type="backtest_ret",
-        factor_names=strategy_name,
-        start_date=start_date,
-        end_date=end_date,
-        index_col="date",
-        fields=[
-            "strategy_ret",
-            "index_ret",
-            "excess_ret",
-            "holding_num",
-            "turnover",
-            "transaction_fee",
-        ],
+    (backtest_df,) = get_perf_series(
+        "backtest_ret",
+        [strategy_name],
         query=[
             ("optimizer_index", optimizer_index),
             ("benchmark_index", benchmark_index),
         ],
-        is_cache=IS_CACHE,
+        start_date=start_date,
+        end_date=end_date,
         **kwargs,
-    )
-    if backtest_df.empty:
-        backtest_df = pd.DataFrame(
-            index=pd.Index([], name="date"),
-            columns=[
-                "strategy_ret",
-                "index_ret",
-                "excess_ret",
-                "holding_num",
-                "turnover",
-                "transaction_fee",
-            ],
-        )
+    ).values()
 
     return (backtest_df,)
 
 
+# 合并各参数组合下累积的因子统计行时加锁
+_stats_rows_lock = threading.Lock()
+
+
+def _subset_rows(frames: tuple, factor_names: list[str]) -> tuple:
+    """按 factor_names 的顺序取统计表中存在的因子"""
+    index = frames[0].index
+    names = pd.Index(
+        [name for name in dict.fromkeys(factor_names) if name in index],
+        name=index.name,
+    )
+    return tuple(df.reindex(names) for df in frames)
+
+
+def _factor_stats_rows(factor_names: list[str], **params) -> tuple:
+    """取多个因子的统计, 同一组参数下每个因子只计算一次
+
+    已缓存全部因子的统计时直接取子集; 否则从该组参数下累积的统计行中取, 缺少的
+    因子计算后并入 (``factor_stats_rows``), 不同策略的源因子相互重叠时共用。
+    累积的统计行从第一次计算起按 ``factor_stats`` 的过期时间失效。
+    """
+    hit, factor_stats = load_factor_stats.cache_lookup(**params)
+    if hit:
+        return _subset_rows(factor_stats, factor_names)
+    if result_cache.max_bytes <= 0:
+        return load_factor_stats(factor_names=factor_names, **params)
+
+    key = make_key("factor_stats_rows", load_factor_stats, **params)
+    _, entry = result_cache.get(key)
+    requested = set() if entry is None else entry[2]
+    missing = [name for name in dict.fromkeys(factor_names) if name not in requested]
+    if not missing:
+        return _subset_rows(entry[1], factor_names)
+
+    # 不经过 load_factor_stats 的缓存, 避免按因子列表重复缓存
+    generation = result_cache.generation
+    new_rows = load_factor_stats.__wrapped__(factor_names=missing, **params)
+    with _stats_rows_lock:
+        _, entry = result_cache.get(key)
+        if entry is None:
+            entry = (time.monotonic(), new_rows, frozenset(missing))
+        else:
+            created, rows, requested = entry
+            rows = tuple(
+                pd.concat([old, new[~new.index.isin(old.index)]])
+                for old, new in zip(rows, new_rows)
+            )
+            entry = (created, rows, requested | set(missing))
+        ttl = CACHE_TTL.get("factor_stats", DEFAULT_TTL)
+        result_cache.put(
+            key, entry, ttl - (time.monotonic() - entry[0]), generation=generation
+        )
+    return _subset_rows(entry[1], factor_names)
+
+
+@cached("strategy_factors")
 def load_strategy_factor_stats(
     strategy_name: str,
     start_date: str = None,
@@ -504,17 +698,13 @@ def load_strategy_factor_stats(
     benchmark_index: str = "000905.SH",
     **kwargs,
 ):
-    """取策略统计信息"""
-    strategy_info = FactorManagerAll.get_info_strategy(strategy_names=strategy_name)
-    if strategy_info.empty:
-        raise ValueError(f"策略 {strategy_name} 不存在")
-    strategy_info = strategy_info.iloc[0]
-    combine_name = strategy_info["factor_name"]
-    factor_names = FactorManagerAll.get_source_factors(
-        combine_name, is_return_list=True
-    )
-    factor_stats_df = load_factor_stats(
-        factor_names=factor_names,
+    """取策略统计信息
+
+    源因子取自缓存的策略关系图 (见 ``strategy_graph``), 各源因子的统计在同一组
+    参数下只计算一次, 由各策略共用。
+    """
+    return _factor_stats_rows(
+        strategy_sources(strategy_name),
         start_date=start_date,
         end_date=end_date,
         pool=pool,
@@ -522,4 +712,3 @@ def load_strategy_factor_stats(
         benchmark_index=benchmark_index,
         **kwargs,
     )
-    return factor_stats_df
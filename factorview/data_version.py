@@ -0,0 +1,119 @@
+"""数据版本与缓存失效
+
+结果缓存 (默认 30 分钟) 与序列缓存 (默认 1 小时) 不随数据版本变化: 数据更新后
+ETag 已经变化, 响应体却仍可能来自更新前的缓存, 并以新的 ETag 返回给客户端。
+
+``check_data_version`` 取数据版本 (``load_data_version``, 缓存 60 秒), 与上一次
+不同时按各因子最新状态记录的摘要找出受影响的因子, 并清除
+
+- 这些因子与策略的序列缓存
+- 数据类结果缓存 (基本信息、关系图与数据版本本身除外)
+- 因子更新状态索引的刷新时间 (下一次请求时刷新)
+
+之后通知订阅者 (``/api/events``)。``DataVersionMiddleware`` 在每个数据请求执行前
+调用一次, 与是否有 SSE 连接无关; ETag 使用同一版本。
+"""
+
+import threading
+
+import pandas as pd
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .cache import result_cache
+from .data_loader import load_data_version
+from .executor import run_blocking
+from .series_cache import series_cache
+from .status_index import mark_stale
+
+# 数据更新时保留的结果缓存: 基本信息与关系图不随每日数据变化
+KEEP_CACHES: set[str] = {
+    "factor_info",
+    "strategy_info",
+    "strategy_graph",
+    "data_version",
+}
+# 不检查数据版本的路径
+VERSION_EXCLUDE_PREFIX: tuple[str, ...] = ("/api/admin", "/api/events")
+# 请求 scope 中保存数据版本的键, 供 ETag 使用
+SCOPE_KEY: str = "factorview.data_version"
+
+_version: str | None = None
+_digests: pd.Series | None = None
+_listeners: list = []
+_lock = threading.Lock()
+
+
+def add_listener(callback):
+    """数据变化时调用 ``callback(version, factor_names)``, 在检查所在的线程中执行"""
+    _listeners.append(callback)
+
+
+def current_version() -> str | None:
+    """最近一次检查得到的数据版本, 尚未检查时为 None"""
+    return _version
+
+
+def invalidate(factor_names: list[str], known_names=()) -> int:
+    """清除受影响因子的序列缓存与数据类结果缓存, 返回清除的条数
+
+    不在 ``known_names`` (有状态记录的因子) 中的序列缓存 (策略表现等) 无法按
+    状态判断是否变化, 一并清除。
+    """
+    names, known = set(factor_names), set(known_names)
+    mark_stale()
+    return series_cache.discard(
+        lambda key: key[1] in names or key[1] not in known
+    ) + result_cache.discard(lambda key: key[0] not in KEEP_CACHES)
+
+
+def check_data_version(refresh: bool = False) -> str:
+    """取数据版本, 与上一次不同时清除受影响的缓存并通知订阅者
+
+    ``refresh`` 时不使用缓存的数据版本, 立即读取状态记录。缓存在新版本对外可见
+    之前清除: 其他请求在清除完成前等待锁, 不会以新版本取到旧缓存。
+    """
+    global _version, _digests
+    if refresh:
+        result_cache.clear("data_version")
+    version, digests = load_data_version()
+    if version == _version:
+        return version
+    with _lock:
+        if version == _version:
+            return version
+        previous = _digests
+        changed = []
+        # 首次检查只建立基准
+        if previous is not None:
+            old = previous.reindex(digests.index)
+            changed = sorted(digests.index[old.isna() | (old != digests)])
+            if changed:
+                invalidate(changed, digests.index)
+        _version, _digests = version, digests
+    if changed:
+        for callback in _listeners:
+            callback(version, changed)
+    return version
+
+
+class DataVersionMiddleware:
+    """数据请求执行前检查数据版本"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        path = scope.get("path", "")
+        if (
+            scope["type"] == "http"
+            and path.startswith("/api/")
+            and not path.startswith(VERSION_EXCLUDE_PREFIX)
+        ):
+            try:
+                scope[SCOPE_KEY] = await run_blocking(
+                    "data_version", check_data_version
+                )
+            except Exception:
+                # 取不到数据版本时不影响正常请求
+                pass
+        await self.app(scope, receive, send)
@@ -0,0 +1,113 @@
+"""图表时间序列降采样
+
+``/api/factor/{name}`` 与 ``/api/strategy/{name}`` 带 ``max_points`` 参数时,
+在服务端把全历史的日度序列压缩到不超过 ``max_points`` 行, 图表宽度有限,
+无需把每天的数据都发给浏览器:
+
+- IC 序列使用 LTTB (Largest-Triangle-Three-Buckets), 按列分别选点后取并集,
+  保留尖峰与形状
+- 收益序列按桶复利聚合, 桶内收益 = prod(1 + r) - 1, 前端累乘得到的净值在每个
+  桶的末尾与全量数据完全一致; 换手、费用按桶求和, 持仓数取桶末值
+
+降采样只作用于返回的序列, 统计指标仍由全量数据计算。
+"""
+
+import numpy as np
+import pandas as pd
+
+# 按桶求和的列
+SUM_COLUMNS: list[str] = ["turnover", "transaction_fee"]
+# 取桶末值的列
+LAST_COLUMNS: list[str] = ["holding_num"]
+# 使用 LTTB 的数据块, 其余按收益复利聚合
+LTTB_BLOCKS: set[str] = {"ic"}
+
+
+def _to_array(df: pd.DataFrame) -> np.ndarray:
+    return df.to_numpy(dtype="float64", na_value=np.nan)
+
+
+def lttb_indices(values: np.ndarray, n_out: int) -> np.ndarray:
+    """对 ``(T, K)`` 数组的每一列做 LTTB, 返回选中行号 (各列并集, 升序)
+
+    桶之间的依赖 (上一个选中点) 只能逐桶推进, 每个桶内对所有列同时计算。
+    """
+    n = len(values)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    cols = np.arange(values.shape[1])
+
+    # 首尾两点固定, 中间 n - 2 个点分为 n_out - 2 个桶
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    sums = np.add.reduceat(filled[: n - 1], edges[:-1], axis=0)
+    counts = np.add.reduceat(valid[: n - 1], edges[:-1], axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+    # 第 i 个桶的 c 点为下一个桶的均值, 最后一个桶的 c 点为末尾点
+    avg_x = np.append((edges[:-1] + edges[1:] - 1) / 2, n - 1)
+    avg_y = np.vstack([means, filled[-1]])
+
+    picked = np.empty((n_out, values.shape[1]), dtype=np.int64)
+    picked[0] = 0
+    picked[-1] = n - 1
+    a = np.zeros(values.shape[1], dtype=np.int64)
+    x = np.arange(n, dtype="float64")[:, None]
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        ya = filled[a, cols]
+        xc = avg_x[i + 1]
+        yc = np.where(np.isnan(avg_y[i + 1]), ya, avg_y[i + 1])
+        area = np.abs((a - xc) * (filled[lo:hi] - ya) - (a - x[lo:hi]) * (yc - ya))
+        area[~valid[lo:hi]] = -1.0
+        a = lo + area.argmax(axis=0)
+        picked[i + 1] = a
+    return np.unique(picked)
+
+
+def lttb(df: pd.DataFrame, max_points: int) -> pd.DataFrame:
+    """按列 LTTB 降采样, 每列分得 ``max_points // 列数`` 个点"""
+    if len(df) <= max_points or df.shape[1] == 0:
+        return df
+    n_out = max(max_points // df.shape[1], 3)
+    return df.iloc[lttb_indices(_to_array(df), n_out)]
+
+
+def compound(df: pd.DataFrame, max_points: int) -> pd.DataFrame:
+    """按连续等长的桶聚合收益序列, 桶以最后一个交易日为索引"""
+    n = len(df)
+    if n <= max_points:
+        return df
+    starts = np.linspace(0, n, max_points + 1).astype(np.int64)[:-1]
+    ends = np.append(starts[1:], n) - 1
+
+    values = _to_array(df)
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    counts = np.add.reduceat(valid, starts, axis=0)
+
+    sum_mask = df.columns.isin(SUM_COLUMNS)
+    last_mask = df.columns.isin(LAST_COLUMNS)
+    ret_mask = ~(sum_mask | last_mask)
+    result = np.empty((len(starts), df.shape[1]))
+    result[:, ret_mask] = (
+        np.multiply.reduceat(1.0 + filled[:, ret_mask], starts, axis=0) - 1.0
+    )
+    result[:, sum_mask] = np.add.reduceat(filled[:, sum_mask], starts, axis=0)
+    result[:, last_mask] = values[ends][:, last_mask]
+    # 整个桶都缺失时保持缺失
+    result[counts == 0] = np.nan
+    return pd.DataFrame(result, index=df.index[ends], columns=df.columns)
+
+
+def downsample_blocks(
+    blocks: dict[str, pd.DataFrame], max_points: int = None
+) -> dict[str, pd.DataFrame]:
+    """对接口返回的各数据块降采样, ``max_points`` 为空时原样返回"""
+    if not max_points:
+        return blocks
+    return {
+        name: lttb(df, max_points) if name in LTTB_BLOCKS else compound(df, max_points)
+        for name, df in blocks.items()
+    }
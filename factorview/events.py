@@ -0,0 +1,128 @@
+"""数据更新推送 (Server-Sent Events)
+
+每日数据更新后, 各个打开的页面只能定时重新请求, 更新刚完成时大量请求同时压到
+``load_factor_stats`` 上。``GET /api/events`` 以 SSE 推送数据变化:
+
+- 数据变化的判断与缓存清除由 ``check_data_version`` 完成 (每个数据请求前都会
+  检查, 与是否有连接无关), 这里只负责通知: 检查发现有因子的状态变化时广播::
+
+      event: version
+      data: {"version": "2024-06-03-1a2b3c4d", "factors": ["factor_a", ...]}
+
+  ``version`` 即 ETag 使用的数据版本, 广播前受影响的缓存已经清除
+- 没有数据请求时版本不会被检查, 因此有客户端连接时进程内运行一个轮询任务, 每
+  ``FACTORVIEW_EVENTS_INTERVAL`` 秒重新读取一次数据版本, 与连接数无关; 全部
+  断开后停止
+- 连接建立时先发送一条 ``hello`` 事件给出当前版本, 之后每
+  ``EVENTS_HEARTBEAT`` 秒发送一行注释保持连接
+
+客户端只需重新请求展示了受影响因子的视图, 相同的请求仍由请求合并只加载一次。
+"""
+
+import asyncio
+import os
+
+from fastapi.responses import StreamingResponse
+
+from .data_version import add_listener, check_data_version, current_version
+from .executor import run_blocking
+from .serializer import dumps
+
+# 轮询间隔 (秒)
+EVENTS_INTERVAL: float = float(os.environ.get("FACTORVIEW_EVENTS_INTERVAL", 60))
+# 心跳间隔 (秒), 避免代理断开空闲连接
+EVENTS_HEARTBEAT: float = 15
+# 每个客户端最多积压的事件数, 超出时丢弃新事件
+EVENTS_QUEUE_SIZE: int = 16
+
+
+class DataWatcher:
+    """单个轮询任务, 把数据变化广播给所有订阅者"""
+
+    def __init__(self, interval: float = EVENTS_INTERVAL):
+        self.interval = interval
+        self._queues: set[asyncio.Queue] = set()
+        self._task: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=EVENTS_QUEUE_SIZE)
+        self._queues.add(queue)
+        if self._task is None or self._task.done():
+            self._loop = asyncio.get_running_loop()
+            self._task = asyncio.ensure_future(self._run())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._queues.discard(queue)
+        if not self._queues:
+            self.stop()
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await run_blocking("data_version", check_data_version, refresh=True)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # 数据源暂时不可用时等待下一次轮询
+                pass
+            await asyncio.sleep(self.interval)
+
+    def notify(self, version: str, factor_names: list[str]):
+        """``check_data_version`` 的回调, 在检查所在的线程中执行"""
+        loop = self._loop
+        if loop is None or loop.is_closed() or not self._queues:
+            return
+        event = {"version": version, "factors": factor_names}
+        loop.call_soon_threadsafe(self.broadcast, event)
+
+    def broadcast(self, event: dict):
+        for queue in list(self._queues):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # 客户端读取过慢时丢弃, 下一次事件仍会送达
+                pass
+
+
+watcher = DataWatcher()
+add_listener(watcher.notify)
+
+
+def _sse(event: str, data: dict) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+
+
+async def _event_stream():
+    queue = watcher.subscribe()
+    try:
+        version = current_version()
+        if version is None:
+            try:
+                version = await run_blocking("data_version", check_data_version)
+            except Exception:
+                pass
+        yield _sse("hello", {"version": version})
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), EVENTS_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield b": ping\n\n"
+                continue
+            yield _sse("version", event)
+    finally:
+        watcher.unsubscribe(queue)
+
+
+def event_response() -> StreamingResponse:
+    return StreamingResponse(
+        _event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
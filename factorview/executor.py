@@ -0,0 +1,248 @@
+"""请求执行层
+
+路由函数均为 ``async def``, 而 ``data_loader`` 中的 ``load_*`` 函数是同步阻塞的
+(数据库读取 + pandas 计算)。这里把它们放到线程池中执行, 并对每个接口
+做并发限制: 超过并发上限的请求排队等待, 排队已满或等待超时则直接返回 503,
+避免一个慢请求卡住整个事件循环。
+
+参数相同 (规范化后) 的请求会合并: 若同样的加载正在执行, 后到的请求直接等待
+其结果, 不再重复加载, 也不占用并发名额。流式响应使用 ``iter_blocking`` 逐块
+迭代生成器, 不参与合并。
+
+加载函数都在本进程内执行, 结果缓存与数据更新时的缓存清除只作用于本进程。
+"""
+
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+
+from .cache import make_key
+from .telemetry import phase
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    return default if value in (None, "") else int(value)
+
+
+def _env_limits(name: str) -> dict[str, int]:
+    """解析形如 ``factor_stats=2,factor_perf=8`` 的配置"""
+    limits: dict[str, int] = {}
+    for item in os.environ.get(name, "").split(","):
+        if "=" in item:
+            key, value = item.split("=", 1)
+            limits[key.strip()] = int(value)
+    return limits
+
+
+# I/O 线程池大小
+THREAD_WORKERS: int = _env_int("FACTORVIEW_THREAD_WORKERS", 8)
+# 加载函数内部并发读取数据源的线程池大小, 0 表示顺序读取
+FETCH_WORKERS: int = _env_int("FACTORVIEW_FETCH_WORKERS", 16)
+
+# 每个接口同时执行的请求数
+DEFAULT_CONCURRENCY: int = _env_int("FACTORVIEW_CONCURRENCY", 4)
+ENDPOINT_CONCURRENCY: dict[str, int] = {
+    "factor_stats": 2,
+    "strategy_factors": 2,
+    **_env_limits("FACTORVIEW_ENDPOINT_CONCURRENCY"),
+}
+# 每个接口最多排队的请求数, 超出直接拒绝
+MAX_QUEUE: int = _env_int("FACTORVIEW_MAX_QUEUE", 16)
+# 排队最长等待秒数, 超时拒绝
+QUEUE_TIMEOUT: float = float(os.environ.get("FACTORVIEW_QUEUE_TIMEOUT", 30))
+
+
+class _EndpointLimiter:
+    """单个接口的并发限制, 超过上限的请求排队, 队列满或超时则拒绝"""
+
+    def __init__(self, name: str, concurrency: int):
+        self.name = name
+        self.concurrency = concurrency
+        self.running = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def __aenter__(self):
+        if not self._semaphore.locked():
+            # 有空闲名额时 acquire 不会挂起
+            await self._semaphore.acquire()
+        elif self.waiting >= MAX_QUEUE:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503, detail=f"{self.name} 请求繁忙, 请稍后重试"
+            )
+        else:
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), QUEUE_TIMEOUT)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=503, detail=f"{self.name} 排队超时, 请稍后重试"
+                ) from None
+            finally:
+                self.waiting -= 1
+        self.running += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        self.running -= 1
+        self._semaphore.release()
+
+
+_limiters: dict[str, _EndpointLimiter] = {}
+_thread_pool: ThreadPoolExecutor | None = None
+# 独立于请求线程池: 请求线程等待读取结果时不会占满同一个池导致死锁
+_fetch_pool: ThreadPoolExecutor | None = None
+_fetch_worker = threading.local()
+_fetch_lock = threading.Lock()
+
+
+def _get_limiter(endpoint: str) -> _EndpointLimiter:
+    if endpoint not in _limiters:
+        _limiters[endpoint] = _EndpointLimiter(
+            endpoint, ENDPOINT_CONCURRENCY.get(endpoint, DEFAULT_CONCURRENCY)
+        )
+    return _limiters[endpoint]
+
+
+def _get_thread_pool() -> ThreadPoolExecutor:
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(
+            max_workers=THREAD_WORKERS, thread_name_prefix="factorview"
+        )
+    return _thread_pool
+
+
+def _get_fetch_pool() -> ThreadPoolExecutor:
+    global _fetch_pool
+    if _fetch_pool is None:
+        _fetch_pool = ThreadPoolExecutor(
+            max_workers=FETCH_WORKERS,
+            thread_name_prefix="factorview-fetch",
+            initializer=_mark_fetch_worker,
+        )
+    return _fetch_pool
+
+
+def _mark_fetch_worker():
+    _fetch_worker.active = True
+
+
+def fan_out(*calls) -> list:
+    """并发执行多个无参函数 (通常为 ``functools.partial``), 按顺序返回结果
+
+    供同步的加载函数同时发起相互独立的数据源读取, 耗时由各次之和变为最大值。
+    在读取线程中嵌套调用或 ``FACTORVIEW_FETCH_WORKERS=0`` 时顺序执行。
+    """
+    if FETCH_WORKERS <= 0 or len(calls) < 2 or getattr(_fetch_worker, "active", False):
+        return [call() for call in calls]
+    with _fetch_lock:
+        pool = _get_fetch_pool()
+    futures = [pool.submit(contextvars.copy_context().run, call) for call in calls]
+    return [future.result() for future in futures]
+
+
+async def _run_limited(endpoint: str, func, *args, **kwargs):
+    async with _get_limiter(endpoint):
+        loop = asyncio.get_running_loop()
+        # 线程池中保留调用方的 contextvars
+        call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+        return await loop.run_in_executor(_get_thread_pool(), call)
+
+
+_inflight: dict[tuple, asyncio.Task] = {}
+_leaders: dict[str, int] = {}
+_deduplicated: dict[str, int] = {}
+
+
+def _finish(key: tuple, task: asyncio.Task):
+    _inflight.pop(key, None)
+    # 所有等待方都已取消时异常无人读取, 这里标记为已读取避免告警
+    if not task.cancelled():
+        task.exception()
+
+
+async def run_blocking(endpoint: str, func, *args, **kwargs):
+    """在线程池中执行阻塞函数, 受接口并发限制, 相同参数的并发请求合并执行"""
+    key = make_key(endpoint, func, *args, **kwargs)
+    task = _inflight.get(key)
+    if task is None:
+        _leaders[endpoint] = _leaders.get(endpoint, 0) + 1
+        task = asyncio.ensure_future(_run_limited(endpoint, func, *args, **kwargs))
+        _inflight[key] = task
+        task.add_done_callback(functools.partial(_finish, key))
+    else:
+        _deduplicated[endpoint] = _deduplicated.get(endpoint, 0) + 1
+    # 某个请求被取消 (如客户端断开) 不影响其他等待同一结果的请求
+    with phase("load"):
+        return await asyncio.shield(task)
+
+
+async def iter_blocking(endpoint: str, func, *args, **kwargs):
+    """在线程池中逐项迭代阻塞的生成器函数, 用于流式响应
+
+    整个迭代过程占用一个接口并发名额; 每个请求单独迭代, 不合并。
+    """
+    async with _get_limiter(endpoint):
+        _leaders[endpoint] = _leaders.get(endpoint, 0) + 1
+        loop = asyncio.get_running_loop()
+        executor = _get_thread_pool()
+        ctx = contextvars.copy_context()
+        with phase("load"):
+            iterator = await loop.run_in_executor(
+                executor, functools.partial(ctx.run, func, *args, **kwargs)
+            )
+        done = object()
+        try:
+            while True:
+                with phase("load"):
+                    item = await loop.run_in_executor(
+                        executor, ctx.run, next, iterator, done
+                    )
+                if item is done:
+                    break
+                yield item
+        finally:
+            # 客户端断开时关闭生成器, 释放其持有的资源
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                await loop.run_in_executor(executor, ctx.run, close)
+
+
+def executor_stats() -> dict:
+    """各接口的并发/排队/拒绝/合并计数"""
+    inflight: dict[str, int] = {}
+    for key in _inflight:
+        inflight[key[0]] = inflight.get(key[0], 0) + 1
+    return {
+        name: {
+            "concurrency": limiter.concurrency,
+            "running": limiter.running,
+            "waiting": limiter.waiting,
+            "rejected": limiter.rejected,
+            "inflight": inflight.get(name, 0),
+            "executed": _leaders.get(name, 0),
+            "deduplicated": _deduplicated.get(name, 0),
+        }
+        for name, limiter in _limiters.items()
+    }
+
+
+def shutdown_executors():
+    """关闭线程池"""
+    global _thread_pool, _fetch_pool
+    if _fetch_pool is not None:
+        _fetch_pool.shutdown(wait=False, cancel_futures=True)
+        _fetch_pool = None
+    if _thread_pool is not None:
+        _thread_pool.shutdown(wait=False, cancel_futures=True)
+        _thread_pool = None
@@ -0,0 +1,194 @@
+"""HTTP 条件请求与响应压缩
+
+- ``ETagMiddleware``: 数据接口的 ETag 由请求路径、参数、``Accept`` 与数据版本
+  (最新数据日期, 见 ``check_data_version``, 版本变化时已清除受影响的缓存) 计算,
+  请求头 ``If-None-Match`` 命中时直接返回 304, 不再执行数据加载; 依赖策略关系图的
+  接口另外包含关系图的建立时间
+- ``CompressionMiddleware``: 响应体超过阈值时按 ``Accept-Encoding`` 使用 brotli
+  (已安装 ``brotli`` 时) 或 gzip 压缩, 流式响应不压缩; 大响应在线程池中压缩
+"""
+
+import gzip
+import hashlib
+import os
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .data_version import SCOPE_KEY, check_data_version
+from .executor import run_blocking
+from .strategy_graph import graph_built_at
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+# 是否启用 ETag
+ETAG_ENABLED: bool = os.environ.get("FACTORVIEW_ETAG", "1") not in ("0", "false")
+# 不使用 ETag 的路径: 基本信息不随数据日期变化, 管理接口需实时, 推送接口为长连接
+ETAG_EXCLUDE: set[str] = {"/api/factor", "/api/strategy", "/api/events"}
+ETAG_EXCLUDE_PREFIX: tuple[str, ...] = ("/api/admin",)
+# 依赖策略关系图的路径 (因子 → 策略、策略 → 源因子), 关系图按自己的过期时间重建
+GRAPH_PATH_SUFFIX: tuple[str, ...] = ("/strategies", "/factors")
+
+# 响应体超过该字节数才压缩
+COMPRESS_MIN_SIZE: int = int(os.environ.get("FACTORVIEW_COMPRESS_MIN_SIZE", 1024))
+GZIP_LEVEL: int = 6
+BROTLI_QUALITY: int = 5
+# 响应体超过该字节数时在线程池中压缩, 不阻塞事件循环
+COMPRESS_THREAD_SIZE: int = 64 * 1024
+# 不压缩的响应类型
+COMPRESS_EXCLUDE_TYPES: tuple[str, ...] = ("text/event-stream",)
+
+
+def _make_etag(scope: Scope, version: str) -> str:
+    headers = Headers(scope=scope)
+    query = sorted(scope.get("query_string", b"").decode("latin-1").split("&"))
+    raw = "\n".join(
+        [scope["path"], "&".join(query), headers.get("accept", ""), version]
+    )
+    return f'W/"{hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    tags = {tag.strip() for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags or etag.removeprefix("W/") in tags
+
+
+class ETagMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    def _applies(self, scope: Scope) -> bool:
+        path = scope["path"]
+        return (
+            ETAG_ENABLED
+            and scope["type"] == "http"
+            and scope["method"] in ("GET", "HEAD")
+            and path.startswith("/api/")
+            and path not in ETAG_EXCLUDE
+            and not path.startswith(ETAG_EXCLUDE_PREFIX)
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if not self._applies(scope):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            version = scope.get(SCOPE_KEY)
+            if version is None:
+                version = await run_blocking("data_version", check_data_version)
+        except Exception:
+            # 取不到数据版本时不影响正常请求
+            await self.app(scope, receive, send)
+            return
+        if scope["path"].endswith(GRAPH_PATH_SUFFIX):
+            built_at = graph_built_at()
+            if built_at is None:
+                # 关系图尚未建立或已过期, 本次请求会重建, 不返回 ETag
+                await self.app(scope, receive, send)
+                return
+            version = f"{version}-{built_at}"
+        etag = _make_etag(scope, version)
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, etag):
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 304,
+                    "headers": [
+                        (b"etag", etag.encode("latin-1")),
+                        (b"cache-control", b"no-cache"),
+                    ],
+                }
+            )
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_with_etag(message: Message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                headers = MutableHeaders(scope=message)
+                headers["ETag"] = etag
+                headers["Cache-Control"] = "no-cache"
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
+
+
+def _choose_encoding(accept_encoding: str) -> str | None:
+    encodings = {
+        item.split(";")[0].strip().lower()
+        for item in accept_encoding.split(",")
+        if not item.strip().endswith("q=0")
+    }
+    if brotli is not None and "br" in encodings:
+        return "br"
+    if "gzip" in encodings:
+        return "gzip"
+    return None
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESS_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = _choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Message | None = None
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            headers = MutableHeaders(scope=start_message)
+            body = message.get("body", b"")
+            if (
+                message.get("more_body", False)
+                or len(body) < self.minimum_size
+                or "content-encoding" in headers
+                or headers.get("content-type", "").startswith(COMPRESS_EXCLUDE_TYPES)
+            ):
+                # 流式响应或小响应原样发送
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            if len(body) >= COMPRESS_THREAD_SIZE:
+                body = await run_in_threadpool(_compress, body, encoding)
+            else:
+                body = _compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,376 @@
+"""因子统计增量更新
+
+每日数据管道只为每个因子追加一行, 但 ``load_factor_stats`` 每次都从 2018 年起
+全量重算。这里为每个 (pool, optimizer_index, benchmark_index) 组合维护一份可合并
+的因子状态, 每次只读取水位线之后的新数据并入状态:
+
+- IC: 非空数、和、平方和
+- 分组收益 (Group_01 / Group_10 / LS_Hedge): 行数与累计净值
+- 回测超额收益: 累计净值、历史峰值、最大回撤、非空数、和、平方和; 换手的和与非空数
+- 各类数据的起止日期, 最大日期即该因子的水位线
+
+新数据通过 ``FactorManagerAll.get_date_status_factor`` 发现: 只查询全局水位线附近的
+状态记录, 其 ``end_date`` 超过因子水位线的才会读取新数据。全历史 (不指定起止日期)
+的 ``load_factor_stats`` 请求直接由状态得出结果, 口径与 ``batch_metrics`` 一致;
+状态更新后新增的因子不在状态中, 由 ``load_factor_stats`` 实时计算后并入。
+
+用法::
+
+    python -m factorview.incremental update --pools all --optimizer-indexs 000905.SH
+    python -m factorview.incremental update --rebuild   # 历史数据被改写后全量重建
+"""
+
+import argparse
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from .batch_metrics import ANNUAL_DAYS, to_matrix
+from .mirror import get_perf_factors
+from .source import FactorManagerAll
+
+logger = logging.getLogger(__name__)
+
+# 状态目录
+STATE_DIR: str = os.environ.get("FACTORVIEW_STATE_DIR", "state")
+# 状态最长有效时间 (小时), 超过后不再使用
+STATE_MAX_AGE: float = float(os.environ.get("FACTORVIEW_STATE_MAX_AGE", 36))
+# 查询更新状态时在全局水位线基础上往前多看的天数
+STATUS_LOOKBACK_DAYS: int = 10
+
+GROUP_COLUMNS: dict[str, str] = {
+    "Group_01": "bottom_ret",
+    "Group_10": "top_ret",
+    "LS_Hedge": "long_short_ret",
+}
+
+_loaded: dict[str, tuple[float, pd.DataFrame]] = {}
+_lock = threading.Lock()
+
+
+def state_path(
+    pool: str = "all",
+    optimizer_index: str = "000905.SH",
+    benchmark_index: str = "000905.SH",
+) -> str:
+    return os.path.join(
+        STATE_DIR, f"{pool}_{optimizer_index}_{benchmark_index}.parquet"
+    )
+
+
+def _empty_state() -> pd.DataFrame:
+    return pd.DataFrame(index=pd.Index([], name="factor_name"))
+
+
+def _date_range(dates: pd.Index, present: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """各因子第一个和最后一个有记录的日期"""
+    has = present.any(axis=0)
+    first = dates.values[present.argmax(axis=0)]
+    last = dates.values[len(dates) - 1 - present[::-1].argmax(axis=0)]
+    nat = np.datetime64("NaT")
+    return np.where(has, first, nat), np.where(has, last, nat)
+
+
+def _sums(values: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    return valid.sum(axis=0), filled.sum(axis=0), (filled**2).sum(axis=0)
+
+
+def ic_delta(ic: pd.Series) -> pd.DataFrame:
+    """新增 IC 数据的可合并统计量"""
+    if ic.empty:
+        return pd.DataFrame()
+    dates, names, values, present = to_matrix(ic)
+    count, total, sumsq = _sums(values)
+    first, last = _date_range(dates, present)
+    return pd.DataFrame(
+        {
+            "ic_count": count,
+            "ic_sum": total,
+            "ic_sumsq": sumsq,
+            "ic_min": first,
+            "ic_max": last,
+        },
+        index=names,
+    )
+
+
+def group_delta(group: pd.DataFrame) -> pd.DataFrame:
+    """新增分组收益的可合并统计量"""
+    if group.empty:
+        return pd.DataFrame()
+    group = group[list(GROUP_COLUMNS)]
+    dates, names, values, present = to_matrix(group)
+    nav = np.prod(1.0 + np.nan_to_num(values, nan=0.0), axis=0)
+    first, last = _date_range(dates, present)
+    res = pd.DataFrame(
+        nav, index=names, columns=[f"group_nav_{c}" for c in GROUP_COLUMNS]
+    )
+    res["group_rows"] = present.sum(axis=0)
+    res["group_min"] = first
+    res["group_max"] = last
+    return res
+
+
+def backtest_delta(backtest: pd.DataFrame, state: pd.DataFrame) -> pd.DataFrame:
+    """新增回测数据接在上一状态之后的净值、峰值与回撤, 以及可相加的统计量"""
+    if backtest.empty:
+        return pd.DataFrame()
+    dates, names, values, present = to_matrix(backtest[["excess_ret", "turnover"]])
+    excess, turnover = values[..., 0], values[..., 1]
+
+    prev = state.reindex(index=names, columns=["bt_nav", "bt_peak", "bt_mdd"])
+    has_prev = prev["bt_nav"].notna().to_numpy()
+    nav0 = prev["bt_nav"].fillna(1.0).to_numpy(dtype="float64")
+    peak0 = prev["bt_peak"].to_numpy(dtype="float64")
+    mdd0 = prev["bt_mdd"].to_numpy(dtype="float64")
+
+    # 新因子从第一条记录开始计算净值, 已有因子接着上一状态的净值
+    started = np.logical_or.accumulate(present, axis=0) | has_prev
+    nav = nav0 * np.cumprod(1.0 + np.nan_to_num(excess, nan=0.0), axis=0)
+    nav = np.where(started, nav, np.nan)
+    peak = np.fmax.accumulate(np.fmax(peak0, nav), axis=0)
+    mdd = np.fmin(mdd0, np.fmin.reduce(nav / peak - 1, axis=0))
+
+    count, total, sumsq = _sums(excess)
+    turnover_count, turnover_sum, _ = _sums(turnover)
+    first, last = _date_range(dates, present)
+    return pd.DataFrame(
+        {
+            "bt_nav": nav[-1],
+            "bt_peak": peak[-1],
+            "bt_mdd": mdd,
+            "bt_rows": present.sum(axis=0),
+            "bt_count": count,
+            "bt_sum": total,
+            "bt_sumsq": sumsq,
+            "turnover_count": turnover_count,
+            "turnover_sum": turnover_sum,
+            "bt_min": first,
+            "bt_max": last,
+        },
+        index=names,
+    )
+
+
+def merge_state(state: pd.DataFrame, delta: pd.DataFrame) -> pd.DataFrame:
+    """把新增统计量并入状态"""
+    if delta.empty:
+        return state
+    names = state.index.union(delta.index)
+    state = state.reindex(names)
+    delta = delta.reindex(names)
+    for col in delta.columns:
+        new = delta[col]
+        if col not in state:
+            state[col] = new
+            continue
+        old = state[col]
+        if col.endswith("_min"):
+            state[col] = pd.concat([old, new], axis=1).min(axis=1)
+        elif col.endswith("_max"):
+            state[col] = pd.concat([old, new], axis=1).max(axis=1)
+        elif col.startswith("group_nav_"):
+            state[col] = old.fillna(1.0) * new.fillna(1.0)
+        elif col in ("bt_nav", "bt_peak", "bt_mdd"):
+            # 回测净值路径已在 backtest_delta 中与上一状态衔接
+            state[col] = new.where(new.notna(), old)
+        else:
+            state[col] = old.fillna(0) + new.fillna(0)
+    return state
+
+
+def _watermarks(state: pd.DataFrame, cols: list[str]) -> pd.Series:
+    """各因子水位线"""
+    cols = [c for c in cols if c in state]
+    if not cols:
+        return pd.Series(dtype="datetime64[ns]")
+    return state[cols].max(axis=1)
+
+
+def _group_by_start(watermarks: pd.Series, factor_names: list[str]) -> dict:
+    """按水位线把因子分组, 同一水位线的因子一次读取"""
+    groups: dict = {}
+    for name in factor_names:
+        mark = watermarks.get(name, pd.NaT)
+        start = None if pd.isna(mark) else mark + pd.Timedelta(days=1)
+        groups.setdefault(start, []).append(name)
+    return groups
+
+
+def update_state(
+    pool: str = "all",
+    optimizer_index: str = "000905.SH",
+    benchmark_index: str = "000905.SH",
+    rebuild: bool = False,
+) -> pd.DataFrame:
+    """读取水位线之后的新数据并入状态并保存"""
+    path = state_path(pool, optimizer_index, benchmark_index)
+    if rebuild or not os.path.exists(path):
+        state = _empty_state()
+    else:
+        state = pd.read_parquet(path)
+    watermarks = _watermarks(state, ["ic_max", "group_max", "bt_max"])
+
+    end_date = pd.Timestamp.today().normalize()
+    if watermarks.notna().any():
+        status_start = watermarks.max() - pd.Timedelta(days=STATUS_LOOKBACK_DAYS)
+    else:
+        status_start = pd.Timestamp("2018-01-01")
+    status = FactorManagerAll.get_date_status_factor(
+        start_date=status_start, end_date=end_date
+    )
+    if status.empty:
+        return state
+    latest = pd.to_datetime(status.groupby("factor_name")["end_date"].last())
+    marks = watermarks.reindex(latest.index)
+    updated = latest.index[marks.isna() | (latest > marks)].tolist()
+
+    # 三类数据各自按自己的水位线读取, 某类数据晚到一天也能在下次补上
+    for start, names in _group_by_start(
+        _watermarks(state, ["ic_max"]), updated
+    ).items():
+        ic_df = get_perf_factors(
+            perf_type="ic",
+            factor_names=names,
+            start_date=start,
+            fields=["corr"],
+            query=[("pool", pool)],
+        )
+        state = merge_state(state, ic_delta(ic_df["corr"]))
+    for start, names in _group_by_start(
+        _watermarks(state, ["group_max"]), updated
+    ).items():
+        group_df = get_perf_factors(
+            perf_type="group_pnl",
+            factor_names=names,
+            start_date=start,
+            fields=list(GROUP_COLUMNS),
+            query=[("pool", pool)],
+        )
+        state = merge_state(state, group_delta(group_df))
+    for start, names in _group_by_start(
+        _watermarks(state, ["bt_max"]), updated
+    ).items():
+        backtest_df = get_perf_factors(
+            perf_type="backtest_ret",
+            factor_names=names,
+            start_date=start,
+            fields=["excess_ret", "turnover"],
+            query=[
+                ("pool", pool),
+                ("optimizer_index", optimizer_index),
+                ("benchmark_index", benchmark_index),
+            ],
+        )
+        state = merge_state(state, backtest_delta(backtest_df, state))
+
+    os.makedirs(STATE_DIR, exist_ok=True)
+    tmp = f"{path}.tmp"
+    state.to_parquet(tmp)
+    os.replace(tmp, path)
+    logger.info("%s: 更新 %d 个因子, 共 %d 个因子", path, len(updated), len(state))
+    return state
+
+
+def read_state(
+    pool: str = "all",
+    optimizer_index: str = "000905.SH",
+    benchmark_index: str = "000905.SH",
+) -> pd.DataFrame | None:
+    """读取未过期的状态, 没有则返回 None"""
+    path = state_path(pool, optimizer_index, benchmark_index)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    if time.time() - mtime > STATE_MAX_AGE * 3600:
+        return None
+    with _lock:
+        loaded = _loaded.get(path)
+        if loaded is not None and loaded[0] == mtime:
+            return loaded[1]
+    state = pd.read_parquet(path)
+    with _lock:
+        _loaded[path] = (mtime, state)
+    return state
+
+
+def _col(state: pd.DataFrame, name: str) -> pd.Series:
+    if name in state:
+        return state[name].astype("float64")
+    return pd.Series(np.nan, index=state.index)
+
+
+def state_stats(state: pd.DataFrame, factor_names: pd.Index) -> tuple:
+    """由状态得到 load_factor_stats 的 (ic, group, backtest, date) 四张表"""
+    state = state.reindex(factor_names)
+
+    ic_count = _col(state, "ic_count")
+    ic_mean = _col(state, "ic_sum") / ic_count
+    ic_std = np.sqrt((_col(state, "ic_sumsq") - ic_count * ic_mean**2) / (ic_count - 1))
+    ic_stats = pd.DataFrame({"ic": ic_mean, "icir": ic_mean / ic_std})
+
+    group_rows = _col(state, "group_rows").where(lambda x: x > 0)
+    group_stats = pd.DataFrame(
+        {
+            name: _col(state, f"group_nav_{col}") ** (ANNUAL_DAYS / group_rows) - 1
+            for col, name in GROUP_COLUMNS.items()
+        }
+    )
+
+    bt_rows = _col(state, "bt_rows").where(lambda x: x > 0)
+    annual_return = _col(state, "bt_nav") ** (ANNUAL_DAYS / bt_rows) - 1
+    max_drawdown = _col(state, "bt_mdd")
+    bt_count = _col(state, "bt_count")
+    bt_mean = _col(state, "bt_sum") / bt_count
+    bt_std = np.sqrt((_col(state, "bt_sumsq") - bt_count * bt_mean**2) / (bt_count - 1))
+    backtest_stats = pd.DataFrame(
+        {
+            "annual_return": annual_return,
+            "max_drawdown": max_drawdown,
+            "sharpe_ratio": bt_mean / bt_std * np.sqrt(ANNUAL_DAYS),
+            "calmar_ratio": (annual_return / max_drawdown.abs()).where(
+                max_drawdown < 0
+            ),
+            "turnover": _col(state, "turnover_sum")
+            / _col(state, "turnover_count")
+            * ANNUAL_DAYS,
+        }
+    )
+
+    def _dates(suffix: str) -> pd.DataFrame:
+        cols = [f"{kind}_{suffix}" for kind in ("ic", "group", "bt")]
+        return state.reindex(columns=cols).apply(pd.to_datetime)
+
+    date_df = pd.DataFrame(
+        {"min": _dates("min").max(axis=1), "max": _dates("max").min(axis=1)}
+    )
+    return ic_stats, group_stats, backtest_stats, date_df
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description="因子统计增量更新")
+    sub = parser.add_subparsers(dest="command", required=True)
+    update = sub.add_parser("update", help="读取新数据并更新状态")
+    update.add_argument("--pools", nargs="+", default=["all"])
+    update.add_argument("--optimizer-indexs", nargs="+", default=["000905.SH"])
+    update.add_argument("--benchmark-indexs", nargs="+", default=None)
+    update.add_argument("--rebuild", action="store_true", help="全量重建状态")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    for pool in args.pools:
+        for optimizer_index in args.optimizer_indexs:
+            # 未指定基准时与优化指数相同
+            for benchmark_index in args.benchmark_indexs or [optimizer_index]:
+                update_state(pool, optimizer_index, benchmark_index, args.rebuild)
+
+
+if __name__ == "__main__":
+    main()
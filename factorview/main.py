@@ -1,8 +1,7 @@
-import numpy as np
-import pandas as pd
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 
 from .data_loader import (
     load_factor_info,
@@ -12,13 +11,46 @@ from .data_loader import (
     load_factor_stats_group,
     load_factor_stats_ic,
     load_factor_update_info,
+    iter_factor_stats_backtest,
+    iter_factor_stats_group,
+    iter_factor_stats_ic,
     load_strategy_factor_stats,
     load_strategy_info,
     load_strategy_perf,
 )
+from .batch import BATCH_MAX_QUERIES, BatchRequest, run_batch
+from .cache import result_cache
+from .data_version import DataVersionMiddleware
+from .downsample import downsample_blocks
+from .events import event_response, watcher
+from .series_cache import series_cache
+from .executor import (
+    executor_stats,
+    iter_blocking,
+    run_blocking,
+    shutdown_executors,
+)
+from .http_cache import COMPRESS_MIN_SIZE, CompressionMiddleware, ETagMiddleware
+from .stats_query import STATS_FRAMES, query_factor_stats
+from .strategy_graph import factor_strategies
+from .telemetry import METRICS_ENABLED, TelemetryMiddleware, render_metrics
+from .summary import SUMMARY_BLOCK, ic_summary, ic_summary_table, summary_blocks
+from .sync import delta_blocks, series_version
+from .serializer import (
+    FastJSONResponse,
+    blocks_response,
+    clean_records,
+    clean_for_json,
+    frame_block,
+    ndjson_response,
+)
 
 app = FastAPI()
 
+# 条件请求: 放在跨域中间件内层, 304 响应同样带跨域头
+app.add_middleware(ETagMiddleware)
+# 数据版本变化时先清除受影响的缓存, 放在条件请求外层
+app.add_middleware(DataVersionMiddleware)
 # 允许所有来源的跨域请求
 app.add_middleware(
     CORSMiddleware,
@@ -27,20 +59,53 @@ app.add_middleware(
     allow_methods=["*"],  # 允许所有HTTP方法
     allow_headers=["*"],  # 允许所有请求头
 )
+# 响应压缩
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESS_MIN_SIZE)
+# 分阶段耗时统计, 放在最外层, 统计压缩后的字节数
+if METRICS_ENABLED:
+    app.add_middleware(TelemetryMiddleware)
+
+
+@app.on_event("shutdown")
+def shutdown():
+    watcher.stop()
+    shutdown_executors()
+
+
+def _perf_blocks(
+    blocks: dict,
+    max_points: int = None,
+    summary: bool = False,
+    series: bool = True,
+    since: str = None,
+) -> tuple[dict, dict | None]:
+    """按参数返回序列 (可降采样, 或只取 ``since`` 之后的行) 与全量数据计算的汇总
+    统计, 以及增量同步信息"""
+    meta = None
+    if since is not None:
+        res, sync = delta_blocks(blocks, since)
+        meta = {"sync": {"version": series_version(blocks), **sync}}
+        if not series:
+            res = {}
+    else:
+        res = downsample_blocks(blocks, max_points) if series else {}
+    if summary:
+        res.update(summary_blocks(blocks))
+    return res, meta
+
 
+def _check_since(since: str | None, max_points: int | None):
+    if since is not None and max_points is not None:
+        raise HTTPException(status_code=400, detail="since 不能与 max_points 同时使用")
 
-def clean_for_json(data):
-    if isinstance(data, pd.DataFrame):
-        return {c: clean_for_json(data[c]) for c in data.columns}
-    if isinstance(data, (list, tuple, pd.Index, pd.Series, np.ndarray)):
-        return [clean_for_json(x) for x in data]
-    elif isinstance(data, dict):
-        return {k: clean_for_json(v) for k, v in data.items()}
-    elif isinstance(data, (float, int)):
-        return None if pd.isna(data) else data
-    if isinstance(data, pd.Timestamp):
-        return data.strftime(r"%Y-%m-%d")
-    return data
+
+def _ic_line_summary(df) -> dict:
+    """流式 IC 接口每行附带的汇总"""
+    return {"summary": clean_for_json(ic_summary(df).to_dict())}
+
+
+# 序列按行返回, 汇总统计按列返回
+PERF_ORIENT: dict[str, str] = {"ic": "rows", "group": "rows", "backtest_ret": "rows"}
 
 
 @app.get("/api/factor")
@@ -54,7 +119,9 @@ async def get_factor_info(
     creation_time: list[str] = Query(None),
 ):
     """取因子基本信息"""
-    factor_info = load_factor_info(
+    factor_info = await run_blocking(
+        "factor_info",
+        load_factor_info,
         factor_names=factor_names,
         table_names=table_names,
         class_names=class_names,
@@ -63,14 +130,7 @@ async def get_factor_info(
         factor_ids=factor_ids,
         creation_time=creation_time,
     )
-    return JSONResponse(
-        {
-            "factor_info": {
-                "values": clean_for_json(factor_info),
-                "index": clean_for_json(factor_info.index),
-            }
-        }
-    )
+    return FastJSONResponse({"factor_info": frame_block(factor_info)})
 
 
 @app.get("/api/factor/stats")
@@ -81,9 +141,20 @@ async def get_factor_stats(
     pool: str = Query("all"),
     optimizer_index: str = Query("000905.SH"),
     benchmark_index: str = Query("000905.SH"),
+    sort_by: str = Query(None),
+    ascending: bool = Query(True),
+    limit: int = Query(None, ge=1),
+    offset: int = Query(0, ge=0),
+    filters: list[str] = Query(default=None, alias="filters[]"),
 ):
-    """取因子统计信息"""
-    factor_stats = load_factor_stats(
+    """取因子统计信息
+
+    可按任意一列排序 (``sort_by``/``ascending``)、按数值范围筛选 (``filters``,
+    如 ``icir>0.5``) 并分页 (``limit``/``offset``), ``total`` 为筛选后的因子总数
+    """
+    factor_stats = await run_blocking(
+        "factor_stats",
+        load_factor_stats,
         factor_names=factor_names,
         start_date=start_date,
         end_date=end_date,
@@ -91,32 +162,39 @@ async def get_factor_stats(
         optimizer_index=optimizer_index,
         benchmark_index=benchmark_index,
     )
-    return JSONResponse(
+    try:
+        total, factor_stats = await run_in_threadpool(
+            query_factor_stats,
+            factor_stats,
+            sort_by=sort_by,
+            ascending=ascending,
+            limit=limit,
+            offset=offset,
+            filters=filters,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from None
+    return FastJSONResponse(
         {
-            name: {
-                "values": clean_for_json(df),
-                "index": clean_for_json(df.index),
-            }
-            for name, df in zip(
-                ["factor_info", "ic", "group", "backtest_ret", "date"],
-                factor_stats,
-            )
+            "total": total,
+            **{name: frame_block(df) for name, df in zip(STATS_FRAMES, factor_stats)},
         }
     )
 
 
 @app.get("/api/factor/stats/backtest")
 async def get_factor_stats_backtest(
+    request: Request,
     factor_names: list[str] = Query(default=None, alias="factor_names[]"),
     start_date: str = Query(None),
     end_date: str = Query(None),
     pool: str = Query("all"),
     optimizer_index: str = Query("000905.SH"),
     benchmark_index: str = Query("000905.SH"),
+    stream: bool = Query(False),
 ):
-    """取因子回测统计信息"""
-
-    backtest_dict = load_factor_stats_backtest(
+    """取因子回测统计信息, ``stream`` 时以 NDJSON 逐个因子返回"""
+    params = dict(
         factor_names=factor_names,
         start_date=start_date,
         end_date=end_date,
@@ -124,29 +202,30 @@ async def get_factor_stats_backtest(
         optimizer_index=optimizer_index,
         benchmark_index=benchmark_index,
     )
-    return JSONResponse(
-        {
-            name: {
-                "values": clean_for_json(df),
-                "index": clean_for_json(df.index),
-            }
-            for name, df in backtest_dict.items()
-        }
+    if stream:
+        return ndjson_response(
+            iter_blocking("factor_stats_backtest", iter_factor_stats_backtest, **params)
+        )
+
+    backtest_dict = await run_blocking(
+        "factor_stats_backtest", load_factor_stats_backtest, **params
     )
+    return blocks_response(request, backtest_dict)
 
 
 @app.get("/api/factor/stats/group")
 async def get_factor_stats_group(
+    request: Request,
     factor_names: list[str] = Query(default=None, alias="factor_names[]"),
     start_date: str = Query(None),
     end_date: str = Query(None),
     pool: str = Query("all"),
     optimizer_index: str = Query("000905.SH"),
     benchmark_index: str = Query("000905.SH"),
+    stream: bool = Query(False),
 ):
-    """取因子分组统计信息"""
-
-    group_dict = load_factor_stats_group(
+    """取因子分组统计信息, ``stream`` 时以 NDJSON 逐个因子返回"""
+    params = dict(
         factor_names=factor_names,
         start_date=start_date,
         end_date=end_date,
@@ -154,29 +233,36 @@ async def get_factor_stats_group(
         optimizer_index=optimizer_index,
         benchmark_index=benchmark_index,
     )
-    return JSONResponse(
-        {
-            name: {
-                "values": clean_for_json(df),
-                "index": clean_for_json(df.index),
-            }
-            for name, df in group_dict.items()
-        }
+    if stream:
+        return ndjson_response(
+            iter_blocking("factor_stats_group", iter_factor_stats_group, **params)
+        )
+
+    group_dict = await run_blocking(
+        "factor_stats_group", load_factor_stats_group, **params
     )
+    return blocks_response(request, group_dict)
 
 
 @app.get("/api/factor/stats/ic")
 async def get_factor_stats_ic(
+    request: Request,
     factor_names: list[str] = Query(default=None, alias="factor_names[]"),
     start_date: str = Query(None),
     end_date: str = Query(None),
     pool: str = Query("all"),
     optimizer_index: str = Query("000905.SH"),
     benchmark_index: str = Query("000905.SH"),
+    summary: bool = Query(False),
+    series: bool = Query(True),
+    stream: bool = Query(False),
 ):
-    """取因子IC统计信息"""
+    """取因子IC统计信息
 
-    ic_dict = load_factor_stats_ic(
+    ``summary`` 附带各因子的 IC 汇总, ``series=false`` 不返回序列; ``stream`` 时以
+    NDJSON 逐个因子返回, 汇总放在每行的 ``summary`` 中
+    """
+    params = dict(
         factor_names=factor_names,
         start_date=start_date,
         end_date=end_date,
@@ -184,15 +270,18 @@ async def get_factor_stats_ic(
         optimizer_index=optimizer_index,
         benchmark_index=benchmark_index,
     )
-    return JSONResponse(
-        {
-            name: {
-                "values": clean_for_json(df),
-                "index": clean_for_json(df.index),
-            }
-            for name, df in ic_dict.items()
-        }
-    )
+    if stream:
+        return ndjson_response(
+            iter_blocking("factor_stats_ic", iter_factor_stats_ic, **params),
+            extra=_ic_line_summary if summary else None,
+        )
+
+    ic_dict = await run_blocking("factor_stats_ic", load_factor_stats_ic, **params)
+    blocks = ic_dict if series else {}
+    if summary:
+        summary_df = await run_in_threadpool(ic_summary_table, ic_dict)
+        blocks = {SUMMARY_BLOCK: summary_df, **blocks}
+    return blocks_response(request, blocks)
 
 
 @app.get("/api/factor/update")
@@ -203,30 +292,40 @@ async def get_factor_update(
 ):
     """取因子更新信息"""
 
-    factor_update_info = load_factor_update_info(
+    factor_update_info = await run_blocking(
+        "factor_update",
+        load_factor_update_info,
         factor_names=factor_names,
         start_date=start_date,
         end_date=end_date,
     )
-    return JSONResponse(
-        {
-            name: clean_for_json(factor_update_info.loc[name].to_dict())
-            for name in factor_update_info.index
-        }
-    )
+    return FastJSONResponse(clean_records(factor_update_info))
 
 
 @app.get("/api/factor/{factor_name}")
 async def get_factor_perf(
+    request: Request,
     factor_name: str,
     start_date: str = Query(None),
     end_date: str = Query(None),
     pool: str = Query("all"),
     optimizer_index: str = Query("000905.SH"),
     benchmark_index: str = Query("000905.SH"),
+    max_points: int = Query(None, ge=10),
+    summary: bool = Query(False),
+    series: bool = Query(True),
+    since: str = Query(None),
 ):
-    """取单个因子的表现"""
-    factor_perf = load_factor_perf(
+    """取单个因子的表现
+
+    ``max_points`` 指定时序列降采样到不超过该行数; ``summary`` 附带由全量数据
+    计算的汇总统计; ``series=false`` 只返回汇总统计; ``since`` 为日期或版本号时
+    只返回之后的行, 并在 ``sync`` 中给出新的版本号与是否需要整体替换 (见 ``sync.py``)
+    """
+    _check_since(since, max_points)
+    factor_perf = await run_blocking(
+        "factor_perf",
+        load_factor_perf,
         factor_name=factor_name,
         start_date=start_date,
         end_date=end_date,
@@ -234,18 +333,27 @@ async def get_factor_perf(
         optimizer_index=optimizer_index,
         benchmark_index=benchmark_index,
     )
-    return JSONResponse(
-        {
-            name: {
-                "values": clean_for_json(df.values),
-                "index": clean_for_json(df.index),
-            }
-            for name, df in zip(
-                ["ic", "group", "backtest_ret"],
-                factor_perf,
-            )
-        }
+    try:
+        blocks, meta = await run_in_threadpool(
+            _perf_blocks,
+            dict(zip(["ic", "group", "backtest_ret"], factor_perf)),
+            max_points,
+            summary,
+            series,
+            since,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from None
+    return blocks_response(request, blocks, orient=PERF_ORIENT, meta=meta)
+
+
+@app.get("/api/factor/{factor_name}/strategies")
+async def get_factor_strategies(factor_name: str):
+    """取使用该因子 (作为源因子或组合因子) 的策略"""
+    strategies = await run_blocking(
+        "factor_strategies", factor_strategies, factor_name=factor_name
     )
+    return FastJSONResponse({"factor_name": factor_name, "strategies": strategies})
 
 
 @app.get("/api/strategy")
@@ -255,32 +363,35 @@ async def get_strategy_info(
     benchmark_index: str = Query("000905.SH"),
 ):
     """取策略基本信息"""
-    strategy_info = load_strategy_info(
+    strategy_info = await run_blocking(
+        "strategy_info",
+        load_strategy_info,
         pool=pool,
         optimizer_index=optimizer_index,
         benchmark_index=benchmark_index,
     )
-    return JSONResponse(
-        {
-            "strategy_info": {
-                "values": clean_for_json(strategy_info),
-                "index": clean_for_json(strategy_info.index),
-            }
-        }
-    )
+    return FastJSONResponse({"strategy_info": frame_block(strategy_info)})
 
 
 @app.get("/api/strategy/{strategy_name}")
 async def get_strategy_perf(
+    request: Request,
     strategy_name: str,
     start_date: str = Query(None),
     end_date: str = Query(None),
     pool: str = Query("all"),
     optimizer_index: str = Query("000905.SH"),
     benchmark_index: str = Query("000905.SH"),
+    max_points: int = Query(None, ge=10),
+    summary: bool = Query(False),
+    series: bool = Query(True),
+    since: str = Query(None),
 ):
-    """取单个策略的表现"""
-    (backtest_df,) = load_strategy_perf(
+    """取单个策略的表现, 参数含义同 ``get_factor_perf``"""
+    _check_since(since, max_points)
+    (backtest_df,) = await run_blocking(
+        "strategy_perf",
+        load_strategy_perf,
         strategy_name=strategy_name,
         start_date=start_date,
         end_date=end_date,
@@ -288,14 +399,18 @@ async def get_strategy_perf(
         optimizer_index=optimizer_index,
         benchmark_index=benchmark_index,
     )
-    return JSONResponse(
-        {
-            "backtest_ret": {
-                "values": clean_for_json(backtest_df.values),
-                "index": clean_for_json(backtest_df.index),
-            }
-        }
-    )
+    try:
+        blocks, meta = await run_in_threadpool(
+            _perf_blocks,
+            {"backtest_ret": backtest_df},
+            max_points,
+            summary,
+            series,
+            since,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from None
+    return blocks_response(request, blocks, orient=PERF_ORIENT, meta=meta)
 
 
 @app.get("/api/strategy/{strategy_name}/factors")
@@ -308,7 +423,9 @@ async def get_strategy_factors(
     benchmark_index: str = Query("000905.SH"),
 ):
     """取策略的统计表现"""
-    factor_stats = load_strategy_factor_stats(
+    factor_stats = await run_blocking(
+        "strategy_factors",
+        load_strategy_factor_stats,
         strategy_name=strategy_name,
         start_date=start_date,
         end_date=end_date,
@@ -316,20 +433,53 @@ async def get_strategy_factors(
         optimizer_index=optimizer_index,
         benchmark_index=benchmark_index,
     )
-    return JSONResponse(
-        {
-            name: {
-                "values": clean_for_json(df),
-                "index": clean_for_json(df.index),
-            }
-            for name, df in zip(
-                ["factor_info", "ic", "group", "backtest_ret", "date"],
-                factor_stats,
-            )
-        }
+    return FastJSONResponse(
+        {name: frame_block(df) for name, df in zip(STATS_FRAMES, factor_stats)}
     )
 
 
+@app.post("/api/batch")
+async def post_batch(request: Request, batch: BatchRequest):
+    """批量执行多个 GET 子请求, 共用的表现数据只读取一次, 结果按请求顺序一次返回"""
+    if len(batch.queries) > BATCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=400, detail=f"子请求数超过上限 {BATCH_MAX_QUERIES}"
+        )
+    return await run_batch(request, batch.queries)
+
+
+@app.get("/api/events")
+async def get_events():
+    """数据更新推送 (SSE), 数据变化时发送 ``version`` 事件与受影响的因子"""
+    return event_response()
+
+
+@app.get("/api/admin/requests")
+async def get_request_stats():
+    """取各接口并发、排队与请求合并统计"""
+    return FastJSONResponse(executor_stats())
+
+
+@app.get("/api/admin/cache")
+async def get_cache_stats():
+    """取缓存统计信息, ``series`` 为全历史序列缓存"""
+    return FastJSONResponse({**result_cache.stats(), "series": series_cache.stats()})
+
+
+@app.delete("/api/admin/cache")
+async def clear_cache(name: str = Query(None)):
+    """清空缓存, 指定 name 时只清空该类数据 (序列缓存为 ``series_{perf_type}``)"""
+    return FastJSONResponse(
+        {"cleared": result_cache.clear(name) + series_cache.clear(name)}
+    )
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus 格式的分阶段耗时、响应字节数与数据源行数直方图"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -0,0 +1,451 @@
+"""表现数据的本地 Parquet 镜像
+
+每次请求都经 ``FactorManagerAll.get_perf_factor`` 访问远程数据库。这里把 ic、
+group_pnl、backtest_ret 三张表同步到本地, 按 ``perf_type/pool=.../month=...``
+分区存为 Parquet, 用 PyArrow dataset 读取: 只读取请求的字段, 池与月份分区
+直接裁剪, 日期、因子名与其余查询条件下推到行组统计过滤。
+
+``FACTORVIEW_PERF_BACKEND=mirror`` 时, ``data_loader`` 中的表现数据读取
+(``get_perf_factor``) 先查镜像, 参数与 ``FactorManagerAll.get_perf_factor`` 相同;
+镜像未同步的查询条件或因子、以及无法下推的查询 (SQL 字符串、其他参数) 仍访问
+远程数据库。镜像的数据截至最近一次同步的日期, 建议在每日数据管道完成后执行::
+
+    python -m factorview.mirror sync --pools all --optimizer-indexs 000905.SH
+    # 历史数据被改写后全量重建
+    python -m factorview.mirror sync --rebuild
+    python -m factorview.mirror list
+
+同步只读取上次同步日期前 ``--lookback-days`` 天之后的数据, 新因子读取全历史;
+有新数据的月份分区整体重写 (同一日期以新数据为准), 每个文件原子替换。全量重建
+写入新文件名的分区文件, 同步记录替换后才删除旧文件; 读取只使用同步记录中登记的
+文件, 重建过程中仍读取旧文件。
+"""
+
+import argparse
+import glob
+import uuid
+import hashlib
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+from .perf_source import INDEX_COLUMNS, empty_perf, fetch_perf_factors, perf_fields
+from .source import FactorManagerAll
+from .telemetry import add_rows, phase
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:  # pragma: no cover
+    pa = ds = None
+
+# 表现数据来源: remote (远程数据库) / mirror (本地镜像, 未覆盖时访问远程)
+PERF_BACKEND: str = os.environ.get("FACTORVIEW_PERF_BACKEND", "remote")
+# 镜像目录
+MIRROR_DIR: str = os.environ.get("FACTORVIEW_MIRROR_DIR", "mirror")
+# 同步时重新读取的天数, 覆盖晚到或被修正的数据
+SYNC_LOOKBACK_DAYS: int = 5
+
+PERF_TYPES: list[str] = ["ic", "group_pnl", "backtest_ret"]
+# 除 pool 外作为普通列保存、可下推的查询条件
+QUERY_COLUMNS: list[str] = ["optimizer_index", "benchmark_index"]
+
+_datasets: dict[str, tuple[float, dict, "ds.Dataset"]] = {}
+_lock = threading.Lock()
+
+
+def _query_dict(query) -> dict | None:
+    """``[(列, 值), ...]`` 转为 dict, 含无法下推的条件时返回 None"""
+    if query is None:
+        return {}
+    if isinstance(query, tuple):
+        query = [query]
+    res = {}
+    for item in query:
+        if not isinstance(item, tuple) or len(item) != 2:
+            return None
+        key, value = item
+        if key != "pool" and key not in QUERY_COLUMNS:
+            return None
+        res[key] = value
+    return res
+
+
+def _combo_id(query: dict) -> str:
+    return hashlib.md5(json.dumps(query, sort_keys=True).encode("utf-8")).hexdigest()[
+        :8
+    ]
+
+
+def _matches(value, wanted) -> bool:
+    if isinstance(wanted, (list, tuple, set)):
+        return value in wanted
+    return value == wanted
+
+
+def _manifest_path(perf_type: str) -> str:
+    return os.path.join(MIRROR_DIR, perf_type, "_manifest.json")
+
+
+def _part_name(combo_id: str, combo: dict = None) -> str:
+    """组合的分区文件名, 早期的同步记录没有 ``part`` 字段"""
+    if combo is not None and "part" in combo:
+        return combo["part"]
+    return f"part-{combo_id}.parquet"
+
+
+def read_manifest(perf_type: str) -> dict:
+    """同步记录: ``{组合 id: {query, part, end_date, factor_names, synced_at}}``"""
+    try:
+        with open(_manifest_path(perf_type), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _write_atomic(path: str, write):
+    directory, name = os.path.split(path)
+    os.makedirs(directory, exist_ok=True)
+    # 以 . 开头, 不会被 dataset 发现
+    tmp = os.path.join(directory, f".{name}.tmp")
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _dataset(perf_type: str) -> tuple[dict, "ds.Dataset"] | None:
+    """按同步记录的修改时间缓存 dataset, 同步后自动重新发现文件
+
+    只包含同步记录中登记的分区文件, 重建时尚未登记的新文件与待删除的旧文件不会
+    被读取。
+    """
+    path = _manifest_path(perf_type)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    with _lock:
+        loaded = _datasets.get(perf_type)
+        if loaded is not None and loaded[0] == mtime:
+            return loaded[1], loaded[2]
+    manifest = read_manifest(perf_type)
+    base_dir = os.path.join(MIRROR_DIR, perf_type)
+    parts = {_part_name(combo_id, combo) for combo_id, combo in manifest.items()}
+    files = [
+        path
+        for path in glob.glob(os.path.join(base_dir, "*", "*", "*.parquet"))
+        if os.path.basename(path) in parts
+    ]
+    dataset = ds.dataset(
+        files,
+        format="parquet",
+        partitioning=ds.partitioning(
+            pa.schema([("pool", pa.string()), ("month", pa.string())]),
+            flavor="hive",
+        ),
+        partition_base_dir=base_dir,
+        exclude_invalid_files=False,
+    )
+    with _lock:
+        _datasets[perf_type] = (mtime, manifest, dataset)
+    return manifest, dataset
+
+
+def _filter(query: dict, factor_names: list[str], start_date, end_date):
+    expr = ds.field("factor_name").isin(factor_names)
+    for key, value in query.items():
+        if isinstance(value, (list, tuple, set)):
+            expr &= ds.field(key).isin(list(value))
+        else:
+            expr &= ds.field(key) == value
+    if start_date is not None:
+        start_date = pd.Timestamp(start_date)
+        expr &= ds.field("month") >= start_date.strftime("%Y-%m")
+        expr &= ds.field("date") >= pa.scalar(start_date, pa.timestamp("ns"))
+    if end_date is not None:
+        end_date = pd.Timestamp(end_date)
+        expr &= ds.field("month") <= end_date.strftime("%Y-%m")
+        expr &= ds.field("date") <= pa.scalar(end_date, pa.timestamp("ns"))
+    return expr
+
+
+def read_perf(
+    perf_type: str,
+    factor_names,
+    start_date=None,
+    end_date=None,
+    fields=None,
+    query=None,
+) -> tuple[pd.DataFrame, list[str]] | None:
+    """从镜像读取, 返回 ``(数据, 镜像未覆盖的因子)``; 查询条件未同步过时返回 None
+
+    数据索引为 (date, factor_name), 按索引排序。
+    """
+    if ds is None or perf_type not in PERF_TYPES:
+        return None
+    query = _query_dict(query)
+    if query is None:
+        return None
+    loaded = _dataset(perf_type)
+    if loaded is None:
+        return None
+    manifest, dataset = loaded
+    # 满足全部请求条件的同步组合, 其因子即镜像覆盖的因子
+    covered: set[str] = set()
+    for combo in manifest.values():
+        if all(
+            key in combo["query"] and _matches(combo["query"][key], value)
+            for key, value in query.items()
+        ):
+            covered.update(combo["factor_names"])
+    if not covered:
+        return None
+
+    fields = perf_fields(perf_type) if fields is None else fields
+    fields = [fields] if isinstance(fields, str) else list(fields)
+    names = [factor_names] if isinstance(factor_names, str) else list(factor_names)
+    hit = [name for name in names if name in covered]
+    missing = [name for name in names if name not in covered]
+    if not hit:
+        return empty_perf(fields), missing
+
+    try:
+        table = dataset.to_table(
+            columns=INDEX_COLUMNS + fields,
+            filter=_filter(query, hit, start_date, end_date),
+        )
+    except OSError:
+        # 读取期间旧文件被重建删除, 本次改为访问远程数据库
+        return None
+    df = table.to_pandas()
+    df["date"] = pd.to_datetime(df["date"])
+    df = df.set_index(INDEX_COLUMNS).sort_index()
+    return df.astype("float64"), missing
+
+
+def get_perf_factor(
+    perf_type: str,
+    factor_names,
+    start_date=None,
+    end_date=None,
+    fields=None,
+    index_col=None,
+    query=None,
+    is_cache=False,
+    **kwargs,
+) -> pd.DataFrame:
+    """与 ``FactorManagerAll.get_perf_factor`` 相同, 按 ``PERF_BACKEND`` 选择数据来源"""
+    remote = dict(
+        perf_type=perf_type,
+        start_date=start_date,
+        end_date=end_date,
+        fields=fields,
+        index_col=index_col,
+        query=query,
+        is_cache=is_cache,
+        **kwargs,
+    )
+    res = None
+    if PERF_BACKEND == "mirror" and not kwargs:
+        with phase("fetch"):
+            res = read_perf(
+                perf_type, factor_names, start_date, end_date, fields, query
+            )
+    if res is None:
+        return FactorManagerAll.get_perf_factor(factor_names=factor_names, **remote)
+
+    df, missing = res
+    add_rows(df)
+    if missing:
+        remote["index_col"] = INDEX_COLUMNS
+        rest = FactorManagerAll.get_perf_factor(factor_names=missing, **remote)
+        if not rest.empty:
+            df = pd.concat([df, rest]).sort_index()
+    if index_col == "date" or index_col == ["date"]:
+        df = df.droplevel("factor_name")
+    return df
+
+
+def get_perf_factors(
+    perf_type: str, factor_names: list[str], fields: list[str], query: list, **kwargs
+) -> pd.DataFrame:
+    """按 ``PERF_BACKEND`` 批量取多个因子的表现, 见 ``perf_source.fetch_perf_factors``"""
+    return fetch_perf_factors(
+        get_perf_factor,
+        perf_type=perf_type,
+        factor_names=factor_names,
+        fields=fields,
+        query=query,
+        **kwargs,
+    )
+
+
+def _fetch_remote(perf_type: str, factor_names: list[str], query: dict, start_date):
+    return fetch_perf_factors(
+        FactorManagerAll.get_perf_factor,
+        perf_type=perf_type,
+        factor_names=factor_names,
+        fields=perf_fields(perf_type),
+        query=list(query.items()),
+        start_date=start_date,
+    )
+
+
+def _write_months(perf_type: str, query: dict, df: pd.DataFrame, name: str):
+    """按月份写入分区文件 ``name``, 与已有数据合并, 同一 (date, factor_name) 以新数据为准"""
+    df = df.reset_index()
+    df["date"] = pd.to_datetime(df["date"])
+    for key in QUERY_COLUMNS:
+        if key in query:
+            df[key] = query[key]
+    months = df["date"].dt.strftime("%Y-%m")
+    for month, part in df.groupby(months, sort=True):
+        path = os.path.join(
+            MIRROR_DIR, perf_type, f"pool={query['pool']}", f"month={month}", name
+        )
+        if os.path.exists(path):
+            part = pd.concat([pd.read_parquet(path), part])
+        part = part.drop_duplicates(INDEX_COLUMNS, keep="last").sort_values(
+            INDEX_COLUMNS
+        )
+        _write_atomic(path, lambda tmp: part.to_parquet(tmp, index=False))
+
+
+def sync_perf(
+    perf_type: str,
+    query: dict,
+    factor_names: list[str] = None,
+    lookback_days: int = SYNC_LOOKBACK_DAYS,
+    rebuild: bool = False,
+) -> dict:
+    """同步一个 (perf_type, 查询条件) 组合, 返回其同步记录, 附带本次读取的行数
+    ``rows`` 与新因子数 ``new_factors``"""
+    combo_id = _combo_id(query)
+    manifest = read_manifest(perf_type)
+    combo = None if rebuild else manifest.get(combo_id)
+    # 重建写入新文件名, 同步记录替换前读取方仍使用旧文件
+    part = (
+        f"part-{combo_id}-{uuid.uuid4().hex[:8]}.parquet"
+        if rebuild
+        else _part_name(combo_id, combo)
+    )
+
+    if factor_names is None:
+        factor_names = FactorManagerAll.get_factor_names()
+    synced = set() if combo is None else set(combo["factor_names"])
+    known = [name for name in factor_names if name in synced]
+    new = [name for name in factor_names if name not in synced]
+    end_date = None if combo is None else pd.Timestamp(combo["end_date"])
+
+    frames = []
+    if known and end_date is not None:
+        start = end_date - pd.Timedelta(days=lookback_days)
+        frames.append(_fetch_remote(perf_type, known, query, start))
+    if new:
+        frames.append(_fetch_remote(perf_type, new, query, None))
+    frames = [df for df in frames if not df.empty]
+    if frames:
+        df = pd.concat(frames)
+        _write_months(perf_type, query, df, part)
+        latest = df.index.get_level_values("date").max()
+        end_date = latest if end_date is None else max(end_date, latest)
+
+    manifest[combo_id] = {
+        "query": query,
+        "part": part,
+        "end_date": None if end_date is None else end_date.strftime("%Y-%m-%d"),
+        "factor_names": sorted(synced | set(factor_names)),
+        "synced_at": time.time(),
+    }
+    # 同步记录最后写入, 读取方据其修改时间重新发现文件
+    _write_atomic(
+        _manifest_path(perf_type),
+        lambda tmp: _dump_json(manifest, tmp),
+    )
+    if rebuild:
+        pattern = os.path.join(MIRROR_DIR, perf_type, "*", "*", f"part-{combo_id}*")
+        for path in glob.glob(pattern):
+            if os.path.basename(path) != part:
+                os.remove(path)
+    return {
+        **manifest[combo_id],
+        "rows": sum(len(df) for df in frames),
+        "new_factors": len(new),
+    }
+
+
+def _dump_json(data, path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def sync_queries(
+    pools: list[str], optimizer_indexs: list[str], benchmark_indexs: list[str] = None
+) -> list[tuple[str, dict]]:
+    """各表需要同步的 (perf_type, 查询条件), 与 data_loader 中的查询一致"""
+    res = []
+    for pool in pools:
+        res.append(("ic", {"pool": pool}))
+        res.append(("group_pnl", {"pool": pool}))
+        for optimizer_index in optimizer_indexs:
+            # 未指定基准时与优化指数相同
+            for benchmark_index in benchmark_indexs or [optimizer_index]:
+                res.append(
+                    (
+                        "backtest_ret",
+                        {
+                            "pool": pool,
+                            "optimizer_index": optimizer_index,
+                            "benchmark_index": benchmark_index,
+                        },
+                    )
+                )
+    return res
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description="表现数据本地镜像")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sync = sub.add_parser("sync", help="从远程数据库同步新数据")
+    sync.add_argument("--pools", nargs="+", default=["all"])
+    sync.add_argument("--optimizer-indexs", nargs="+", default=["000905.SH"])
+    sync.add_argument("--benchmark-indexs", nargs="+", default=None)
+    sync.add_argument("--perf-types", nargs="+", default=PERF_TYPES)
+    sync.add_argument("--lookback-days", type=int, default=SYNC_LOOKBACK_DAYS)
+    sync.add_argument("--rebuild", action="store_true", help="全量重建")
+
+    sub.add_parser("list", help="列出已同步的组合")
+
+    args = parser.parse_args(argv)
+    if args.command == "list":
+        for perf_type in PERF_TYPES:
+            for combo in read_manifest(perf_type).values():
+                print(
+                    f"{perf_type}  {combo['query']}  {len(combo['factor_names'])} 个因子"
+                    f"  截至 {combo['end_date']}"
+                )
+        return
+
+    factor_names = FactorManagerAll.get_factor_names()
+    for perf_type, query in sync_queries(
+        args.pools, args.optimizer_indexs, args.benchmark_indexs
+    ):
+        if perf_type in args.perf_types:
+            res = sync_perf(
+                perf_type,
+                query,
+                factor_names=factor_names,
+                lookback_days=args.lookback_days,
+                rebuild=args.rebuild,
+            )
+            print(
+                f"{perf_type} {query}: {res['rows']} 行, 新因子 {res['new_factors']} 个,"
+                f" 截至 {res['end_date']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
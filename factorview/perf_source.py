@@ -0,0 +1,109 @@
+"""表现数据读取的公共部分
+
+``data_loader``、``series_cache``、``incremental`` 与 ``mirror`` 共用的表现数据
+字段与批量读取: 多个因子按 ``PERF_CHUNK_SIZE`` 分块并发请求, 结果为
+(date, factor_name) 索引的长表, 再按因子拆分。
+
+实际的读取函数 (远程数据库或本地镜像, 见 ``mirror.get_perf_factor``) 由调用方
+传入, 这里不依赖其他读取模块。
+"""
+
+import functools
+
+import pandas as pd
+
+from .executor import fan_out
+
+# 单次 get_perf_factor 请求最多包含的因子数
+PERF_CHUNK_SIZE: int = 200
+
+GROUP_FIELDS: list[str] = [
+    "Group_01",
+    "Group_02",
+    "Group_03",
+    "Group_04",
+    "Group_05",
+    "Group_06",
+    "Group_07",
+    "Group_08",
+    "Group_09",
+    "Group_10",
+    "LS_Hedge",
+]
+BACKTEST_FIELDS: list[str] = [
+    "strategy_ret",
+    "index_ret",
+    "excess_ret",
+    "holding_num",
+    "turnover",
+    "transaction_fee",
+]
+INDEX_COLUMNS: list[str] = ["date", "factor_name"]
+
+
+def perf_fields(perf_type: str) -> list[str]:
+    """各类表现数据的字段"""
+    return {"ic": ["corr"], "group_pnl": GROUP_FIELDS, "backtest_ret": BACKTEST_FIELDS}[
+        perf_type
+    ]
+
+
+def empty_perf(fields: list[str]) -> pd.DataFrame:
+    """(date, factor_name) 索引的空表现数据"""
+    return pd.DataFrame(
+        index=pd.MultiIndex.from_tuples([], names=INDEX_COLUMNS),
+        columns=fields,
+        dtype="float64",
+    )
+
+
+def fetch_perf_factors(
+    get_perf_factor,
+    perf_type: str,
+    factor_names: list[str],
+    fields: list[str],
+    query: list,
+    start_date: str = None,
+    end_date: str = None,
+    **kwargs,
+) -> pd.DataFrame:
+    """用 ``get_perf_factor`` 批量取多个因子的表现, 按 PERF_CHUNK_SIZE 分块并发请求,
+    索引为 (date, factor_name)"""
+    factor_names = list(factor_names)
+    frames = fan_out(
+        *(
+            functools.partial(
+                get_perf_factor,
+                perf_type=perf_type,
+                factor_names=factor_names[i : i + PERF_CHUNK_SIZE],
+                start_date=start_date,
+                end_date=end_date,
+                fields=fields,
+                index_col=INDEX_COLUMNS,
+                query=query,
+                is_cache=False,
+                **kwargs,
+            )
+            for i in range(0, len(factor_names), PERF_CHUNK_SIZE)
+        )
+    )
+    frames = [df for df in frames if not df.empty]
+    if not frames:
+        return empty_perf(fields)
+    return pd.concat(frames).sort_index()
+
+
+def split_by_factor(
+    perf_df: pd.DataFrame, factor_names: list[str]
+) -> dict[str, pd.DataFrame]:
+    """把 (date, factor_name) 索引的表现数据拆成每个因子一个以 date 为索引的 DataFrame"""
+    groups = {
+        name: df.droplevel("factor_name")
+        for name, df in perf_df.groupby(level="factor_name", sort=False)
+    }
+    empty = pd.DataFrame(
+        index=pd.DatetimeIndex([], name="date"),
+        columns=perf_df.columns,
+        dtype="float64",
+    )
+    return {name: groups.get(name, empty) for name in factor_names}
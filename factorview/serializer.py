@@ -0,0 +1,308 @@
+"""JSON 序列化
+
+按列向量化地把 DataFrame / Index 转成可 JSON 序列化的结构:
+NaN / inf 用 NumPy 掩码转为 ``None``, 日期一次性格式化为 ``%Y-%m-%d``,
+最后用 orjson (未安装时退回标准库 json) 直接输出 bytes。
+输出格式与原先逐元素递归的 ``clean_for_json`` 保持一致。
+
+请求头 ``Accept`` 包含 ``application/vnd.apache.arrow.stream`` 时, 时间序列接口改为
+返回 Arrow IPC 流: 外层表每行一个数据块 (name, orient, data), ``data`` 为该数据块
+的 IPC 流, 其中 ``__index__`` 列为索引, 日期列编码为距 1970-01-01 的天数 (int32)。
+
+流式接口返回 NDJSON, 每行一个数据块 ``{name, values, index}``, 数据块一准备好就发送。
+"""
+
+import datetime
+import json
+import math
+
+import numpy as np
+import pandas as pd
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+from .telemetry import phase
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover
+    pa = None
+
+DATE_FORMAT: str = r"%Y-%m-%d"
+ARROW_MEDIA_TYPE: str = "application/vnd.apache.arrow.stream"
+NDJSON_MEDIA_TYPE: str = "application/x-ndjson"
+
+
+def _format_dates(values) -> list:
+    """日期数组一次性格式化, NaT 转为 None"""
+    values = pd.DatetimeIndex(values)
+    if values.tz is not None:
+        values = values.tz_localize(None)
+    values = values.to_numpy(dtype="datetime64[ns]")
+    out = np.datetime_as_string(values, unit="D").astype(object)
+    out[np.isnat(values)] = None
+    return out.tolist()
+
+
+def _clean_scalar(value):
+    if isinstance(value, np.generic):
+        value = value.item()
+    if value is None or value is pd.NaT:
+        return None
+    if isinstance(value, datetime.date):
+        return value.strftime(DATE_FORMAT)
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _clean_array(values: np.ndarray) -> list:
+    """一维或二维数组转为 list, 缺失值为 None"""
+    kind = values.dtype.kind
+    if kind == "f":
+        mask = ~np.isfinite(values)
+        if not mask.any():
+            return values.tolist()
+        out = values.astype(object)
+        out[mask] = None
+        return out.tolist()
+    if kind in "iub":
+        return values.tolist()
+    if kind == "M":
+        if values.ndim == 1:
+            return _format_dates(values)
+        return [_format_dates(row) for row in values]
+    if kind == "m":
+        values = values.astype(object)
+    # object / 字符串等混合类型逐元素处理
+    if values.ndim == 1:
+        return [_clean_scalar(x) for x in values]
+    return [[_clean_scalar(x) for x in row] for row in values]
+
+
+def _clean_column(values) -> list:
+    if isinstance(values, (pd.Series, pd.Index)):
+        if pd.api.types.is_datetime64_any_dtype(values.dtype):
+            return _format_dates(values)
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(object)
+        values = values.to_numpy()
+    return _clean_array(np.asarray(values))
+
+
+def clean_frame(df: pd.DataFrame) -> dict[str, list]:
+    """DataFrame 按列转为 ``{列名: [值]}``"""
+    return {c: _clean_column(df[c]) for c in df.columns}
+
+
+def clean_rows(df: pd.DataFrame) -> list[list]:
+    """DataFrame 按行转为 ``[[值]]``, 与 ``df.values`` 一致"""
+    if df.shape[1] == 0:
+        return [[] for _ in range(len(df))]
+    values = df.to_numpy()
+    if values.dtype.kind in "fiub":
+        return _clean_array(values)
+    return [list(row) for row in zip(*(_clean_column(df[c]) for c in df.columns))]
+
+
+def clean_records(df: pd.DataFrame) -> dict:
+    """DataFrame 按行转为 ``{索引: {列名: 值}}``"""
+    columns = clean_frame(df)
+    keys = list(columns)
+    rows = zip(*columns.values()) if keys else ([] for _ in range(len(df)))
+    return {
+        name: dict(zip(keys, row)) for name, row in zip(clean_index(df.index), rows)
+    }
+
+
+def clean_index(index: pd.Index) -> list:
+    """Index 转为 list, 日期格式化为字符串"""
+    if isinstance(index, pd.MultiIndex):
+        levels = [
+            _clean_column(index.get_level_values(i)) for i in range(index.nlevels)
+        ]
+        return [list(x) for x in zip(*levels)]
+    return _clean_column(index)
+
+
+def frame_block(df: pd.DataFrame, orient: str = "columns") -> dict:
+    """DataFrame 转为前端使用的 ``{values, index}`` 结构
+
+    ``orient="columns"`` 时 values 为按列的 dict, ``orient="rows"`` 时为按行的 list。
+    """
+    values = clean_rows(df) if orient == "rows" else clean_frame(df)
+    return {"values": values, "index": clean_index(df.index)}
+
+
+def clean_for_json(data):
+    """把任意嵌套结构转为可 JSON 序列化的对象"""
+    if isinstance(data, pd.DataFrame):
+        return clean_frame(data)
+    if isinstance(data, (pd.Index, pd.Series)):
+        return clean_index(data) if isinstance(data, pd.Index) else _clean_column(data)
+    if isinstance(data, np.ndarray):
+        return _clean_array(data)
+    if isinstance(data, (list, tuple)):
+        return [clean_for_json(x) for x in data]
+    if isinstance(data, dict):
+        return {k: clean_for_json(v) for k, v in data.items()}
+    return _clean_scalar(data)
+
+
+def _json_default(obj):
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, pd.Timestamp):
+        return obj.strftime(DATE_FORMAT)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    """序列化为 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(
+            content,
+            default=_json_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        )
+    return json.dumps(
+        content,
+        default=_json_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """使用 orjson 输出的 JSONResponse"""
+
+    def render(self, content) -> bytes:
+        with phase("serialize"):
+            return dumps(content)
+
+
+def _arrow_dates(values) -> "pa.Array":
+    values = pd.DatetimeIndex(values)
+    if values.tz is not None:
+        values = values.tz_localize(None)
+    days = values.to_numpy(dtype="datetime64[D]")
+    return pa.array(days.astype("int64").astype("int32"), mask=np.isnat(days))
+
+
+def _arrow_column(values) -> tuple["pa.Array", bool]:
+    """转为 Arrow 数组, 返回 (数组, 是否为日期)"""
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        return _arrow_dates(values), True
+    if pd.api.types.is_numeric_dtype(values.dtype) and not isinstance(
+        values.dtype, pd.CategoricalDtype
+    ):
+        arr = np.asarray(values, dtype="float64")
+        return pa.array(arr, mask=~np.isfinite(arr)), False
+    return pa.array(_clean_column(values)), False
+
+
+def arrow_block(df: pd.DataFrame) -> bytes:
+    """DataFrame 编码为 Arrow IPC 流, 第一列 ``__index__`` 为索引"""
+    arrays, names, date_columns = [], [], []
+    index = df.index
+    if isinstance(index, pd.MultiIndex):
+        index = pd.Index(clean_index(index)).map(str)
+    columns = [("__index__", index)] + [(str(c), df[c]) for c in df.columns]
+    for name, values in columns:
+        arr, is_date = _arrow_column(values)
+        arrays.append(arr)
+        names.append(name)
+        if is_date:
+            date_columns.append(name)
+    table = pa.Table.from_arrays(
+        arrays,
+        names=names,
+        metadata={"date_columns": json.dumps(date_columns)},
+    )
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _block_orient(orient: str | dict[str, str], name: str) -> str:
+    """``orient`` 为 dict 时按数据块名取值, 未列出的数据块按列"""
+    return orient.get(name, "columns") if isinstance(orient, dict) else orient
+
+
+def arrow_blocks(
+    blocks: dict[str, pd.DataFrame],
+    orient: str | dict[str, str] = "columns",
+    meta: dict = None,
+) -> bytes:
+    """多个数据块编码为一个 Arrow IPC 流, 每行一个数据块, ``meta`` 的各项以 JSON
+    存入表的元数据"""
+    table = pa.table(
+        {
+            "name": pa.array(list(blocks), pa.string()),
+            "orient": pa.array(
+                [_block_orient(orient, name) for name in blocks], pa.string()
+            ),
+            "data": pa.array([arrow_block(df) for df in blocks.values()], pa.binary()),
+        },
+        metadata={key: dumps(value) for key, value in (meta or {}).items()},
+    )
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def accepts_arrow(request: Request) -> bool:
+    return pa is not None and ARROW_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def blocks_response(
+    request: Request,
+    blocks: dict[str, pd.DataFrame],
+    orient: str | dict[str, str] = "columns",
+    meta: dict = None,
+) -> Response:
+    """按 Accept 请求头返回 Arrow IPC 流或 JSON 的 ``{name: {values, index}}``
+
+    ``orient`` 可为 dict, 按数据块名分别指定, 未列出的数据块按列。``meta`` 为数据块
+    之外的附加信息, JSON 中为顶层的键, Arrow 中存入表的元数据。
+    """
+    headers = {"Vary": "Accept"}
+    if accepts_arrow(request):
+        with phase("serialize"):
+            body = arrow_blocks(blocks, orient, meta)
+        return Response(body, media_type=ARROW_MEDIA_TYPE, headers=headers)
+    with phase("serialize"):
+        content = {
+            name: frame_block(df, _block_orient(orient, name))
+            for name, df in blocks.items()
+        }
+        content.update(meta or {})
+    return FastJSONResponse(content, headers=headers)
+
+
+async def _ndjson_lines(items, orient: str, extra):
+    async for name, df in items:
+        with phase("serialize"):
+            line = {"name": name, **frame_block(df, orient)}
+            if extra is not None:
+                line.update(extra(df))
+            data = dumps(line) + b"\n"
+        yield data
+
+
+def ndjson_response(items, orient: str = "columns", extra=None) -> StreamingResponse:
+    """把异步产出的 (名称, DataFrame) 逐行输出为 NDJSON
+
+    ``extra`` 为可选的 ``df -> dict``, 结果合并到该行中。
+    """
+    return StreamingResponse(
+        _ndjson_lines(items, orient, extra), media_type=NDJSON_MEDIA_TYPE
+    )
@@ -0,0 +1,174 @@
+"""全历史序列缓存
+
+``load_factor_perf``、``load_strategy_perf`` 与 ``load_factor_stats_*`` 原先把
+``start_date`` / ``end_date`` 直接传给 ``get_perf_factor``, 页面上每改一次日期都会
+重新查询数据库, IC 还要为滚动均值多取 400 天。
+
+这里按 (perf_type, 因子, 查询条件) 缓存该因子的全部历史: 日期与数值分别存为
+紧凑的 NumPy 数组 (可选 float32), 请求的区间用二分查找切片得到; IC 的 252 日
+滚动均值在全历史上一次算好。缓存沿用 ``cache.ResultCache`` 的内存上限与 LRU 淘汰。
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from .cache import ResultCache
+from .mirror import get_perf_factors
+from .perf_source import perf_fields, split_by_factor
+
+# 序列缓存内存上限 (MB), 0 表示关闭, 关闭时按区间直接查询
+SERIES_CACHE_MAX_MB: float = float(
+    os.environ.get("FACTORVIEW_SERIES_CACHE_MAX_MB", 1024)
+)
+# 过期时间 (秒), 数据每日更新一次
+SERIES_CACHE_TTL: float = float(os.environ.get("FACTORVIEW_SERIES_CACHE_TTL", 3600))
+# 是否以 float32 存储数值, 内存减半, 精度约 7 位有效数字
+SERIES_FLOAT32: bool = os.environ.get("FACTORVIEW_SERIES_FLOAT32", "0") in ("1", "true")
+
+# IC 滚动均值窗口与最少样本数
+IC_ROLL_WINDOW: int = 252
+IC_ROLL_MIN_PERIODS: int = 60
+# 关闭缓存时, 为计算滚动均值向前多取的天数
+IC_WARMUP_DAYS: int = 400
+
+series_cache = ResultCache(int(SERIES_CACHE_MAX_MB * 1024 * 1024), SERIES_CACHE_TTL)
+
+
+def _cache_key(perf_type: str, factor_name: str, query: list) -> tuple:
+    return (f"series_{perf_type}", factor_name, tuple(map(tuple, query)))
+
+
+def _add_ic_roll(df: pd.DataFrame) -> pd.DataFrame:
+    """按因子计算 IC 滚动均值, 索引为 (date, factor_name)"""
+    df["corr_roll"] = (
+        df["corr"]
+        .groupby(level="factor_name", sort=False)
+        .rolling(IC_ROLL_WINDOW, min_periods=IC_ROLL_MIN_PERIODS)
+        .mean()
+        .droplevel(0)
+    )
+    return df
+
+
+def _to_entry(df: pd.DataFrame) -> tuple:
+    """date 索引的 DataFrame 转为 (日期数组, 数值数组, 列名)"""
+    dtype = "float32" if SERIES_FLOAT32 else "float64"
+    dates = pd.DatetimeIndex(df.index).to_numpy(dtype="datetime64[ns]")
+    values = df.to_numpy(dtype=dtype, na_value=np.nan)
+    return dates, values, tuple(df.columns)
+
+
+def _to_datetime64(date) -> np.datetime64:
+    return pd.Timestamp(date).to_datetime64().astype("datetime64[ns]")
+
+
+def _slice_entry(entry: tuple, start_date=None, end_date=None) -> pd.DataFrame:
+    """二分查找取 [start_date, end_date] 区间, 返回 float64 的 DataFrame"""
+    dates, values, columns = entry
+    lo = 0 if start_date is None else np.searchsorted(dates, _to_datetime64(start_date))
+    hi = (
+        len(dates)
+        if end_date is None
+        else np.searchsorted(dates, _to_datetime64(end_date), side="right")
+    )
+    return pd.DataFrame(
+        values[lo:hi].astype("float64", copy=False),
+        index=pd.DatetimeIndex(dates[lo:hi], name="date"),
+        columns=list(columns),
+    )
+
+
+def _load_full(perf_type: str, factor_names: list[str], query: list) -> dict:
+    """批量取全历史并写入缓存, 返回 {因子名: 缓存项}"""
+    generation = series_cache.generation
+    perf_df = get_perf_factors(
+        perf_type=perf_type,
+        factor_names=factor_names,
+        fields=perf_fields(perf_type),
+        query=query,
+    )
+    if perf_type == "ic":
+        perf_df = _add_ic_roll(perf_df)
+    entries = {}
+    for name, df in split_by_factor(perf_df, factor_names).items():
+        entries[name] = _to_entry(df)
+        series_cache.put(
+            _cache_key(perf_type, name, query),
+            entries[name],
+            SERIES_CACHE_TTL,
+            generation=generation,
+        )
+    return entries
+
+
+def _load_window(
+    perf_type: str, factor_names: list[str], query: list, start_date, end_date, **kwargs
+) -> dict[str, pd.DataFrame]:
+    """不使用缓存, 按区间直接查询"""
+    _start = start_date
+    if perf_type == "ic" and start_date is not None:
+        start_date = pd.to_datetime(start_date)
+        _start = start_date - pd.DateOffset(days=IC_WARMUP_DAYS)
+    perf_df = get_perf_factors(
+        perf_type=perf_type,
+        factor_names=factor_names,
+        fields=perf_fields(perf_type),
+        query=query,
+        start_date=_start,
+        end_date=end_date,
+        **kwargs,
+    )
+    if perf_type == "ic":
+        perf_df = _add_ic_roll(perf_df)
+        if start_date is not None:
+            perf_df = perf_df[perf_df.index.get_level_values("date") >= start_date]
+    return split_by_factor(perf_df, factor_names)
+
+
+def get_perf_series(
+    perf_type: str,
+    factor_names: list[str],
+    query: list,
+    start_date: str = None,
+    end_date: str = None,
+    **kwargs,
+) -> dict[str, pd.DataFrame]:
+    """取多个因子 [start_date, end_date] 区间的表现, 返回 {因子名: date 索引的 DataFrame}
+
+    IC 数据包含 ``corr`` 与 ``corr_roll`` 两列, 其余为 ``perf_type`` 的全部字段。
+    未缓存的因子一次批量查询全历史; 传入额外查询参数时不使用缓存。
+    """
+    factor_names = list(factor_names)
+    if series_cache.max_bytes <= 0 or kwargs:
+        return _load_window(
+            perf_type, factor_names, query, start_date, end_date, **kwargs
+        )
+
+    entries, missing = {}, []
+    for name in factor_names:
+        hit, entry = series_cache.get(_cache_key(perf_type, name, query))
+        if hit:
+            entries[name] = entry
+        else:
+            missing.append(name)
+    if missing:
+        entries.update(_load_full(perf_type, missing, query))
+    return {
+        name: _slice_entry(entries[name], start_date, end_date) for name in factor_names
+    }
+
+
+def prefetch_series(perf_type: str, factor_names: list[str], query: list) -> int:
+    """把未缓存因子的全历史一次批量读入缓存, 返回读取的因子数; 关闭缓存时不读取"""
+    if series_cache.max_bytes <= 0:
+        return 0
+    missing = [
+        name
+        for name in factor_names
+        if not series_cache.get(_cache_key(perf_type, name, query))[0]
+    ]
+    if missing:
+        _load_full(perf_type, missing, query)
+    return len(missing)
@@ -0,0 +1,230 @@
+"""因子统计快照
+
+``load_factor_stats`` 的汇总表 (因子信息、IC、分组、回测、日期范围) 在默认参数下
+日内几乎不变。这里提供一个命令行任务, 按配置的 (pool, optimizer_index,
+benchmark_index, 日期窗口) 组合预先计算汇总表并写成 Parquet 快照;
+``load_factor_stats`` 遇到匹配的参数时直接读取快照, 其余临时窗口仍实时计算。
+
+用法::
+
+    # 默认组合: pool=all, 指数 000905.SH, 全历史
+    python -m factorview.snapshot build
+    # 指定组合, 窗口可为 all / ytd / 1y / 3y / 5y 或 起始日:结束日
+    python -m factorview.snapshot build --pools all hs300 --windows all 1y 3y
+    # 从 JSON 配置读取组合列表
+    python -m factorview.snapshot build --config snapshots.json
+    python -m factorview.snapshot list
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+# 快照目录
+SNAPSHOT_DIR: str = os.environ.get("FACTORVIEW_SNAPSHOT_DIR", "snapshots")
+# 快照最长有效时间 (小时), 超过后不再使用
+SNAPSHOT_MAX_AGE: float = float(os.environ.get("FACTORVIEW_SNAPSHOT_MAX_AGE", 36))
+
+SNAPSHOT_FRAMES: list[str] = ["factor_info", "ic", "group", "backtest_ret", "date"]
+
+_loaded: dict[str, tuple[float, tuple]] = {}
+_lock = threading.Lock()
+
+
+def _normalize_date(date) -> str | None:
+    return None if date in (None, "") else pd.Timestamp(date).strftime("%Y-%m-%d")
+
+
+def snapshot_params(
+    start_date: str = None,
+    end_date: str = None,
+    pool: str = "all",
+    optimizer_index: str = "000905.SH",
+    benchmark_index: str = "000905.SH",
+) -> dict:
+    """规范化的快照参数"""
+    return {
+        "start_date": _normalize_date(start_date),
+        "end_date": _normalize_date(end_date),
+        "pool": pool,
+        "optimizer_index": optimizer_index,
+        "benchmark_index": benchmark_index,
+    }
+
+
+def snapshot_id(**params) -> str:
+    """由快照参数生成目录名"""
+    params = snapshot_params(**params)
+    digest = hashlib.md5(
+        json.dumps(params, sort_keys=True).encode("utf-8")
+    ).hexdigest()[:8]
+    window = f"{params['start_date'] or 'all'}_{params['end_date'] or 'all'}"
+    return f"{params['pool']}_{params['optimizer_index']}_{window}_{digest}"
+
+
+def window_dates(window: str, today: pd.Timestamp = None) -> tuple:
+    """窗口名转为 (start_date, end_date), 与前端 Filter 的区间口径一致"""
+    today = pd.Timestamp.today().normalize() if today is None else today
+    if window == "all":
+        return None, None
+    if window == "ytd":
+        return pd.Timestamp(today.year, 1, 1), today
+    if window == "3m":
+        return today - pd.DateOffset(months=3), today
+    if window.endswith("y") and window[:-1].isdigit():
+        return today - pd.DateOffset(years=int(window[:-1])), today
+    start, _, end = window.partition(":")
+    return start or None, end or None
+
+
+def write_snapshot(factor_stats: tuple, directory: str = None, **params) -> str:
+    """把 load_factor_stats 的结果写入快照目录, 返回快照路径"""
+    directory = SNAPSHOT_DIR if directory is None else directory
+    params = snapshot_params(**params)
+    path = os.path.join(directory, snapshot_id(**params))
+    os.makedirs(directory, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=directory, prefix=".tmp_")
+    try:
+        for name, df in zip(SNAPSHOT_FRAMES, factor_stats):
+            df.to_parquet(os.path.join(tmp, f"{name}.parquet"))
+        manifest = {
+            "params": params,
+            "created_at": time.time(),
+            "factor_num": len(factor_stats[0]),
+        }
+        with open(os.path.join(tmp, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            shutil.rmtree(tmp)
+    return path
+
+
+def read_snapshot(**params) -> tuple | None:
+    """读取与参数匹配且未过期的快照, 没有则返回 None"""
+    path = os.path.join(SNAPSHOT_DIR, snapshot_id(**params))
+    manifest_path = os.path.join(path, "manifest.json")
+    try:
+        mtime = os.path.getmtime(manifest_path)
+    except OSError:
+        return None
+    if time.time() - mtime > SNAPSHOT_MAX_AGE * 3600:
+        return None
+    with _lock:
+        loaded = _loaded.get(path)
+        if loaded is not None and loaded[0] == mtime:
+            return loaded[1]
+    frames = tuple(
+        pd.read_parquet(os.path.join(path, f"{name}.parquet"))
+        for name in SNAPSHOT_FRAMES
+    )
+    with _lock:
+        _loaded[path] = (mtime, frames)
+    return frames
+
+
+def subset_snapshot(frames: tuple, factor_names: list[str] = None) -> tuple:
+    """从全量快照中取指定因子, 因子顺序与快照一致"""
+    if factor_names is None:
+        return frames
+    if isinstance(factor_names, str):
+        factor_names = [factor_names]
+    wanted = set(factor_names)
+    index = frames[0].index
+    names = index[index.isin(wanted)]
+    return tuple(df.reindex(names) for df in frames)
+
+
+def build_snapshots(combos: list[dict], directory: str = None) -> list[dict]:
+    """按组合列表实时计算并写入快照, 返回各快照的 ``{path, factor_num, seconds}``"""
+    from .data_loader import compute_factor_stats
+
+    res = []
+    for combo in combos:
+        combo = dict(combo)
+        window = combo.pop("window", None)
+        if window is not None:
+            combo["start_date"], combo["end_date"] = window_dates(window)
+        params = snapshot_params(**combo)
+        start = time.perf_counter()
+        factor_stats = compute_factor_stats(**params)
+        path = write_snapshot(factor_stats, directory=directory, **params)
+        res.append(
+            {
+                "path": path,
+                "factor_num": len(factor_stats[0]),
+                "seconds": time.perf_counter() - start,
+            }
+        )
+    return res
+
+
+def list_snapshots(directory: str = None) -> list[dict]:
+    directory = SNAPSHOT_DIR if directory is None else directory
+    if not os.path.isdir(directory):
+        return []
+    res = []
+    for name in sorted(os.listdir(directory)):
+        manifest_path = os.path.join(directory, name, "manifest.json")
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding="utf-8") as f:
+                res.append({"id": name, **json.load(f)})
+    return res
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description="因子统计快照")
+    parser.add_argument("--dir", default=None, help="快照目录")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="计算并写入快照")
+    build.add_argument("--config", help="JSON 配置文件, 内容为组合参数列表")
+    build.add_argument("--pools", nargs="+", default=["all"])
+    build.add_argument("--optimizer-indexs", nargs="+", default=["000905.SH"])
+    build.add_argument("--benchmark-indexs", nargs="+", default=None)
+    build.add_argument("--windows", nargs="+", default=["all"])
+
+    sub.add_parser("list", help="列出已有快照")
+
+    args = parser.parse_args(argv)
+    if args.command == "list":
+        for item in list_snapshots(args.dir):
+            created = pd.Timestamp(item["created_at"], unit="s").strftime(
+                "%Y-%m-%d %H:%M"
+            )
+            print(f"{item['id']}  {item['factor_num']} 个因子  {created}")
+        return
+
+    if args.config:
+        with open(args.config, encoding="utf-8") as f:
+            combos = json.load(f)
+    else:
+        combos = [
+            {
+                "pool": pool,
+                "optimizer_index": optimizer_index,
+                # 未指定基准时与优化指数相同
+                "benchmark_index": benchmark_index,
+                "window": window,
+            }
+            for pool in args.pools
+            for optimizer_index in args.optimizer_indexs
+            for benchmark_index in (args.benchmark_indexs or [optimizer_index])
+            for window in args.windows
+        ]
+    for item in build_snapshots(combos, directory=args.dir):
+        print(f"{item['path']}: {item['factor_num']} 个因子, {item['seconds']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+"""数据源
+
+各模块统一从这里取 ``quantfactor`` 的数据源对象。``FactorManagerAll`` 只在这里用
+``instrument_fetch`` 包装一次, 其调用耗时计入请求的 ``fetch`` 阶段 (见
+``telemetry``)。
+"""
+
+from quantfactor import FactorManagerAll, stock_calendar
+
+from .telemetry import instrument_fetch
+
+FactorManagerAll = instrument_fetch(FactorManagerAll)
+
+__all__ = ["FactorManagerAll", "stock_calendar"]
@@ -0,0 +1,101 @@
+"""因子统计表的服务端排序、筛选与分页
+
+``/api/factor/stats`` 的结果由 5 张以因子名为索引的表组成 (因子信息、IC、分组、
+回测、日期范围)。这里在缓存的全量结果上按任意一列排序、按数值范围筛选后只取
+请求的一页, 前端不必再拿到全部因子。
+
+列名在 5 张表中按顺序查找, 也可以写成 ``表名.列名`` (如 ``backtest_ret.turnover``);
+``start_date`` / ``end_date`` 为日期范围表的 ``min`` / ``max``, ``factor_name`` 为因子名。
+筛选条件形如 ``icir>0.5``、``sharpe_ratio>=1``、``class_name==量价``。
+"""
+
+import operator
+import re
+
+import numpy as np
+import pandas as pd
+
+STATS_FRAMES: list[str] = ["factor_info", "ic", "group", "backtest_ret", "date"]
+
+COLUMN_ALIASES: dict[str, str] = {
+    "start_date": "date.min",
+    "end_date": "date.max",
+}
+
+_OPERATORS = {
+    ">=": operator.ge,
+    "<=": operator.le,
+    "!=": operator.ne,
+    "==": operator.eq,
+    "=": operator.eq,
+    ">": operator.gt,
+    "<": operator.lt,
+}
+_FILTER_PATTERN = re.compile(r"^\s*([\w.]+)\s*(>=|<=|!=|==|=|>|<)\s*(.+?)\s*$")
+
+
+def stats_column(factor_stats: tuple, column: str) -> pd.Series:
+    """按列名取出以因子名为索引的一列, 找不到时抛出 ``ValueError``"""
+    frames = dict(zip(STATS_FRAMES, factor_stats))
+    index = frames["factor_info"].index
+    column = COLUMN_ALIASES.get(column, column)
+    if column in ("factor_name", index.name):
+        return pd.Series(index, index=index)
+    frame_name, _, name = column.rpartition(".")
+    candidates = [frames[frame_name]] if frame_name in frames else frames.values()
+    for df in candidates:
+        if name in df.columns:
+            return df[name].reindex(index)
+    raise ValueError(f"未知的列: {column}")
+
+
+def parse_filter(expr: str) -> tuple[str, str, object]:
+    """解析 ``列名 运算符 值``, 值能转为数字时按数字比较"""
+    match = _FILTER_PATTERN.match(expr)
+    if match is None:
+        raise ValueError(f"无法解析的筛选条件: {expr}")
+    column, op, value = match.groups()
+    try:
+        value = float(value)
+    except ValueError:
+        value = value.strip("'\"")
+    return column, op, value
+
+
+def _compare(series: pd.Series, op: str, value) -> np.ndarray:
+    if isinstance(value, float):
+        series = pd.to_numeric(series, errors="coerce")
+    elif pd.api.types.is_datetime64_any_dtype(series.dtype):
+        value = pd.Timestamp(value)
+    # 缺失值不满足任何条件
+    return (_OPERATORS[op](series, value) & series.notna()).to_numpy(dtype=bool)
+
+
+def query_factor_stats(
+    factor_stats: tuple,
+    sort_by: str = None,
+    ascending: bool = True,
+    limit: int = None,
+    offset: int = 0,
+    filters: list[str] = None,
+) -> tuple[int, tuple]:
+    """筛选、排序并分页, 返回 ``(筛选后的因子总数, 当前页的 5 张表)``"""
+    index = factor_stats[0].index
+    mask = np.ones(len(index), dtype=bool)
+    for expr in filters or []:
+        column, op, value = parse_filter(expr)
+        mask &= _compare(stats_column(factor_stats, column), op, value)
+    names = index[mask]
+
+    if sort_by:
+        key = stats_column(factor_stats, sort_by).reindex(names)
+        # 稳定排序, 缺失值排在最后
+        order = key.reset_index(drop=True).sort_values(
+            ascending=ascending, kind="mergesort", na_position="last"
+        )
+        names = names[order.index.to_numpy()]
+
+    total = len(names)
+    stop = None if limit is None else offset + limit
+    names = names[offset:stop]
+    return total, tuple(df.reindex(names) for df in factor_stats)
@@ -0,0 +1,143 @@
+"""因子最新更新状态索引
+
+``/api/factor/update`` 原先每次从 2018 年起读取全部因子的全部状态记录, 再按因子
+取最后一条, 耗时随历史增长。这里维护每个因子的最新状态:
+
+- 首次从 ``STATUS_START_DATE`` 起全量读取, 之后只读取水位线 (索引中最大的
+  ``end_date``) 往前 ``STATUS_LOOKBACK_DAYS`` 天以来的状态记录并入索引; 读取
+  窗口是全部历史的后缀, 按列取最后一个非空值与全量 ``groupby().last()`` 一致
+- 索引保存为 ``{FACTORVIEW_STATE_DIR}/factor_status.parquet``, 重启后继续增量刷新
+- 进程内的索引超过 ``FACTORVIEW_STATUS_REFRESH`` 秒后在下一次请求时刷新
+
+返回时附加 ``days_since_update`` (最新数据日期距今天数) 与 ``is_stale`` (落后于
+全部因子中最新数据日期超过 ``FACTORVIEW_STATUS_STALE_DAYS`` 天)。
+
+用法::
+
+    python -m factorview.status_index refresh
+    python -m factorview.status_index refresh --rebuild   # 历史状态被改写后重建
+"""
+
+import argparse
+import os
+import threading
+import time
+
+import pandas as pd
+
+from .incremental import STATE_DIR, STATUS_LOOKBACK_DAYS
+from .source import FactorManagerAll, stock_calendar
+
+# 进程内索引的刷新间隔 (秒)
+STATUS_REFRESH: float = float(os.environ.get("FACTORVIEW_STATUS_REFRESH", 300))
+# 落后于最新数据日期超过该天数视为未更新
+STATUS_STALE_DAYS: int = int(os.environ.get("FACTORVIEW_STATUS_STALE_DAYS", 0))
+# 首次建立索引时读取的起始日期
+STATUS_START_DATE: str = "2018-01-01"
+
+_index: pd.DataFrame | None = None
+_refreshed_at: float = 0.0
+# mark_stale 的调用次数, 刷新期间被标记过期时刷新结束后仍保持过期
+_stale_marks: int = 0
+_lock = threading.Lock()
+# 同一时间只有一个线程刷新, 刷新 (读取数据库) 期间不持有 _lock
+_refresh_lock = threading.Lock()
+
+
+def status_path() -> str:
+    return os.path.join(STATE_DIR, "factor_status.parquet")
+
+
+def _latest(frames: list[pd.DataFrame]) -> pd.DataFrame:
+    """按因子取每列最后一个非空值, 索引为 factor_name"""
+    return pd.concat(frames, ignore_index=True).groupby("factor_name").last()
+
+
+def refresh_status_index(rebuild: bool = False) -> pd.DataFrame:
+    """读取水位线之后的状态记录并入索引并保存"""
+    path = status_path()
+    index = None
+    if not rebuild and os.path.exists(path):
+        index = pd.read_parquet(path)
+
+    if index is None or index.empty:
+        start_date = STATUS_START_DATE
+    else:
+        watermark = pd.to_datetime(index["end_date"]).max()
+        start_date = watermark - pd.Timedelta(days=STATUS_LOOKBACK_DAYS)
+    status = FactorManagerAll.get_date_status_factor(
+        start_date=start_date, end_date=stock_calendar.get_shift_date("today", -1)
+    )
+    if status.empty:
+        return index if index is not None else status.groupby("factor_name").last()
+
+    frames = [status] if index is None else [index.reset_index(), status]
+    index = _latest(frames)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.tmp")
+    index.to_parquet(tmp)
+    os.replace(tmp, path)
+    return index
+
+
+def _fresh_index() -> tuple[pd.DataFrame | None, bool, int]:
+    with _lock:
+        fresh = time.monotonic() - _refreshed_at <= STATUS_REFRESH
+        return _index, _index is not None and fresh, _stale_marks
+
+
+def latest_status() -> pd.DataFrame:
+    """取最新状态索引, 超过刷新间隔时先增量刷新"""
+    global _index, _refreshed_at
+    index, fresh, _ = _fresh_index()
+    if fresh:
+        return index
+    with _refresh_lock:
+        # 等待期间其他线程可能已完成刷新
+        index, fresh, marks = _fresh_index()
+        if fresh:
+            return index
+        try:
+            index = refresh_status_index()
+        except Exception:
+            # 刷新失败时继续使用已有索引
+            if index is None:
+                raise
+        with _lock:
+            _index = index
+            if _stale_marks == marks:
+                _refreshed_at = time.monotonic()
+        return index
+
+
+def mark_stale():
+    """下一次取索引时先刷新"""
+    global _refreshed_at, _stale_marks
+    with _lock:
+        _refreshed_at = float("-inf")
+        _stale_marks += 1
+
+
+def with_staleness(status: pd.DataFrame) -> pd.DataFrame:
+    """附加距今天数与是否落后于最新数据日期"""
+    status = status.copy()
+    end_date = pd.to_datetime(status["end_date"])
+    today = pd.Timestamp.today().normalize()
+    status["days_since_update"] = (today - end_date).dt.days
+    status["is_stale"] = (end_date.max() - end_date).dt.days > STATUS_STALE_DAYS
+    return status
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description="因子最新更新状态索引")
+    sub = parser.add_subparsers(dest="command", required=True)
+    refresh = sub.add_parser("refresh", help="增量刷新索引")
+    refresh.add_argument("--rebuild", action="store_true", help="从头全量重建")
+    args = parser.parse_args(argv)
+
+    index = refresh_status_index(rebuild=args.rebuild)
+    print(f"{status_path()}: {len(index)} 个因子")
+
+
+if __name__ == "__main__":
+    main()
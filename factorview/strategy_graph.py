@@ -0,0 +1,87 @@
+"""策略与源因子关系图
+
+``/api/strategy/{name}/factors`` 原先每次请求都查询策略信息与组合因子的源因子。
+这里一次取出全部策略, 并发查询各组合因子的源因子, 得到
+
+- ``strategies``: 策略 → 组合因子
+- ``sources``: 组合因子 → 源因子
+- ``users``: 因子 (源因子或组合因子) → 使用它的策略, 供反查
+
+关系图缓存在 ``result_cache`` 中 (``strategy_graph``, 默认 1 小时), 过期后下一次
+请求时重建; ``DELETE /api/admin/cache?name=strategy_graph`` 可立即刷新。关系图
+记录建立时间 ``built_at``, 依赖关系图的接口的 ETag 包含该时间。
+"""
+
+import functools
+import time
+
+
+from .cache import cached
+from .executor import fan_out
+from .source import FactorManagerAll
+
+
+@cached("strategy_graph")
+def load_strategy_graph() -> dict:
+    """取全部策略的 策略 → 组合因子 → 源因子 关系图与 因子 → 策略 反查表"""
+    built_at = time.time()
+    strategy_info = FactorManagerAll.get_info_strategy()
+    if strategy_info.empty:
+        return {"strategies": {}, "sources": {}, "users": {}, "built_at": built_at}
+    strategies = (
+        strategy_info.drop_duplicates("strategy_name")
+        .set_index("strategy_name")["factor_name"]
+        .to_dict()
+    )
+    combine_names = sorted(set(strategies.values()))
+    sources = dict(
+        zip(
+            combine_names,
+            fan_out(
+                *(
+                    functools.partial(
+                        FactorManagerAll.get_source_factors, name, is_return_list=True
+                    )
+                    for name in combine_names
+                )
+            ),
+        )
+    )
+    users: dict[str, list[str]] = {}
+    for strategy_name, combine_name in strategies.items():
+        for factor_name in [combine_name, *sources[combine_name]]:
+            users.setdefault(factor_name, []).append(strategy_name)
+    return {
+        "strategies": strategies,
+        "sources": {name: list(factors) for name, factors in sources.items()},
+        "users": users,
+        "built_at": built_at,
+    }
+
+
+def graph_built_at() -> float | None:
+    """缓存中关系图的建立时间, 未建立或已过期时为 None, 不触发重建"""
+    hit, graph = load_strategy_graph.cache_lookup()
+    return graph["built_at"] if hit else None
+
+
+def strategy_sources(strategy_name: str) -> list[str]:
+    """取策略的源因子, 关系图建立之后新增的策略直接查询"""
+    graph = load_strategy_graph()
+    combine_name = graph["strategies"].get(strategy_name)
+    if combine_name is not None:
+        return list(graph["sources"][combine_name])
+
+    strategy_info = FactorManagerAll.get_info_strategy(strategy_names=strategy_name)
+    if strategy_info.empty:
+        raise ValueError(f"策略 {strategy_name} 不存在")
+    return list(
+        FactorManagerAll.get_source_factors(
+            strategy_info.iloc[0]["factor_name"], is_return_list=True
+        )
+    )
+
+
+def factor_strategies(factor_name: str) -> list[str]:
+    """取使用该因子 (作为源因子或组合因子) 的策略"""
+    return list(load_strategy_graph()["users"].get(factor_name, []))
@@ -0,0 +1,140 @@
+"""序列汇总统计
+
+``summary=true`` 时由服务端计算前端统计表 (``BacktestStatsTable``、
+``GroupStatsTable``、``ICTables``、``FactorStatsICTable``) 展示的指标, 口径与
+前端原有实现保持一致:
+
+- 缺失值按 0 处理 (前端 ``null`` 参与运算即为 0), 天数包含缺失日
+- 净值从 1 开始, 年化收益 = (1 + 累计收益) ** (252 / 天数) - 1
+- 年化波动 = sqrt(252) * sqrt(mean(r ** 2))
+- 最大回撤包含初始净值 1, 为非正数
+- 夏普 = 年化收益 / 年化波动, 卡玛 = 年化收益 / |最大回撤|, 分母为 0 时为 0
+- IC 标准差为总体标准差, t 值 = 均值 / (标准差 / sqrt(天数))
+- 年数 = (最后日期 - 第一个日期) / 365 天, 年换手、年费用为合计 / 年数
+
+与 ``batch_metrics`` (对齐 ``quantfactor.p`` 的口径) 不同, 这里只服务于页面展示。
+"""
+
+import numpy as np
+import pandas as pd
+
+ANNUAL_DAYS: int = 252
+
+# 多因子接口中汇总表的键, 与因子名区分
+SUMMARY_BLOCK: str = "__summary__"
+# 回测中的收益列, 其余为持仓、换手、费用
+RETURN_COLUMNS: list[str] = ["strategy_ret", "index_ret", "excess_ret"]
+
+
+def _ratio(num: np.ndarray, den: np.ndarray) -> np.ndarray:
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(den != 0, num / den, 0.0)
+
+
+def _date_range(index: pd.Index) -> dict:
+    dates = pd.to_datetime(index)
+    return {
+        "start_date": dates[0].strftime("%Y-%m-%d"),
+        "end_date": dates[-1].strftime("%Y-%m-%d"),
+        "total_years": (dates[-1] - dates[0]).days / 365,
+    }
+
+
+def perf_summary(returns: pd.DataFrame) -> pd.DataFrame:
+    """每列日收益的累计收益、年化收益、年化波动、最大回撤、夏普与卡玛"""
+    columns = [
+        "start_date",
+        "end_date",
+        "total_years",
+        "cumulative_return",
+        "annualized_return",
+        "annualized_volatility",
+        "max_drawdown",
+        "sharpe_ratio",
+        "calmar_ratio",
+    ]
+    if returns.empty:
+        return pd.DataFrame(columns=columns, index=returns.columns)
+    values = np.nan_to_num(returns.to_numpy(dtype="float64", na_value=np.nan))
+    n = len(values)
+    nav = np.cumprod(1.0 + values, axis=0)
+    peak = np.maximum.accumulate(np.vstack([np.ones(values.shape[1]), nav]), axis=0)
+    max_drawdown = np.minimum((nav / peak[1:] - 1.0).min(axis=0), 0.0)
+    cumulative = nav[-1] - 1.0
+    annualized = (1.0 + cumulative) ** (ANNUAL_DAYS / n) - 1.0
+    volatility = np.sqrt(ANNUAL_DAYS) * np.sqrt((values**2).mean(axis=0))
+    res = pd.DataFrame(
+        {
+            "cumulative_return": cumulative,
+            "annualized_return": annualized,
+            "annualized_volatility": volatility,
+            "max_drawdown": max_drawdown,
+            "sharpe_ratio": _ratio(annualized, volatility),
+            "calmar_ratio": _ratio(annualized, np.abs(max_drawdown)),
+        },
+        index=returns.columns,
+    )
+    for key, value in _date_range(returns.index).items():
+        res[key] = value
+    return res[columns]
+
+
+def backtest_summary(backtest: pd.DataFrame) -> pd.DataFrame:
+    """回测收益列的绩效, 附带平均持仓、年换手与年费用"""
+    res = perf_summary(backtest[RETURN_COLUMNS])
+    if backtest.empty:
+        return res.assign(
+            avg_position=np.nan, annual_turnover=np.nan, annual_fee=np.nan
+        )
+    totals = backtest[["holding_num", "turnover", "transaction_fee"]].fillna(0)
+    total_years = res["total_years"].iloc[0]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        res["avg_position"] = totals["holding_num"].mean()
+        res["annual_turnover"] = totals["turnover"].sum() / total_years
+        res["annual_fee"] = totals["transaction_fee"].sum() / total_years
+    return res
+
+
+def ic_summary(ic: pd.DataFrame | pd.Series) -> pd.Series:
+    """IC 均值、ICIR、t 值与正 IC 比率, ``DataFrame`` 取 ``corr`` 列"""
+    corr = ic["corr"] if isinstance(ic, pd.DataFrame) else ic
+    if corr.empty:
+        return pd.Series(dtype="object")
+    values = np.nan_to_num(corr.to_numpy(dtype="float64", na_value=np.nan))
+    n = len(values)
+    mean = values.mean()
+    std = values.std()
+    date_range = _date_range(corr.index)
+    return pd.Series(
+        {
+            "start_date": date_range["start_date"],
+            "end_date": date_range["end_date"],
+            "period": n,
+            "ic": mean,
+            "icir": mean / std if std != 0 else 0.0,
+            "t_value": mean / (std / np.sqrt(n)) if std != 0 else 0.0,
+            "positive_ratio": (values > 0).mean(),
+        }
+    )
+
+
+def ic_summary_table(ic_dict: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """多个因子的 IC 汇总, 行为因子"""
+    rows = {name: ic_summary(df) for name, df in ic_dict.items() if not df.empty}
+    res = pd.DataFrame.from_dict(rows, orient="index")
+    res.index.name = "factor_name"
+    return res
+
+
+def summary_blocks(blocks: dict[str, pd.DataFrame]) -> dict[str, pd.DataFrame]:
+    """单个因子/策略各数据块的汇总, 键为 ``{name}_summary``"""
+    res = {}
+    for name, df in blocks.items():
+        if name == "ic":
+            summary = pd.DataFrame([ic_summary(df)], index=["corr"]).infer_objects()
+        elif name == "backtest_ret":
+            summary = backtest_summary(df)
+        else:
+            summary = perf_summary(df)
+        res[f"{name}_summary"] = summary
+    return res
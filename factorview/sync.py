@@ -0,0 +1,65 @@
+"""序列增量同步
+
+``/api/factor/{name}`` 与 ``/api/strategy/{name}`` 的页面常驻打开, 每次刷新都重新
+下载全部历史。带 ``since`` 参数时只返回日期晚于 ``since`` 的行:
+
+- ``since`` 可为日期, 或上一次响应中 ``sync.version`` 给出的版本号
+  ``{最新日期}.{摘要}``, 摘要由各数据块截至该日期的全部行计算; 为空时返回全部行
+  与版本号, 供客户端首次建立缓存
+- 传入版本号时, 服务端重新计算截至该日期的摘要, 与版本号不一致 (历史数据被补数
+  或改写) 时返回全部行并置 ``full_resync``, 客户端应整体替换本地缓存
+- 汇总统计 (``summary``) 总是由全量数据计算
+"""
+
+import numpy as np
+import pandas as pd
+
+VERSION_SEPARATOR: str = "."
+
+
+def _last_date(blocks: dict[str, pd.DataFrame]) -> pd.Timestamp | None:
+    dates = [df.index.max() for df in blocks.values() if len(df)]
+    return max(dates) if dates else None
+
+
+def _digest(blocks: dict[str, pd.DataFrame], until: pd.Timestamp) -> str:
+    """各数据块截至 ``until`` (含) 的全部行的摘要"""
+    total = 0
+    for name in sorted(blocks):
+        df = blocks[name]
+        rows = df[df.index <= until]
+        hashed = pd.util.hash_pandas_object(rows, index=True).to_numpy()
+        # 数据块名参与摘要, 不同数据块的相同行不会相互抵消
+        salt = pd.util.hash_array(np.array([name], dtype=object))[0]
+        total += int(hashed.sum(dtype=np.uint64) ^ salt)
+    return f"{total & 0xFFFFFFFF:08x}"
+
+
+def series_version(blocks: dict[str, pd.DataFrame]) -> str | None:
+    """当前数据的版本号, 无数据时为 None"""
+    last_date = _last_date(blocks)
+    if last_date is None:
+        return None
+    return f"{last_date:%Y-%m-%d}{VERSION_SEPARATOR}{_digest(blocks, last_date)}"
+
+
+def parse_since(since: str) -> tuple[pd.Timestamp, str | None]:
+    """解析日期或版本号, 返回 (日期, 摘要 | None), 格式错误时抛出 ValueError"""
+    date, _, digest = since.partition(VERSION_SEPARATOR)
+    try:
+        return pd.Timestamp(date), digest or None
+    except (TypeError, ValueError):
+        raise ValueError(f"无法解析 since: {since}") from None
+
+
+def delta_blocks(
+    blocks: dict[str, pd.DataFrame], since: str
+) -> tuple[dict[str, pd.DataFrame], dict]:
+    """取 ``since`` 之后的行, 返回 (数据块, 同步信息)"""
+    if not since:
+        return blocks, {"full_resync": True}
+    since_date, digest = parse_since(since)
+    full_resync = digest is not None and digest != _digest(blocks, since_date)
+    if not full_resync:
+        blocks = {name: df[df.index > since_date] for name, df in blocks.items()}
+    return blocks, {"full_resync": full_resync}
@@ -0,0 +1,229 @@
+"""请求分阶段耗时统计
+
+记录每个接口在以下阶段的耗时, 以及数据源返回的行数与响应字节数:
+
+- ``fetch``: 调用数据源 (``FactorManagerAll``) 的时间, 并发调用时为累计值
+- ``compute``: 加载函数除数据源调用以外的时间 (含排队等待)
+- ``serialize``: JSON / Arrow 序列化
+- ``total``: 整个请求
+
+统计结果以 Prometheus 文本格式的直方图通过 ``/metrics`` 提供, 同时写入响应头
+``Server-Timing``, 浏览器开发者工具中可直接查看。``FACTORVIEW_METRICS=0`` 时
+不安装中间件, 各埋点只做一次 contextvar 读取。
+"""
+
+import bisect
+import contextlib
+import contextvars
+import functools
+import os
+import threading
+import time
+
+import pandas as pd
+from starlette.datastructures import MutableHeaders
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# 是否启用统计
+METRICS_ENABLED: bool = os.environ.get("FACTORVIEW_METRICS", "1") not in ("0", "false")
+
+SECONDS_BUCKETS: list[float] = [
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60,
+]  # fmt: skip
+BYTES_BUCKETS: list[float] = [
+    1e3, 1e4, 1e5, 1e6, 5e6, 1e7, 5e7, 1e8,
+]  # fmt: skip
+ROWS_BUCKETS: list[float] = [
+    10, 100, 1e3, 1e4, 1e5, 1e6, 1e7,
+]  # fmt: skip
+
+PHASES: list[str] = ["fetch", "compute", "serialize", "total"]
+
+# 当前请求的统计, 线程池中执行时随 contextvars 一同复制, 指向同一个 dict
+_current: contextvars.ContextVar[dict | None] = contextvars.ContextVar(
+    "factorview_timing", default=None
+)
+_NOOP = contextlib.nullcontext()
+
+
+class Histogram:
+    """按标签分组的累积直方图"""
+
+    def __init__(self, name: str, help: str, buckets: list[float], labels: tuple):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.labels = labels
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            if i < len(self.buckets):
+                series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted(self._series.items())
+        for label_values, (counts, total, count) in items:
+            labels = ",".join(f'{k}="{v}"' for k, v in zip(self.labels, label_values))
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(
+                    f'{self.name}_bucket{{{labels},le="{bound:g}"}} {cumulative}'
+                )
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total:g}")
+            lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return lines
+
+
+phase_seconds = Histogram(
+    "factorview_phase_seconds",
+    "Request time spent per phase",
+    SECONDS_BUCKETS,
+    ("route", "phase"),
+)
+response_bytes = Histogram(
+    "factorview_response_bytes", "Response body size", BYTES_BUCKETS, ("route",)
+)
+fetched_rows = Histogram(
+    "factorview_fetched_rows",
+    "Rows returned by the data source",
+    ROWS_BUCKETS,
+    ("route",),
+)
+
+
+@contextlib.contextmanager
+def _timed(timing: dict, name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        with timing["lock"]:
+            timing[name] = timing.get(name, 0.0) + elapsed
+
+
+def phase(name: str):
+    """统计当前请求某一阶段的耗时, 不在请求中或未启用时不做任何事"""
+    timing = _current.get()
+    return _NOOP if timing is None else _timed(timing, name)
+
+
+def add_rows(result):
+    """累计数据源返回的行数"""
+    timing = _current.get()
+    if timing is not None and isinstance(result, (pd.DataFrame, pd.Series)):
+        with timing["lock"]:
+            timing["rows"] = timing.get("rows", 0) + len(result)
+
+
+class _FetchProxy:
+    """代理数据源对象, 统计每次方法调用的耗时与返回行数"""
+
+    def __init__(self, target):
+        self._target = target
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def call(*args, **kwargs):
+            with phase("fetch"):
+                result = attr(*args, **kwargs)
+            add_rows(result)
+            return result
+
+        return call
+
+
+def instrument_fetch(target):
+    """包装数据源对象, 未启用统计时原样返回"""
+    return _FetchProxy(target) if METRICS_ENABLED else target
+
+
+def _route_name(scope: Scope) -> str:
+    """以路由模板作为标签, 避免路径参数导致标签过多"""
+    route = scope.get("route")
+    if route is None and "app" in scope:
+        # 在路由之前返回的响应 (如 304) 没有 route, 按路由表匹配
+        for candidate in scope["app"].router.routes:
+            if candidate.matches(scope)[0] == Match.FULL:
+                route = candidate
+                break
+    return getattr(route, "path", None) or "unmatched"
+
+
+def _server_timing(timing: dict) -> str:
+    return ", ".join(
+        f"{name};dur={timing[name] * 1000:.1f}" for name in PHASES if name in timing
+    )
+
+
+def _finalize(timing: dict, elapsed: float):
+    """由 load 与 fetch 推出 compute, 并记录 total"""
+    timing["total"] = elapsed
+    if "load" in timing:
+        timing["compute"] = max(timing["load"] - timing.get("fetch", 0.0), 0.0)
+
+
+class TelemetryMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        # 批量请求的子请求 (见 batch.py) 计入批量请求本身, 不单独统计
+        if (
+            scope["type"] != "http"
+            or not scope["path"].startswith("/api/")
+            or scope.get("factorview.subrequest")
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        timing = {"lock": threading.Lock()}
+        token = _current.set(timing)
+        start = time.perf_counter()
+        body_bytes = 0
+
+        async def send_with_timing(message: Message):
+            nonlocal body_bytes
+            if message["type"] == "http.response.start":
+                _finalize(timing, time.perf_counter() - start)
+                MutableHeaders(scope=message)["Server-Timing"] = _server_timing(timing)
+            elif message["type"] == "http.response.body":
+                body_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            _finalize(timing, time.perf_counter() - start)
+            route = _route_name(scope)
+            for name in PHASES:
+                if name in timing:
+                    phase_seconds.observe(timing[name], route, name)
+            response_bytes.observe(body_bytes, route)
+            if "rows" in timing:
+                fetched_rows.observe(timing["rows"], route)
+
+
+def render_metrics() -> str:
+    lines = []
+    for histogram in (phase_seconds, response_bytes, fetched_rows):
+        lines.extend(histogram.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,57 @@
+import axios from 'axios'
+import { tableFromIPC } from 'apache-arrow'
+
+export const ARROW_MEDIA_TYPE = 'application/vnd.apache.arrow.stream'
+
+const DAY_MS = 24 * 60 * 60 * 1000
+
+// 距 1970-01-01 的天数转为 YYYY-MM-DD
+const formatDay = (day) => (day === null ? null : new Date(day * DAY_MS).toISOString().slice(0, 10))
+
+// 单个数据块解码为与 JSON 接口相同的 { values, index }
+const decodeBlock = (bytes, orient) => {
+  const table = tableFromIPC(bytes)
+  const dateColumns = JSON.parse(table.schema.metadata.get('date_columns') || '[]')
+  const columns = {}
+  for (const field of table.schema.fields) {
+    const values = Array.from(table.getChild(field.name))
+    columns[field.name] = dateColumns.includes(field.name) ? values.map(formatDay) : values
+  }
+  const index = columns.__index__
+  delete columns.__index__
+
+  if (orient === 'rows') {
+    const names = Object.keys(columns)
+    return { values: index.map((_, i) => names.map(name => columns[name][i])), index }
+  }
+  return { values: columns, index }
+}
+
+export const decodeArrowBlocks = (buffer) => {
+  const outer = tableFromIPC(new Uint8Array(buffer))
+  const names = outer.getChild('name')
+  const orients = outer.getChild('orient')
+  const data = outer.getChild('data')
+  const res = {}
+  for (let i = 0; i < outer.numRows; i++) {
+    res[names.get(i)] = decodeBlock(data.get(i), orients.get(i))
+  }
+  // 数据块之外的附加信息 (如增量同步的 sync) 以 JSON 存在表的元数据中
+  for (const [key, value] of outer.schema.metadata) {
+    res[key] = JSON.parse(value)
+  }
+  return res
+}
+
+// 以 Arrow IPC 格式请求, 服务端返回 JSON 时按 JSON 解析
+export const getArrowBlocks = async (url, params) => {
+  const response = await axios.get(url, {
+    params,
+    responseType: 'arraybuffer',
+    headers: { Accept: `${ARROW_MEDIA_TYPE}, application/json;q=0.9` }
+  })
+  if ((response.headers['content-type'] || '').includes(ARROW_MEDIA_TYPE)) {
+    return decodeArrowBlocks(response.data)
+  }
+  return JSON.parse(new TextDecoder().decode(response.data))
+}
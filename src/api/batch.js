@@ -0,0 +1,61 @@
+import axios from 'axios'
+
+const API_BASE_URL = import.meta.env.VITE_API_PREFIX || '/api'
+
+// 与服务端 FACTORVIEW_BATCH_MAX_QUERIES 一致
+const BATCH_MAX_QUERIES = 50
+
+// 与 axios 默认一致的参数名: 数组参数为 key[], 忽略空值
+const toBatchParams = (params = {}) => {
+  const out = {}
+  for (const [key, value] of Object.entries(params)) {
+    if (value === null || value === undefined) continue
+    out[Array.isArray(value) && !key.endsWith('[]') ? `${key}[]` : key] = value
+  }
+  return out
+}
+
+// 与 axios 请求失败时结构一致的错误, 便于调用方统一处理
+const batchError = ({ status, body }) => {
+  const error = new Error(body?.detail ? String(body.detail) : `Request failed with status code ${status}`)
+  error.response = { status, data: body }
+  return error
+}
+
+const sendBatch = async (items) => {
+  if (items.length === 1) {
+    // 只有一个请求时直接 GET, 保留 ETag 等单接口的 HTTP 缓存
+    const [{ path, params, resolve, reject }] = items
+    axios.get(`${API_BASE_URL}${path}`, { params }).then(response => resolve(response.data), reject)
+    return
+  }
+  try {
+    const response = await axios.post(`${API_BASE_URL}/api/batch`, {
+      queries: items.map(({ path, params }) => ({ path, params: toBatchParams(params) }))
+    })
+    response.data.results.forEach((result, i) => {
+      if (result.status < 400) items[i].resolve(result.body)
+      else items[i].reject(batchError(result))
+    })
+  } catch (error) {
+    items.forEach(({ reject }) => reject(error))
+  }
+}
+
+let queue = []
+
+const flush = () => {
+  const items = queue
+  queue = []
+  for (let i = 0; i < items.length; i += BATCH_MAX_QUERIES) {
+    sendBatch(items.slice(i, i + BATCH_MAX_QUERIES))
+  }
+}
+
+// 同一轮事件循环中发出的 GET 请求合并为一次 POST /api/batch, 服务端共用数据读取;
+// path 为接口路径 (如 /api/factor/stats), 返回该接口的响应数据
+export const batchGet = (path, params = {}) =>
+  new Promise((resolve, reject) => {
+    if (queue.length === 0) queueMicrotask(flush)
+    queue.push({ path, params, resolve, reject })
+  })
@@ -0,0 +1,42 @@
+const API_BASE_URL = import.meta.env.VITE_API_PREFIX || '/api'
+
+// 数据更新推送: 页面内共用一个 EventSource, 有订阅者时连接, 全部取消后断开
+const subscribers = new Set()
+let source = null
+let version = null
+
+const notify = (event) => subscribers.forEach(callback => callback(event))
+
+const connect = () => {
+  source = new EventSource(`${API_BASE_URL}/api/events`)
+  // 断线重连后版本不同时, 断线期间的变化未知, 按全部因子变化处理
+  source.addEventListener('hello', ({ data }) => {
+    const { version: current } = JSON.parse(data)
+    if (version && current && current !== version) notify({ version: current, factors: null })
+    version = current ?? version
+  })
+  source.addEventListener('version', ({ data }) => {
+    const event = JSON.parse(data)
+    version = event.version
+    notify(event)
+  })
+}
+
+// 订阅数据更新, callback({ version, factors }) 中 factors 为受影响的因子,
+// 为 null 时表示未知; 返回取消订阅的函数
+export const subscribeDataEvents = (callback) => {
+  if (typeof EventSource === 'undefined') return () => {}
+  subscribers.add(callback)
+  if (!source) connect()
+  return () => {
+    subscribers.delete(callback)
+    if (!subscribers.size && source) {
+      source.close()
+      source = null
+    }
+  }
+}
+
+// 数据更新是否影响 factorNames 中的因子
+export const affects = ({ factors }, factorNames) =>
+  !factors || factorNames.some(name => factors.includes(name))
@@ -1,4 +1,8 @@
 import axios from 'axios'
+import { getArrowBlocks } from './arrow'
+import { batchGet } from './batch'
+import { syncSeries } from './seriesCache'
+import { streamBlocks } from './stream'
 
 const API_BASE_URL = import.meta.env.VITE_API_PREFIX || '/api'
 
@@ -7,30 +11,47 @@ export const getFactorInfo = async (params) => {
   return response.data
 }
 
-export const getFactorStats = async (params) => {
-  const response = await axios.get(`${API_BASE_URL}/api/factor/stats`, { params })
-  return response.data
-}
+// 同一轮事件循环中的统计类请求经 batchGet 合并为一次批量请求
+export const getFactorStats = (params) => batchGet('/api/factor/stats', params)
 
-export const getFactorStatsBacktest = async (params) => {
-  const response = await axios.get(`${API_BASE_URL}/api/factor/stats/backtest`, { params })
-  return response.data
+export const getFactorStatsBacktest = async (params, { arrow = false } = {}) => {
+  if (arrow) return getArrowBlocks(`${API_BASE_URL}/api/factor/stats/backtest`, params)
+  return batchGet('/api/factor/stats/backtest', params)
 }
 
-export const getFactorStatsGroup = async (params) => {
-  const response = await axios.get(`${API_BASE_URL}/api/factor/stats/group`, { params })
-  return response.data
+export const getFactorStatsGroup = async (params, { arrow = false } = {}) => {
+  if (arrow) return getArrowBlocks(`${API_BASE_URL}/api/factor/stats/group`, params)
+  return batchGet('/api/factor/stats/group', params)
 }
 
-export const getFactorStatsIC = async (params) => {
-  const response = await axios.get(`${API_BASE_URL}/api/factor/stats/ic`, { params })
-  return response.data
+export const getFactorStatsIC = async (params, { arrow = false } = {}) => {
+  if (arrow) return getArrowBlocks(`${API_BASE_URL}/api/factor/stats/ic`, params)
+  return batchGet('/api/factor/stats/ic', params)
 }
 
-export const getFactorPerf = async (factorName, params) => {
-  const response = await axios.get(`${API_BASE_URL}/api/factor/${factorName}`, { params })
+// 流式读取: 每个因子的数据块到达时调用 onBlock(factorName, block)
+export const streamFactorStatsBacktest = (params, onBlock) =>
+  streamBlocks(`${API_BASE_URL}/api/factor/stats/backtest`, params, onBlock)
+
+export const streamFactorStatsGroup = (params, onBlock) =>
+  streamBlocks(`${API_BASE_URL}/api/factor/stats/group`, params, onBlock)
+
+export const streamFactorStatsIC = (params, onBlock) =>
+  streamBlocks(`${API_BASE_URL}/api/factor/stats/ic`, params, onBlock)
+
+export const getFactorPerf = async (factorName, params, { arrow = false } = {}) => {
+  if (arrow) return getArrowBlocks(`${API_BASE_URL}/api/factor/${factorName}`, params)
+  return batchGet(`/api/factor/${factorName}`, params)
+}
+// 使用该因子的策略
+export const getFactorStrategies = async (factorName) => {
+  const response = await axios.get(`${API_BASE_URL}/api/factor/${factorName}/strategies`)
   return response.data
 }
+
+// 因子全历史序列, 缓存在 IndexedDB 中并按版本号增量同步; params 不含日期区间
+export const syncFactorPerf = (factorName, params) => syncSeries(`/api/factor/${factorName}`, params)
+
 export const getFactorUpdate = async (params) => {
   const response = await axios.get(`${API_BASE_URL}/api/factor/update`, { params })
   return response.data
@@ -0,0 +1,71 @@
+import { batchGet } from './batch'
+
+// 浏览器端的序列缓存: 单个因子/策略的全历史序列保存在 IndexedDB 中,
+// 之后只请求上次版本号之后的行 (since), 服务端判断历史被改写时整体替换
+const DB_NAME = 'factorview'
+const STORE_NAME = 'series'
+
+let dbPromise = null
+
+const openDB = () => {
+  if (!dbPromise) {
+    dbPromise = new Promise((resolve) => {
+      if (typeof indexedDB === 'undefined') return resolve(null)
+      const request = indexedDB.open(DB_NAME, 1)
+      request.onupgradeneeded = () => request.result.createObjectStore(STORE_NAME)
+      request.onsuccess = () => resolve(request.result)
+      // 无法使用 IndexedDB (如隐私模式) 时不缓存
+      request.onerror = () => resolve(null)
+    })
+  }
+  return dbPromise
+}
+
+const withStore = async (mode, action) => {
+  const db = await openDB()
+  if (!db) return null
+  return new Promise((resolve) => {
+    const request = action(db.transaction(STORE_NAME, mode).objectStore(STORE_NAME))
+    request.onsuccess = () => resolve(request.result ?? null)
+    request.onerror = () => resolve(null)
+  })
+}
+
+const readEntry = (key) => withStore('readonly', store => store.get(key))
+const writeEntry = (key, entry) => withStore('readwrite', store => store.put(entry, key))
+
+// 按行的数据块 { values: [...], index: [...] } 追加新行
+const appendBlock = (block, delta) => {
+  if (!block) return delta
+  if (!delta || !delta.index.length) return block
+  return { values: [...block.values, ...delta.values], index: [...block.index, ...delta.index] }
+}
+
+// 按 YYYY-MM-DD 取 [startDate, endDate] 区间的行
+export const sliceBlocks = (blocks, startDate, endDate) => Object.fromEntries(
+  Object.entries(blocks).map(([name, block]) => {
+    const keep = block.index.map(date => (!startDate || date >= startDate) && (!endDate || date <= endDate))
+    return [name, {
+      values: block.values.filter((_, i) => keep[i]),
+      index: block.index.filter((_, i) => keep[i])
+    }]
+  })
+)
+
+// 同步 path 接口的全历史序列并返回 { 数据块名: 数据块 }, params 不含日期区间
+export const syncSeries = async (path, params = {}) => {
+  const key = `${path}?${JSON.stringify(Object.entries(params).sort())}`
+  const cached = await readEntry(key)
+  const { sync, ...delta } = await batchGet(path, { ...params, since: cached?.version ?? '' })
+
+  let blocks = delta
+  if (cached && !sync.full_resync) {
+    blocks = Object.fromEntries(
+      Object.keys({ ...cached.blocks, ...delta }).map(name => [name, appendBlock(cached.blocks[name], delta[name])])
+    )
+  }
+  if (sync.version && sync.version !== cached?.version) {
+    await writeEntry(key, { version: sync.version, blocks })
+  }
+  return blocks
+}
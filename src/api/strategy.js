@@ -1,4 +1,7 @@
 import axios from 'axios'
+import { getArrowBlocks } from './arrow'
+import { batchGet } from './batch'
+import { syncSeries } from './seriesCache'
 
 const API_BASE_URL = import.meta.env.VITE_API_PREFIX || '/api'
 
@@ -7,12 +10,13 @@ export const getStrategy = async (params) => {
   return response.data
 }
 
-export const getStrategyPerf = async (strategyName, params) => {
-  const response = await axios.get(`${API_BASE_URL}/api/strategy/${strategyName}`, { params })
-  return response.data
+export const getStrategyPerf = async (strategyName, params, { arrow = false } = {}) => {
+  if (arrow) return getArrowBlocks(`${API_BASE_URL}/api/strategy/${strategyName}`, params)
+  return batchGet(`/api/strategy/${strategyName}`, params)
 }
 
-export const getStrategyFactorPerf = async (strategyName, params) => {
-  const response = await axios.get(`${API_BASE_URL}/api/strategy/${strategyName}/factors`, { params })
-  return response.data
-}
+// 策略全历史序列, 缓存在 IndexedDB 中并按版本号增量同步; params 不含日期区间
+export const syncStrategyPerf = (strategyName, params) => syncSeries(`/api/strategy/${strategyName}`, params)
+
+export const getStrategyFactorPerf = (strategyName, params) =>
+  batchGet(`/api/strategy/${strategyName}/factors`, params)
@@ -0,0 +1,47 @@
+export const NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+
+// 与 axios 默认一致的查询串: 数组参数为 key[]=a&key[]=b, 忽略空值
+const toQuery = (params = {}) => {
+  const search = new URLSearchParams()
+  for (const [key, value] of Object.entries(params)) {
+    if (value === null || value === undefined) continue
+    if (Array.isArray(value)) {
+      value.forEach(item => search.append(`${key}[]`, item))
+    } else {
+      search.append(key, value)
+    }
+  }
+  return search.toString()
+}
+
+// 逐行读取 NDJSON 流式接口, 每收到一个数据块调用 onBlock(name, block),
+// 结束后返回全部数据块 { name: block }
+export const streamBlocks = async (url, params, onBlock) => {
+  const query = toQuery({ ...params, stream: true })
+  const response = await fetch(`${url}?${query}`, { headers: { Accept: NDJSON_MEDIA_TYPE } })
+  if (!response.ok) {
+    throw new Error(`${response.status} ${response.statusText}`)
+  }
+
+  const blocks = {}
+  const handleLine = (line) => {
+    if (!line.trim()) return
+    const { name, ...block } = JSON.parse(line)
+    blocks[name] = block
+    if (onBlock) onBlock(name, block)
+  }
+
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+  for (;;) {
+    const { done, value } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+    const lines = buffer.split('\n')
+    buffer = lines.pop()
+    lines.forEach(handleLine)
+  }
+  handleLine(buffer + decoder.decode())
+  return blocks
+}
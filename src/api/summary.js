@@ -0,0 +1,22 @@
+// 服务端汇总中的 NaN / inf 序列化为 null (如单行回测的年化换手、空区间的全部指标), 显示为 '-'
+export const formatFixed = (value, digits) => (value == null ? '-' : value.toFixed(digits))
+export const formatPercent = (value, digits = 2) => (value == null ? '-' : (value * 100).toFixed(digits) + '%')
+
+// 按列的汇总数据块 { values: { 列名: [...] }, index: [...] } 转为 { 行名: { 列名: 值 } }
+export const summaryRows = (block) => {
+  if (!block || !block.values || !block.index) return null
+  const columns = Object.keys(block.values)
+  return Object.fromEntries(block.index.map((name, i) => [
+    name,
+    Object.fromEntries(columns.map(column => [column, block.values[column][i]]))
+  ]))
+}
+
+// 流式接口逐个因子到达的汇总行追加到按列的汇总数据块, 返回新的数据块
+export const appendSummaryRow = (block, name, row) => {
+  const values = { ...(block?.values || {}) }
+  Object.entries(row).forEach(([column, value]) => {
+    values[column] = [...(values[column] || []), value]
+  })
+  return { values, index: [...(block?.index || []), name] }
+}